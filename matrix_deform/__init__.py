@@ -2,14 +2,20 @@
 from .version import *
 
 
-def load():
+def load(api=1):
     """Load the plug-in from the package.
 
     To allow Maya the read the plug-in file correctly the `matrix_deform`
     package should be importable.
+
+    Args:
+        api (int): Load the nodes implemented with Maya's Python API 1.0 or
+            the ones implemented with the API 2.0 (`matrix_deform.api2`).
     """
     import os
     import maya.cmds as mc
     directory = os.path.dirname(__file__)
+    if api == 2:
+        directory = os.path.join(directory, 'api2')
     plugin = os.path.join(directory, 'plugin.py')
     mc.loadPlugin(plugin, quiet=True)
\ No newline at end of file
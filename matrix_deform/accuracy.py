@@ -0,0 +1,147 @@
+"""Report the error of single precision evaluation against double precision.
+
+The world space kernels of `matrix_deform.kernels` deform float32 matrices
+in single precision when given `dtype=np.float32`, and the nodes do so for
+`outMatrices` with their `precision` attribute set to "single". That halves
+the memory traffic of large batches at the cost of precision. `report()`
+measures that cost for a given set of inputs, so the cheaper mode can be
+switched on per shot with confidence:
+
+    >>> from matrix_deform import accuracy
+    >>> accuracy.report("bend", matrices, deformMatrix, curvature=45.0)
+    {'count': 10000, 'maxPositionError': 4.2e-07, ...}
+
+Or for the benchmark inputs, or the matrices in a .npy file:
+
+    python -m matrix_deform.accuracy
+    python -m matrix_deform.accuracy --kernel bend --input instances.npy \
+        --parameter curvature=45
+
+"""
+import argparse
+import sys
+import timeit
+
+import numpy as np
+
+from matrix_deform import kernels
+
+
+def report(kernel, matrices, deformMatrix, dtype=np.float32, **parameters):
+    """Return the error of `kernel` evaluated in `dtype` against float64.
+
+    The positional error is the distance between the translations and the
+    angular error the angle between the rotations of the matrices (see
+    `kernels.decompose()`) in degrees.
+
+    Args:
+        kernel (str): The kernel's name: "bend", "twist" or "wave".
+        matrices (array_like): The (N, 4, 4) world space input matrices.
+        deformMatrix (array_like): The (4, 4) deformer matrix.
+        dtype (np.dtype): The float type to compare against float64.
+        **parameters: The keyword arguments for the kernel.
+
+    Returns:
+        dict: The "count" of matrices, the "maxPositionError",
+            "meanPositionError", "maxAngularError" and "meanAngularError",
+            and the "referenceSeconds" and "seconds" of the evaluation in
+            float64 and `dtype`.
+    """
+    if kernel not in kernels.LOCAL_KERNELS:
+        raise ValueError("Unknown kernel: {0}".format(kernel))
+    function = getattr(kernels, kernel)
+
+    reference = kernels.asMatrices(matrices)
+    inputs = reference.astype(dtype)
+
+    start = timeit.default_timer()
+    expected = function(reference, deformMatrix, **parameters)
+    referenceSeconds = timeit.default_timer() - start
+
+    start = timeit.default_timer()
+    result = function(inputs, deformMatrix, dtype=dtype, **parameters)
+    seconds = timeit.default_timer() - start
+    result = result.astype(np.float64)
+
+    positionError = np.linalg.norm(result[:, 3, :3] - expected[:, 3, :3],
+                                   axis=1)
+    angularError = np.degrees(rotationAngles(
+        kernels.decompose(expected)[1], kernels.decompose(result)[1]))
+
+    count = len(reference)
+    return {
+        "count": count,
+        "maxPositionError": float(positionError.max()) if count else 0.0,
+        "meanPositionError": float(positionError.mean()) if count else 0.0,
+        "maxAngularError": float(angularError.max()) if count else 0.0,
+        "meanAngularError": float(angularError.mean()) if count else 0.0,
+        "referenceSeconds": referenceSeconds,
+        "seconds": seconds,
+    }
+
+
+def rotationAngles(a, b):
+    """Return the (N,) angles in radians between (N, 3, 3) rotations.
+
+    The angle of the rotation from `a` to `b` is found from the distance
+    between the matrices, `|a - b| = 2 * sqrt(2) * sin(angle / 2)`, which
+    unlike the trace stays accurate for the small angles of rounding errors.
+    """
+    distance = np.sqrt(np.sum((a - b) ** 2, axis=(1, 2)))
+    return 2.0 * np.arcsin(np.minimum(distance / (2.0 * np.sqrt(2.0)), 1.0))
+
+
+def main(args=None):
+    from matrix_deform import benchmark
+
+    parser = argparse.ArgumentParser(
+        prog="python -m matrix_deform.accuracy",
+        description="Report the error of single precision evaluation "
+                    "against double precision.")
+    parser.add_argument("--kernel", choices=sorted(kernels.LOCAL_KERNELS),
+                        help="Only report this kernel.")
+    parser.add_argument("--input",
+                        help="A .npy file with the (N, 4, 4) matrices, by "
+                             "default the benchmark cases are used.")
+    parser.add_argument("--parameter", action="append", default=[],
+                        metavar="NAME=VALUE",
+                        help="A kernel parameter for the --input matrices.")
+    parser.add_argument("--count", type=int, default=10000,
+                        help="The number of matrices per benchmark case.")
+    options = parser.parse_args(args)
+
+    if options.input:
+        if not options.kernel:
+            parser.error("--input requires a --kernel")
+        parameters = {}
+        for parameter in options.parameter:
+            name, _, value = parameter.partition("=")
+            parameters[name] = float(value)
+        cases = [(options.kernel, "input", np.load(options.input),
+                  parameters)]
+    else:
+        cases = []
+        for nodeType, nodeClass in sorted(benchmark.nodeTypes().items()):
+            if options.kernel and nodeClass.kernel != options.kernel:
+                continue
+            for case, (low, high), parameters in benchmark.CASES[nodeType]:
+                cases.append((nodeClass.kernel, case,
+                              benchmark.createMatrices(options.count, low,
+                                                       high),
+                              parameters))
+
+    print("{0:<6} {1:<17} {2:>12} {3:>12} {4:>12} {5:>12} {6:>8}".format(
+        "kernel", "case", "maxPosition", "meanPosition", "maxAngle",
+        "meanAngle", "speedup"))
+    for kernel, case, matrices, parameters in cases:
+        result = report(kernel, matrices, np.identity(4), **parameters)
+        speedup = result["referenceSeconds"] / max(result["seconds"], 1e-9)
+        print("{0:<6} {1:<17} {2:>12.3g} {3:>12.3g} {4:>12.3g} {5:>12.3g} "
+              "{6:>7.2f}x".format(
+                  kernel, case, result["maxPositionError"],
+                  result["meanPositionError"], result["maxAngularError"],
+                  result["meanAngularError"], speedup))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
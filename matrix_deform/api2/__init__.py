@@ -0,0 +1,7 @@
+"""The matrix deformation nodes for Maya's Python API 2.0.
+
+The nodes have the same node types, ids and attributes as the API 1.0 nodes
+in `matrix_deform.nodes`, so a scene works with either plug-in. Only one of
+the two plug-ins should be loaded at a time, use `matrix_deform.load(api=2)`
+to load this one.
+"""
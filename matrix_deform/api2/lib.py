@@ -0,0 +1,325 @@
+import maya.api.OpenMaya as om
+
+from matrix_deform import profiling
+
+
+class MatrixDeform(om.MPxNode):
+    """The abstract base class for Matrix deformation nodes (API 2.0).
+
+    Both `outMatrix` and `outMatrices` are deformed by the node's NumPy
+    kernel in `matrix_deform.kernels`, the matrices are passed to it as flat
+    lists of 16 values. The nodes only define their attributes and the
+    kernel's parameters.
+    """
+    # default
+    id = om.MTypeId(0x0010A52B)
+    pluginNodeTypeName = "matrixDeform"
+
+    # The name of the function in `matrix_deform.kernels` that implements
+    # the node's algorithm for arrays of matrices.
+    kernel = None
+
+    # The float types `outMatrices` can be deformed in by the kernels, in
+    # order of the `precision` enum
+    precisions = ["double", "single"]
+
+    def __init__(self):
+        om.MPxNode.__init__(self)
+        self.inverseConnected = False
+
+    def isAbstractClass(self):
+        return True
+
+    def schedulingType(self):
+        # The node is stateless, every compute only reads its datablock. The
+        # optional profiling statistics are shared but guarded by a lock.
+        return om.MPxNode.kParallel
+
+    @classmethod
+    def creator(cls):
+        return cls()
+
+    @classmethod
+    def nodeInitialize(cls):
+
+        nAttr = om.MFnNumericAttribute()
+
+        # Attr: envelope
+        cls.envelope = nAttr.create("envelope", "env",
+                                    om.MFnNumericData.kFloat, 1.0)
+        nAttr.keyable = True
+        nAttr.storable = True
+        nAttr.setSoftMin(0)
+        nAttr.setSoftMax(1)
+        cls.addAttribute(cls.envelope)
+
+        # Attr: weights
+        cls.weights = nAttr.create("weights", "weights",
+                                   om.MFnNumericData.kFloat, 1.0)
+        nAttr.array = True
+        nAttr.keyable = True
+        nAttr.storable = True
+        nAttr.setSoftMin(0)
+        nAttr.setSoftMax(1)
+        cls.addAttribute(cls.weights)
+
+        eAttr = om.MFnEnumAttribute()
+
+        # Attr: precision
+        cls.precision = eAttr.create("precision", "precision", 0)
+        for index, precision in enumerate(cls.precisions):
+            eAttr.addField(precision, index)
+        eAttr.keyable = False
+        eAttr.storable = True
+        cls.addAttribute(cls.precision)
+
+        mAttr = om.MFnMatrixAttribute()
+
+        # Attr: inMatrix
+        cls.inMatrix = mAttr.create("inMatrix", "inMat",
+                                    om.MFnMatrixAttribute.kDouble)
+        mAttr.hidden = False
+        mAttr.keyable = False
+        cls.addAttribute(cls.inMatrix)
+
+        # Attr: inDeformerMatrix
+        cls.inDeformMatrix = mAttr.create("inDeformerMatrix", "inDeformMat",
+                                          om.MFnMatrixAttribute.kDouble)
+        mAttr.hidden = False
+        mAttr.keyable = False
+        cls.addAttribute(cls.inDeformMatrix)
+
+        # Attr: inInverseDeformerMatrix
+        cls.inInverseDeformMatrix = mAttr.create(
+            "inInverseDeformerMatrix", "inInvDeformMat",
+            om.MFnMatrixAttribute.kDouble)
+        mAttr.hidden = False
+        mAttr.keyable = False
+        cls.addAttribute(cls.inInverseDeformMatrix)
+
+        # Attr: outMatrix
+        cls.outMatrix = mAttr.create("outMatrix", "outMatrix",
+                                     om.MFnMatrixAttribute.kDouble)
+        mAttr.keyable = False
+        mAttr.writable = False
+        mAttr.hidden = False
+        cls.addAttribute(cls.outMatrix)
+
+        # Attr: inMatrices
+        cls.inMatrices = mAttr.create("inMatrices", "inMats",
+                                      om.MFnMatrixAttribute.kDouble)
+        mAttr.array = True
+        mAttr.hidden = False
+        mAttr.keyable = False
+        cls.addAttribute(cls.inMatrices)
+
+        # Attr: outMatrices
+        cls.outMatrices = mAttr.create("outMatrices", "outMats",
+                                       om.MFnMatrixAttribute.kDouble)
+        mAttr.array = True
+        mAttr.usesArrayDataBuilder = True
+        mAttr.keyable = False
+        mAttr.writable = False
+        mAttr.hidden = False
+        cls.addAttribute(cls.outMatrices)
+
+        # Attribute Affects
+        cls.attributeAffects(cls.inMatrix, cls.outMatrix)
+        cls.attributeAffects(cls.inMatrices, cls.outMatrices)
+        cls.attributeAffects(cls.weights, cls.outMatrices)
+        cls.attributeAffects(cls.precision, cls.outMatrices)
+        cls.affectsOutputs(cls.inDeformMatrix)
+        cls.affectsOutputs(cls.inInverseDeformMatrix)
+        cls.affectsOutputs(cls.envelope)
+
+    @classmethod
+    def affectsOutputs(cls, attribute):
+        """Set `attribute` to affect both `outMatrix` and `outMatrices`"""
+        cls.attributeAffects(attribute, cls.outMatrix)
+        cls.attributeAffects(attribute, cls.outMatrices)
+
+    def connectionMade(self, plug, otherPlug, asSrc):
+        if plug == self.inInverseDeformMatrix:
+            self.inverseConnected = True
+        return om.MPxNode.connectionMade(self, plug, otherPlug, asSrc)
+
+    def connectionBroken(self, plug, otherPlug, asSrc):
+        if plug == self.inInverseDeformMatrix:
+            self.inverseConnected = False
+        return om.MPxNode.connectionBroken(self, plug, otherPlug, asSrc)
+
+    def compute(self, plug, datablock):
+        if not profiling.enabled:
+            return self.computeOutputs(plug, datablock)
+
+        start = profiling.timer()
+        try:
+            return self.computeOutputs(plug, datablock)
+        finally:
+            profiling.recordCompute(self, profiling.timer() - start)
+
+    def computeOutputs(self, plug, datablock):
+        """Compute `outMatrix` or `outMatrices` (see `compute`)"""
+
+        # For the elements of `outMatrices` this is the array attribute
+        attribute = plug.attribute()
+
+        if attribute == self.outMatrix:
+            inMat = datablock.inputValue(self.inMatrix).asMatrix()
+            env = datablock.inputValue(self.envelope).asFloat()
+
+            # If envelope is zero then just pass through inMatrix to outMatrix
+            if env == 0.0:
+                outMat = self.passThrough(inMat, "envelope")
+            else:
+                deformMat = datablock.inputValue(
+                    self.inDeformMatrix).asMatrix()
+                outMat = self.deformMatrix(datablock, deformMat, inMat)
+                if env != 1.0 and outMat is not inMat:
+                    outMat = self.blendMatrix(inMat, outMat, env)
+
+            handle = datablock.outputValue(self.outMatrix)
+            handle.setMMatrix(outMat)
+            handle.setClean()
+            return
+
+        if attribute == self.outMatrices:
+            self.computeArray(datablock)
+            datablock.setClean(self.outMatrices)
+            return
+
+    def computeArray(self, datablock):
+        """Compute `outMatrices` from `inMatrices` in a single batched pass"""
+        inArray = datablock.inputArrayValue(self.inMatrices)
+        indices = []
+        inMats = []
+        for i in range(len(inArray)):
+            inArray.jumpToPhysicalElement(i)
+            indices.append(inArray.elementLogicalIndex())
+            inMats.append(inArray.inputValue().asMatrix())
+
+        outArray = datablock.outputArrayValue(self.outMatrices)
+        builder = om.MArrayDataBuilder(datablock, self.outMatrices,
+                                       len(indices))
+
+        env = datablock.inputValue(self.envelope).asFloat()
+        if env == 0.0 or not indices:
+            # If envelope is zero then just pass through inMatrices
+            if indices:
+                self.passThrough(None, "envelope", len(indices))
+            for index, inMat in zip(indices, inMats):
+                builder.addElement(index).setMMatrix(inMat)
+        else:
+            weights = self.matrixWeights(datablock, indices)
+            outMats = self.deformMatrices(datablock,
+                                          [list(inMat) for inMat in inMats],
+                                          self.floatType(datablock),
+                                          [env * weight
+                                           for weight in weights])
+            for index, outMat in zip(indices, outMats.reshape(-1, 16)):
+                builder.addElement(index).setMMatrix(
+                    om.MMatrix(outMat.tolist()))
+
+        outArray.set(builder)
+        outArray.setAllClean()
+
+    def matrixWeights(self, datablock, indices):
+        """Return the `weights` of the `inMatrices` indices, 1.0 if unset"""
+        weightArray = datablock.inputArrayValue(self.weights)
+        weightsByIndex = {}
+        for i in range(len(weightArray)):
+            weightArray.jumpToPhysicalElement(i)
+            weightsByIndex[weightArray.elementLogicalIndex()] = \
+                weightArray.inputValue().asFloat()
+        return [weightsByIndex.get(index, 1.0) for index in indices]
+
+    def blendMatrix(self, mat, outMat, weight):
+        """Return `mat` blended towards the deformed `outMat` by `weight`"""
+        from matrix_deform import kernels
+
+        blended = kernels.blend(list(mat), list(outMat), weight)
+        return om.MMatrix(blended.ravel().tolist())
+
+    def nodeName(self):
+        """Return the name of the node in the scene"""
+        return om.MFnDependencyNode(self.thisMObject()).name()
+
+    def passThrough(self, mat, reason, count=1):
+        """Return `mat` unchanged because of an early exit.
+
+        With profiling enabled the early exit is recorded by its `reason`.
+        """
+        if profiling.enabled:
+            profiling.recordExit(self, reason, count)
+        return mat
+
+    def connectedInverse(self, datablock):
+        """Return the 16 values of the connected `inInverseDeformerMatrix`.
+
+        Returns None when it is not connected, then the kernels invert the
+        deformer matrix themselves.
+        """
+        if not self.inverseConnected:
+            return None
+        return list(datablock.inputValue(
+            self.inInverseDeformMatrix).asMatrix())
+
+    def deformMatrix(self, datablock, deformMat, mat):
+        """Return the deformed `mat` as `om.MMatrix`.
+
+        The matrix is deformed by the node's kernel like the `outMatrices`,
+        an unaffected `mat` is returned as is.
+        """
+        from matrix_deform import kernels
+
+        parameters = self.deformParameters(datablock)
+        reason = kernels.noEffectReason(self.kernel, **parameters)
+        if reason:
+            # Nothing changes so return the inMatrix
+            return self.passThrough(mat, reason)
+
+        stats = {}
+        outMat = kernels.cull(list(mat), list(deformMat), self.kernel, stats,
+                              inverse=self.connectedInverse(datablock),
+                              **parameters)
+        if stats["culled"]:
+            return self.passThrough(mat, "culled")
+        return om.MMatrix(outMat.ravel().tolist())
+
+    def deformParameters(self, datablock):
+        """Return the deformer parameters as keyword arguments for `kernel`"""
+        raise NotImplementedError("The node's deformParameters method should "
+                                  "be implemented on inherited nodes.")
+
+    def floatType(self, datablock):
+        """Return the float type to deform `outMatrices` in"""
+        precision = datablock.inputValue(self.precision).asShort()
+        return "float32" if self.precisions[precision] == "single" \
+            else "float64"
+
+    def deformMatrices(self, datablock, matrices, dtype="float64",
+                       weights=None):
+        """Return the deformed (N, 4, 4) array of the flat `matrices`.
+
+        The deformed matrices are blended by `weights`, the envelope or a
+        weight per matrix, where matrices with a zero weight are culled.
+        """
+        from matrix_deform import kernels
+
+        parameters = self.deformParameters(datablock)
+        reason = kernels.noEffectReason(self.kernel, **parameters)
+        if reason:
+            # Nothing changes so return the matrices
+            return self.passThrough(kernels.asMatrices(matrices, dtype),
+                                    reason, len(matrices))
+
+        # Only the affected matrices are deformed, the others are culled
+        deformMat = datablock.inputValue(self.inDeformMatrix).asMatrix()
+        stats = {}
+        outMats = kernels.cull(matrices, list(deformMat), self.kernel, stats,
+                               dtype, weights,
+                               self.connectedInverse(datablock),
+                               **parameters)
+        if stats["culled"]:
+            self.passThrough(None, "culled", stats["culled"])
+        return outMats
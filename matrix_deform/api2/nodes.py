@@ -0,0 +1,220 @@
+import maya.api.OpenMaya as om
+
+from matrix_deform.api2.lib import MatrixDeform
+
+
+class MatrixBend(MatrixDeform):
+    """The matrix deformation by the non-linear bend algorithm (API 2.0)."""
+
+    # default
+    id = om.MTypeId(0x0010A52C)
+    pluginNodeTypeName = "matrixBend"
+    kernel = "bend"
+
+    def isAbstractClass(self):
+        return False
+
+    @classmethod
+    def nodeInitialize(cls):
+        super(MatrixBend, cls).nodeInitialize()
+        nAttr = om.MFnNumericAttribute()
+
+        # Attribute: curvature
+        cls.aCurvature = nAttr.create("curvature", "curvature",
+                                      om.MFnNumericData.kDouble, 0.0)
+        nAttr.keyable = True
+        nAttr.storable = True
+        nAttr.setSoftMin(-180)
+        nAttr.setSoftMax(180)
+        cls.addAttribute(cls.aCurvature)
+
+        # Attribute: lowBound
+        cls.aLowBound = nAttr.create("lowBound", "low",
+                                     om.MFnNumericData.kDouble, -1.0)
+        nAttr.keyable = True
+        nAttr.storable = True
+        nAttr.setSoftMin(-10)
+        nAttr.setMax(0)
+        cls.addAttribute(cls.aLowBound)
+
+        # Attribute: highBound
+        cls.aHighBound = nAttr.create("highBound", "high",
+                                      om.MFnNumericData.kDouble, 1.0)
+        nAttr.keyable = True
+        nAttr.storable = True
+        nAttr.setMin(0)
+        nAttr.setSoftMax(10)
+        cls.addAttribute(cls.aHighBound)
+
+        # Attribute: asDegrees
+        cls.aAsDegrees = nAttr.create("asDegrees", "degrees",
+                                      om.MFnNumericData.kBoolean, 1.0)
+        cls.addAttribute(cls.aAsDegrees)
+
+        cls.affectsOutputs(cls.aCurvature)
+        cls.affectsOutputs(cls.aLowBound)
+        cls.affectsOutputs(cls.aHighBound)
+        cls.affectsOutputs(cls.aAsDegrees)
+
+    def deformParameters(self, datablock):
+        return {
+            "curvature": datablock.inputValue(self.aCurvature).asDouble(),
+            "lowBound": datablock.inputValue(self.aLowBound).asDouble(),
+            "highBound": datablock.inputValue(self.aHighBound).asDouble(),
+            "asDegrees": datablock.inputValue(self.aAsDegrees).asBool()
+        }
+
+
+class MatrixTwist(MatrixDeform):
+    """The matrix deformation by the non-linear twist algorithm (API 2.0)."""
+
+    # default
+    id = om.MTypeId(0x0010A52E)
+    pluginNodeTypeName = "matrixTwist"
+    kernel = "twist"
+
+    def isAbstractClass(self):
+        return False
+
+    @classmethod
+    def nodeInitialize(cls):
+        super(MatrixTwist, cls).nodeInitialize()
+        nAttr = om.MFnNumericAttribute()
+
+        # Attribute: startAngle
+        cls.aStartAngle = nAttr.create("startAngle", "start",
+                                       om.MFnNumericData.kDouble, 0.0)
+        nAttr.keyable = True
+        nAttr.storable = True
+        nAttr.setSoftMin(-859.437)
+        nAttr.setSoftMax(859.437)
+        cls.addAttribute(cls.aStartAngle)
+
+        # Attribute: endAngle
+        cls.aEndAngle = nAttr.create("endAngle", "end",
+                                     om.MFnNumericData.kDouble, 0.0)
+        nAttr.keyable = True
+        nAttr.storable = True
+        nAttr.setSoftMin(-859.437)
+        nAttr.setSoftMax(859.437)
+        cls.addAttribute(cls.aEndAngle)
+
+        # Attribute: lowBound
+        cls.aLowBound = nAttr.create("lowBound", "low",
+                                     om.MFnNumericData.kDouble, -1.0)
+        nAttr.keyable = True
+        nAttr.storable = True
+        nAttr.setSoftMin(-10)
+        nAttr.setMax(0)
+        cls.addAttribute(cls.aLowBound)
+
+        # Attribute: highBound
+        cls.aHighBound = nAttr.create("highBound", "high",
+                                      om.MFnNumericData.kDouble, 1.0)
+        nAttr.keyable = True
+        nAttr.storable = True
+        nAttr.setMin(0)
+        nAttr.setSoftMax(10)
+        cls.addAttribute(cls.aHighBound)
+
+        cls.affectsOutputs(cls.aStartAngle)
+        cls.affectsOutputs(cls.aEndAngle)
+        cls.affectsOutputs(cls.aLowBound)
+        cls.affectsOutputs(cls.aHighBound)
+
+    def deformParameters(self, datablock):
+        return {
+            "startAngle": datablock.inputValue(self.aStartAngle).asDouble(),
+            "endAngle": datablock.inputValue(self.aEndAngle).asDouble(),
+            "lowBound": datablock.inputValue(self.aLowBound).asDouble(),
+            "highBound": datablock.inputValue(self.aHighBound).asDouble()
+        }
+
+
+class MatrixWave(MatrixDeform):
+    """The matrix deformation by the non-linear wave algorithm (API 2.0)."""
+
+    # default
+    id = om.MTypeId(0x0010A52D)
+    pluginNodeTypeName = "matrixWave"
+    kernel = "wave"
+
+    def isAbstractClass(self):
+        return False
+
+    @classmethod
+    def nodeInitialize(cls):
+        super(MatrixWave, cls).nodeInitialize()
+        nAttr = om.MFnNumericAttribute()
+
+        # Attribute: amplitude
+        cls.aAmplitude = nAttr.create("amplitude", "amplitude",
+                                      om.MFnNumericData.kDouble, 0.0)
+        nAttr.keyable = True
+        nAttr.storable = True
+        nAttr.setSoftMin(-5)
+        nAttr.setSoftMax(5)
+        cls.addAttribute(cls.aAmplitude)
+
+        # Attribute: wavelength
+        cls.aWavelength = nAttr.create("wavelength", "wavelength",
+                                       om.MFnNumericData.kDouble, 1.0)
+        nAttr.keyable = True
+        nAttr.storable = True
+        nAttr.setMin(0.000001)
+        nAttr.setSoftMin(0.1)
+        nAttr.setSoftMax(10.0)
+        cls.addAttribute(cls.aWavelength)
+
+        # Attribute: offset
+        cls.aOffset = nAttr.create("offset", "offset",
+                                   om.MFnNumericData.kDouble, 0.0)
+        nAttr.keyable = True
+        nAttr.storable = True
+        nAttr.setSoftMin(-10)
+        nAttr.setSoftMax(10)
+        cls.addAttribute(cls.aOffset)
+
+        # Attribute: dropoff
+        cls.aDropoff = nAttr.create("dropoff", "dropoff",
+                                    om.MFnNumericData.kDouble, 0.0)
+        nAttr.keyable = True
+        nAttr.storable = True
+        nAttr.setMin(-1.0)
+        nAttr.setMax(1.0)
+        cls.addAttribute(cls.aDropoff)
+
+        # Attribute: minRadius
+        cls.aMinRadius = nAttr.create("minRadius", "minRadius",
+                                      om.MFnNumericData.kDouble, 0.0)
+        nAttr.keyable = True
+        nAttr.storable = True
+        nAttr.setMin(0)
+        nAttr.setSoftMax(10)
+        cls.addAttribute(cls.aMinRadius)
+
+        # Attribute: maxRadius
+        cls.aMaxRadius = nAttr.create("maxRadius", "maxRadius",
+                                      om.MFnNumericData.kDouble, 1.0)
+        nAttr.keyable = True
+        nAttr.storable = True
+        nAttr.setMin(0)
+        nAttr.setSoftMax(10)
+        cls.addAttribute(cls.aMaxRadius)
+
+        cls.affectsOutputs(cls.aAmplitude)
+        cls.affectsOutputs(cls.aWavelength)
+        cls.affectsOutputs(cls.aOffset)
+        cls.affectsOutputs(cls.aDropoff)
+        cls.affectsOutputs(cls.aMinRadius)
+        cls.affectsOutputs(cls.aMaxRadius)
+
+    def deformParameters(self, datablock):
+        return {
+            "amplitude": datablock.inputValue(self.aAmplitude).asDouble(),
+            "wavelength": datablock.inputValue(self.aWavelength).asDouble(),
+            "offset": datablock.inputValue(self.aOffset).asDouble(),
+            "dropoff": datablock.inputValue(self.aDropoff).asDouble(),
+            "minRadius": datablock.inputValue(self.aMinRadius).asDouble(),
+            "maxRadius": datablock.inputValue(self.aMaxRadius).asDouble()
+        }
@@ -0,0 +1,41 @@
+import maya.api.OpenMaya as om
+import maya.cmds as mc
+
+from matrix_deform.api2.lib import MatrixDeform
+from matrix_deform.api2.nodes import MatrixBend, MatrixTwist, MatrixWave
+
+nodes = [MatrixDeform, MatrixBend, MatrixWave, MatrixTwist]
+
+
+def maya_useNewAPI():
+    """Tell Maya that this plug-in uses the Python API 2.0"""
+    pass
+
+
+# initializePlugin
+def initializePlugin(obj):
+    plugin = om.MFnPlugin(obj, "Roy Nieterau", "0.1")
+
+    # Register nodes
+    for node in nodes:
+        try:
+            plugin.registerNode(node.pluginNodeTypeName,
+                                node.id,
+                                node.creator,
+                                node.nodeInitialize)
+        except RuntimeError as e:
+            mc.warning("Can't register plug-in node "
+                       "{0}: {1}".format(node.pluginNodeTypeName, e))
+
+
+# uninitializePlugin
+def uninitializePlugin(obj):
+    plugin = om.MFnPlugin(obj)
+
+    # Deregister nodes
+    for node in nodes:
+        try:
+            plugin.deregisterNode(node.id)
+        except RuntimeError as e:
+            mc.warning("Can't deregister plug-in node "
+                       "{0}: {1}".format(node.pluginNodeTypeName, e))
@@ -0,0 +1,100 @@
+"""Approximate the deformation of matrices by arbitrary deformers.
+
+Each matrix is encoded as a small tetrahedron in a combined 'matrix mesh':
+one point at the matrix' position and one point along each of its
+(normalized) axes. After the mesh is pushed through any deformer the
+deformed points are decoded back into matrices.
+
+Both steps work on whole arrays of matrices at once with NumPy, so a single
+mesh can carry the matrices of many thousands of particles.
+"""
+import numpy as np
+
+from matrix_deform.kernels import asMatrices, decompose
+
+# The triangles of a single tetrahedron (point indices)
+TETRAHEDRON = np.array([[0, 2, 1],
+                        [0, 1, 3],
+                        [0, 3, 2],
+                        [1, 2, 3]], dtype=np.int32)
+
+
+def encode(matrices, size=1.0):
+    """Return the combined 'matrix mesh' for `matrices`.
+
+    Args:
+        matrices (array_like): The (N, 4, 4) matrices to encode.
+        size (float): The length of the tetrahedron's axes. This should be
+            small compared to the detail of the deformation.
+
+    Returns:
+        tuple: The (N * 4, 3) points, the (N * 4,) polygon counts and the
+            (N * 12,) polygon connects of the mesh.
+    """
+    matrices = asMatrices(matrices)
+    count = len(matrices)
+
+    rotation = decompose(matrices)[1]
+    points = np.empty((count, 4, 3))
+    points[:, 0] = matrices[:, 3, :3]
+    points[:, 1:] = points[:, :1] + rotation * size
+
+    counts = np.full(count * 4, 3, dtype=np.int32)
+    connects = TETRAHEDRON[None] + (np.arange(count, dtype=np.int32) *
+                                    4)[:, None, None]
+    return points.reshape(-1, 3), counts, connects.ravel()
+
+
+def decode(points, matrices, size=1.0, keepDeformerScale=False):
+    """Return `matrices` deformed as their deformed 'matrix mesh' points.
+
+    The deformation of each tetrahedron gives the deformer's local Jacobian
+    at the matrix' position. By default only the rotation of that Jacobian
+    (its polar decomposition) is applied, so the matrices keep their own
+    scale and shear while any scale or shear from the deformer is dropped.
+
+    Args:
+        points (array_like): The (N * 4, 3) deformed mesh points.
+        matrices (array_like): The (N, 4, 4) matrices that were encoded.
+        size (float): The size that was used to `encode()` the matrices.
+        keepDeformerScale (bool): Apply the full Jacobian instead, so the
+            matrices also receive the deformer's scale and shear.
+
+    Returns:
+        np.ndarray: The (N, 4, 4) deformed matrices.
+    """
+    matrices = asMatrices(matrices)
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 4, 3)
+    if len(points) != len(matrices):
+        raise ValueError("Expected the points of {0} matrices, got "
+                         "{1}".format(len(matrices), len(points)))
+
+    # The encoded axes are `rotation * size`, so the Jacobian mapping them
+    # to the deformed axes is `rotation.T * deformedAxes / size`.
+    rotation = decompose(matrices)[1]
+    axes = points[:, 1:] - points[:, :1]
+    jacobian = np.matmul(np.swapaxes(rotation, 1, 2), axes) / size
+    if not keepDeformerScale:
+        jacobian = orthonormalize(jacobian)
+
+    result = matrices.copy()
+    result[:, :3, :3] = np.matmul(matrices[:, :3, :3], jacobian)
+    result[:, 3, :3] = points[:, 0]
+    return result
+
+
+def orthonormalize(matrices):
+    """Return the closest rotation matrices to the (N, 3, 3) `matrices`.
+
+    This is the rotation of the polar decomposition, which is invariant to
+    the order of the axes unlike Gram-Schmidt orthonormalization.
+    """
+    u, s, vt = np.linalg.svd(matrices)
+    rotation = np.matmul(u, vt)
+
+    # Avoid reflections by flipping the axis of the smallest singular value
+    flipped = np.linalg.det(rotation) < 0.0
+    if np.any(flipped):
+        u[flipped, :, -1] *= -1.0
+        rotation[flipped] = np.matmul(u[flipped], vt[flipped])
+    return rotation
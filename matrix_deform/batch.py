@@ -0,0 +1,282 @@
+"""Evaluate a deformer stack over a frame range without Maya.
+
+Render farm workers without a Maya license can precompute the deformed
+matrices from a scene description, a JSON file like:
+
+    {
+        "input": "instances.npy",
+        "output": "instances.mtxcache",
+        "frames": {"start": 1001, "end": 1100, "step": 1},
+        "scale": false,
+        "deformers": [
+            {"type": "bend",
+             "matrix": [1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 2, 0, 1],
+             "parameters": {"curvature": {"keys": [[1001, 0], [1100, 90]]},
+                            "lowBound": -2.0}},
+            {"type": "wave",
+             "matrix": {"keys": [[1001, [...]], [1100, [...]]]},
+             "parameters": {"amplitude": 0.2, "offset": {"keys": [...]}}}
+        ]
+    }
+
+and evaluate it with:
+
+    python -m matrix_deform.batch scene.json
+
+The deformers are evaluated in order with the kernels of
+`matrix_deform.kernels`, the same algorithms as the *matrixBend*,
+*matrixTwist* and *matrixWave* nodes. A value is either constant or
+animated by `keys` of (frame, value) that are interpolated linearly, and
+held before the first and after the last key. Animated deformer matrices
+are interpolated per element, so key them on every frame when they rotate.
+A deformer with a zero `envelope` parameter is skipped.
+
+The input is a .npy or .npz file of (N, 4, 4) matrices, (F, N, 4, 4)
+matrices with one set per frame, or a matrix cache (see
+`matrix_deform.cache`) that is sampled at each frame. The output is either a
+matrix cache or, for a .npy path, (F, N, 4, 4) float64 matrices. The frames
+are evaluated and written one by one and .npy files are memory-mapped, so
+the memory use does not grow with the number of frames.
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from matrix_deform import kernels
+
+
+class Value(object):
+    """A constant or linearly interpolated animated value.
+
+    Args:
+        value: A number or list of numbers, or a dict with the `keys` of
+            (frame, value) pairs.
+    """
+
+    def __init__(self, value):
+        if isinstance(value, dict):
+            keys = sorted(value["keys"], key=lambda key: key[0])
+            if not keys:
+                raise ValueError("An animated value needs at least one key")
+            self.frames = np.array([key[0] for key in keys], dtype=np.float64)
+            self.values = np.array([key[1] for key in keys], dtype=np.float64)
+        else:
+            self.frames = None
+            self.values = np.asarray(value, dtype=np.float64)
+
+    @property
+    def animated(self):
+        return self.frames is not None
+
+    def evaluate(self, frame):
+        """Return the value at `frame`"""
+        if not self.animated:
+            return self.values
+
+        values = self.values.reshape(len(self.frames), -1)
+        result = np.array([np.interp(frame, self.frames, values[:, index])
+                           for index in range(values.shape[1])])
+        return result.reshape(self.values.shape[1:])
+
+
+class Deformer(object):
+    """A single deformer of the stack.
+
+    Args:
+        kernel (str): The kernel's name: "bend", "twist" or "wave".
+        matrix: The deformer matrix, 16 values or 4x4, see `Value`.
+        parameters (dict): The kernel's parameters by name, see `Value`.
+    """
+
+    def __init__(self, kernel, matrix=None, parameters=None):
+        if kernel not in kernels.LOCAL_KERNELS:
+            raise ValueError("Unknown deformer type: {0}".format(kernel))
+        self.kernel = kernel
+        self.matrix = Value(np.identity(4).tolist() if matrix is None
+                            else matrix)
+        self.parameters = dict((name, Value(value))
+                               for name, value in (parameters or {}).items())
+
+    def layer(self, frame):
+        """Return the (kernelName, layerMatrix, parameters) at `frame`.
+
+        Returns None when the deformer's envelope is zero.
+        """
+        parameters = dict((name, value.evaluate(frame).item())
+                          for name, value in self.parameters.items())
+        if parameters.pop("envelope", 1.0) == 0.0:
+            return None
+        if "asDegrees" in parameters:
+            parameters["asDegrees"] = bool(parameters["asDegrees"])
+        return (self.kernel, self.matrix.evaluate(frame).reshape(4, 4),
+                parameters)
+
+
+class Scene(object):
+    """The deformer stack, frames and files of a batch evaluation.
+
+    Args:
+        deformers (list): The `Deformer`s in order of evaluation.
+        frames (list): The frames to evaluate, evenly spaced in ascending
+            order.
+        input (str, optional): The input matrix file.
+        output (str, optional): The output file.
+        scale (bool): Whether to store the scale in a matrix cache.
+    """
+
+    def __init__(self, deformers, frames, input=None, output=None,
+                 scale=False):
+        self.deformers = deformers
+        self.frames = list(frames)
+        self.input = input
+        self.output = output
+        self.scale = scale
+
+    @classmethod
+    def read(cls, path):
+        """Return the scene of a JSON scene description file.
+
+        Relative file paths are relative to the scene file.
+        """
+        with open(path) as f:
+            data = json.load(f)
+
+        directory = os.path.dirname(os.path.abspath(path))
+
+        def resolve(filePath):
+            if filePath is None:
+                return None
+            return os.path.join(directory, filePath)
+
+        deformers = [Deformer(deformer["type"], deformer.get("matrix"),
+                              deformer.get("parameters"))
+                     for deformer in data.get("deformers", [])]
+        return cls(deformers, frameRange(data.get("frames", [1.0])),
+                   resolve(data.get("input")), resolve(data.get("output")),
+                   bool(data.get("scale", False)))
+
+    def layers(self, frame):
+        """Return the `kernels.stack()` layers at `frame`"""
+        layers = [deformer.layer(frame) for deformer in self.deformers]
+        return [layer for layer in layers if layer is not None]
+
+    def evaluate(self, matrices, frame):
+        """Return the (N, 4, 4) `matrices` deformed at `frame`"""
+        return kernels.stack(matrices, np.identity(4), self.layers(frame))
+
+
+def frameRange(frames):
+    """Return the frames of a list or a dict with `start`, `end`, `step`"""
+    if not isinstance(frames, dict):
+        return [float(frame) for frame in frames]
+
+    start = float(frames["start"])
+    end = float(frames.get("end", start))
+    step = float(frames.get("step", 1.0))
+    if step <= 0.0:
+        raise ValueError("The frame step must be positive: {0}".format(step))
+    count = int(np.floor((end - start) / step + 1e-9)) + 1
+    return [start + index * step for index in range(max(count, 0))]
+
+
+def readInput(path, frames):
+    """Return a function that returns the input matrices per frame index.
+
+    .npy files are memory-mapped so only the matrices of the current frame
+    are read.
+    """
+    from matrix_deform.cache import Cache, MAGIC
+
+    with open(path, "rb") as f:
+        isCache = f.read(len(MAGIC)) == MAGIC
+    if isCache:
+        cache = Cache(path)
+        return lambda index: cache.sample(frames[index])
+
+    if path.endswith(".npz"):
+        with np.load(path) as archive:
+            names = archive.files
+            matrices = archive["matrices" if "matrices" in names
+                               else names[0]]
+    else:
+        matrices = np.load(path, mmap_mode="r")
+
+    if matrices.ndim == 4:
+        if len(matrices) != len(frames):
+            raise ValueError("The input has {0} frames, expected {1}".format(
+                len(matrices), len(frames)))
+        return lambda index: np.asarray(matrices[index])
+
+    matrices = kernels.asMatrices(matrices)
+    return lambda index: matrices
+
+
+def run(scene, input=None, output=None):
+    """Evaluate the scene frame by frame and write the output.
+
+    Args:
+        scene (Scene): The scene to evaluate.
+        input (str, optional): Override the scene's input file.
+        output (str, optional): Override the scene's output file.
+
+    Returns:
+        str: The written output file.
+    """
+    from matrix_deform import cache
+
+    input = input or scene.input
+    output = output or scene.output
+    if not input or not output:
+        raise ValueError("The scene needs an input and an output file")
+    if not scene.frames:
+        raise ValueError("The scene has no frames to evaluate")
+
+    inputMatrices = readInput(input, scene.frames)
+    frameIndices = dict((frame, index)
+                        for index, frame in enumerate(scene.frames))
+
+    def evaluate(frame):
+        return scene.evaluate(inputMatrices(frameIndices[frame]), frame)
+
+    if not output.endswith(".npy"):
+        cache.bake(output, evaluate, scene.frames, scene.scale)
+        return output
+
+    result = None
+    for index, frame in enumerate(scene.frames):
+        matrices = evaluate(frame)
+        if result is None:
+            result = np.lib.format.open_memmap(
+                output, mode="w+", dtype=np.float64,
+                shape=(len(scene.frames),) + matrices.shape)
+        result[index] = matrices
+    result.flush()
+    return output
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m matrix_deform.batch",
+        description="Evaluate a deformer stack over a frame range without "
+                    "Maya.")
+    parser.add_argument("scene", help="The JSON scene description.")
+    parser.add_argument("--input", help="Override the input matrix file.")
+    parser.add_argument("--output", help="Override the output file.")
+    options = parser.parse_args(args)
+
+    try:
+        scene = Scene.read(options.scene)
+        output = run(scene, options.input, options.output)
+    except (IOError, OSError, KeyError, ValueError, TypeError) as exc:
+        sys.stderr.write("Error: {0}\n".format(exc))
+        return 1
+
+    print("Wrote {0} frames to {1}".format(len(scene.frames), output))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""Benchmark the throughput of the matrix deformer nodes.
+
+The nodes are evaluated through the headless stand-in (see
+`matrix_deform.headless`) so this runs without Maya:
+
+    python -m matrix_deform.benchmark --count 2000 --output bench.json
+
+Every node is measured over a set of input distributions (`CASES`) that
+cover the regular deformation as well as the early-exit paths, like points
+outside the bounds or radius range and a zero curvature or amplitude. Each
+case is evaluated through every path in `PATHS`, for example the scalar
+`deformMatrix` per matrix versus the batched `outMatrices`, both for the API
+1.0 nodes and their API 2.0 ports in `matrix_deform.api2`. The results are
+reported as matrices per second.
+
+Note that the headless stand-in has the same cost for both APIs, so the
+difference between the API 1.0 and API 2.0 paths measured here only shows
+how the nodes use the API. Run the benchmark in `mayapy` for the actual
+per-call overhead of Maya's APIs.
+"""
+import argparse
+import json
+import platform
+import sys
+import timeit
+
+import numpy as np
+
+from matrix_deform import headless, kernels, __version__
+
+
+def createMatrices(count, low, high, seed=0):
+    """Return (count, 4, 4) random matrices positioned between low and high.
+
+    The matrices have a random rotation and a random scale between 0.5 and
+    2.0 and are positioned uniformly within the box from `low` to `high`.
+    """
+    rng = np.random.RandomState(seed)
+    euler = rng.uniform(-np.pi, np.pi, size=(count, 3))
+    rotation = np.matmul(np.matmul(kernels.rotationX(euler[:, 0]),
+                                   kernels.rotationY(euler[:, 1])),
+                         kernels.rotationZ(euler[:, 2]))
+
+    matrices = np.tile(np.identity(4), (count, 1, 1))
+    matrices[:, :3, :3] = rotation * rng.uniform(0.5, 2.0,
+                                                 size=(count, 3, 1))
+    matrices[:, 3, :3] = rng.uniform(low, high, size=(count, 3))
+    return matrices
+
+
+# The benchmark cases per node type:
+#   (case name, (low, high) position range, node parameters)
+CASES = {
+    "matrixBend": [
+        ("inside", ((-1, -1, -1), (1, 1, 1)), {"curvature": 45.0}),
+        ("outside", ((-1, 1, -1), (1, 3, 1)), {"curvature": 45.0}),
+        ("zeroCurvature", ((-1, -1, -1), (1, 1, 1)), {"curvature": 0.0}),
+    ],
+    "matrixTwist": [
+        ("inside", ((-1, -1, -1), (1, 1, 1)),
+         {"startAngle": 0.0, "endAngle": 90.0}),
+        ("outside", ((-1, 1, -1), (1, 3, 1)),
+         {"startAngle": 0.0, "endAngle": 90.0}),
+        ("outsideZeroAngle", ((-1, 1, -1), (1, 3, 1)),
+         {"startAngle": 90.0, "endAngle": 0.0}),
+        ("zeroAngles", ((-1, -1, -1), (1, 1, 1)),
+         {"startAngle": 0.0, "endAngle": 0.0}),
+    ],
+    "matrixWave": [
+        ("inside", ((-0.7, -1, -0.7), (0.7, 1, 0.7)),
+         {"amplitude": 0.2, "maxRadius": 1.0}),
+        ("outside", ((2, -1, 2), (3, 1, 3)),
+         {"amplitude": 0.2, "maxRadius": 1.0}),
+        ("dropoff", ((-0.7, -1, -0.7), (0.7, 1, 0.7)),
+         {"amplitude": 0.2, "maxRadius": 1.0, "dropoff": 0.5}),
+        ("zeroAmplitude", ((-0.7, -1, -0.7), (0.7, 1, 0.7)),
+         {"amplitude": 0.0, "maxRadius": 1.0}),
+    ],
+}
+
+
+def nodeTypes():
+    """Return the node classes to benchmark by node type name"""
+    headless.install()
+
+    from matrix_deform.nodes.matrixBend import MatrixBend
+    from matrix_deform.nodes.matrixTwist import MatrixTwist
+    from matrix_deform.nodes.matrixWave import MatrixWave
+
+    return dict((node.pluginNodeTypeName, node)
+                for node in [MatrixBend, MatrixTwist, MatrixWave])
+
+
+def api2NodeType(nodeClass):
+    """Return the API 2.0 port of the API 1.0 `nodeClass`"""
+    from matrix_deform.api2 import nodes
+
+    for node in [nodes.MatrixBend, nodes.MatrixTwist, nodes.MatrixWave]:
+        if node.pluginNodeTypeName == nodeClass.pluginNodeTypeName:
+            return node
+    raise ValueError("No API 2.0 node for: {0}".format(
+        nodeClass.pluginNodeTypeName))
+
+
+def scalarPath(nodeClass, matrices, deformMatrix, parameters):
+    """Evaluate `outMatrix` per matrix like a node per matrix would"""
+    from matrix_deform.headless.datablock import MDataBlock
+
+    node = headless.createNode(nodeClass)
+    datablock = MDataBlock(node, dict(parameters,
+                                      inDeformerMatrix=deformMatrix))
+    for matrix in matrices:
+        headless.compute(node, "outMatrix", {"inMatrix": matrix},
+                         datablock=datablock)
+
+
+def batchedPath(nodeClass, matrices, deformMatrix, parameters):
+    """Evaluate `outMatrices` for all matrices in a single compute"""
+    node = headless.createNode(nodeClass)
+    headless.compute(node, "outMatrices",
+                     dict(parameters, inDeformerMatrix=deformMatrix,
+                          inMatrices=list(matrices)))
+
+
+def scalarApi2Path(nodeClass, matrices, deformMatrix, parameters):
+    """Evaluate `outMatrix` per matrix with the API 2.0 node"""
+    scalarPath(api2NodeType(nodeClass), matrices, deformMatrix, parameters)
+
+
+def batchedApi2Path(nodeClass, matrices, deformMatrix, parameters):
+    """Evaluate `outMatrices` in a single compute with the API 2.0 node"""
+    batchedPath(api2NodeType(nodeClass), matrices, deformMatrix, parameters)
+
+
+def kernelPath(nodeClass, matrices, deformMatrix, parameters):
+    """Evaluate the NumPy kernel directly without any node overhead"""
+    getattr(kernels, nodeClass.kernel)(matrices, deformMatrix, **parameters)
+
+
+def parallelPath(nodeClass, matrices, deformMatrix, parameters):
+    """Evaluate the NumPy kernel in chunks on a thread per core"""
+    from matrix_deform import parallel
+
+    parallel.evaluate(nodeClass.kernel, matrices, deformMatrix,
+                      chunkSize=max(1024, len(matrices) // 16), **parameters)
+
+
+# The evaluation paths to compare: (name, function)
+PATHS = [
+    ("scalar", scalarPath),
+    ("batched", batchedPath),
+    ("scalarApi2", scalarApi2Path),
+    ("batchedApi2", batchedApi2Path),
+    ("kernel", kernelPath),
+    ("parallel", parallelPath),
+]
+
+
+def measure(function, args, repeat=3):
+    """Return the best time in seconds of `repeat` calls to `function`"""
+    best = None
+    for _ in range(repeat):
+        start = timeit.default_timer()
+        function(*args)
+        duration = timeit.default_timer() - start
+        if best is None or duration < best:
+            best = duration
+    return best
+
+
+def run(count=1000, repeat=3, nodes=None, paths=None, seed=0):
+    """Run the benchmarks and return the results.
+
+    Args:
+        count (int): The number of matrices per case.
+        repeat (int): The number of runs per case of which the best is used.
+        nodes (list, optional): The node type names to benchmark.
+        paths (list, optional): The evaluation path names to benchmark.
+        seed (int): The seed for the random input matrices.
+
+    Returns:
+        list: A dict per node, case and path with the results.
+    """
+    deformMatrix = np.identity(4)
+    results = []
+    for nodeType, nodeClass in sorted(nodeTypes().items()):
+        if nodes and nodeType not in nodes:
+            continue
+
+        for case, (low, high), parameters in CASES[nodeType]:
+            matrices = createMatrices(count, low, high, seed)
+            for path, function in PATHS:
+                if paths and path not in paths:
+                    continue
+
+                result = {"node": nodeType,
+                          "case": case,
+                          "path": path,
+                          "count": count}
+                try:
+                    seconds = measure(function, (nodeClass, matrices,
+                                                 deformMatrix, parameters),
+                                      repeat)
+                except Exception as exc:
+                    result["error"] = "{0}: {1}".format(type(exc).__name__,
+                                                        exc)
+                else:
+                    result["seconds"] = seconds
+                    result["matricesPerSecond"] = count / max(seconds, 1e-9)
+                results.append(result)
+    return results
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m matrix_deform.benchmark",
+        description="Benchmark the throughput of the matrix deformer nodes.")
+    parser.add_argument("--count", type=int, default=1000,
+                        help="The number of matrices per case.")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="The number of runs per case, the best is used.")
+    parser.add_argument("--node", action="append", dest="nodes",
+                        help="Only benchmark this node type.")
+    parser.add_argument("--path", action="append", dest="paths",
+                        choices=[name for name, _ in PATHS],
+                        help="Only benchmark this evaluation path.")
+    parser.add_argument("--output",
+                        help="Write the results as JSON to this file.")
+    options = parser.parse_args(args)
+
+    results = run(options.count, options.repeat, options.nodes,
+                  options.paths)
+
+    for result in results:
+        if "error" in result:
+            speed = result["error"]
+        else:
+            speed = "{0:>14,.0f} matrices/s".format(
+                result["matricesPerSecond"])
+        print("{node:<12} {case:<17} {path:<11} ".format(**result) + speed)
+
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump({"version": __version__,
+                       "python": platform.python_version(),
+                       "numpy": np.__version__,
+                       "platform": platform.platform(),
+                       "results": results}, f, indent=4, sort_keys=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
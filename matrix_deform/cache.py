@@ -0,0 +1,312 @@
+"""Bake deformed matrices over a frame range to a memory-mapped cache.
+
+The cache stores per frame and per matrix a float32 translation and unit
+quaternion, optionally followed by a float32 scale. The frames are stored
+one after another so a single frame is one contiguous block that can be
+read straight from a memory map, regardless of the size of the cache.
+
+File layout (little-endian):
+
+    header  64 bytes: magic, version, count, frame count, channels,
+            start frame and frame step (see `HEADER`)
+    data    float32 array of shape (frame count, count, channels) with the
+            channels tx, ty, tz, qx, qy, qz, qw [, sx, sy, sz]
+
+"""
+import collections
+import os
+import struct
+import threading
+import weakref
+
+import numpy as np
+
+from matrix_deform import kernels, quaternion
+
+MAGIC = b"MTXCACHE"
+VERSION = 1
+
+# magic, version, count, frame count, channels, start frame, frame step
+HEADER = struct.Struct("<8sIIII dd")
+HEADER_SIZE = 64
+
+CHANNELS = 7
+CHANNELS_SCALE = 10
+
+# Replace a file atomically, `os.rename` does so on POSIX for Python 2
+_replace = getattr(os, "replace", os.rename)
+
+# The caches with an open memory map by their normalized path. Windows can
+# not replace a file that is still mapped, so a `CacheWriter` closes these
+# before it moves the new file onto their path.
+_openCaches = collections.defaultdict(weakref.WeakSet)
+_openCachesLock = threading.Lock()
+
+
+def _normalizedPath(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _closeCaches(path):
+    """Close the memory maps of all open caches of `path`"""
+    with _openCachesLock:
+        caches = list(_openCaches.pop(_normalizedPath(path), ()))
+    for cache in caches:
+        cache.close()
+
+
+def encodeFrame(matrices, scale=False):
+    """Return the (N, channels) float32 cache data of (N, 4, 4) matrices"""
+    matrices = kernels.asMatrices(matrices)
+    scaleShear, rotation = kernels.decompose(matrices)
+
+    data = np.empty((len(matrices), CHANNELS_SCALE if scale else CHANNELS),
+                    dtype=np.float32)
+    data[:, :3] = matrices[:, 3, :3]
+    data[:, 3:7] = quaternion.fromRotations(rotation)
+    if scale:
+        data[:, 7:] = np.diagonal(scaleShear, axis1=1, axis2=2)
+    return data
+
+
+def decodeFrame(data):
+    """Return the (N, 4, 4) matrices of (N, channels) cache data"""
+    data = np.asarray(data, dtype=np.float64)
+    matrices = np.zeros((len(data), 4, 4))
+    matrices[:, :3, :3] = quaternion.toRotations(data[:, 3:7])
+    if data.shape[1] == CHANNELS_SCALE:
+        matrices[:, :3, :3] *= data[:, 7:, None]
+    matrices[:, 3, :3] = data[:, :3]
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+
+class CacheWriter(object):
+    """Write a cache incrementally, one or more frames at a time.
+
+    The frame count in the header is updated when the writer is closed, so
+    the number of frames does not have to be known up front.
+
+    The cache is written to `path + ".tmp"` which only replaces `path` when
+    the writer is closed, so until then an open `Cache` of `path` keeps
+    reading the previous file instead of a truncated one. Right before the
+    replace all open caches of `path` are closed, because Windows can not
+    replace a memory-mapped file, they have to be opened again to read the
+    new file. When the writing fails the temporary file is removed and
+    `path` is left untouched.
+
+    Example:
+        >>> with CacheWriter("bend.mtxcache", count, start=1001) as writer:
+        ...     for frame in range(1001, 1101):
+        ...         writer.write(evaluate(frame))
+
+    Args:
+        path (str): The file to write.
+        count (int): The number of matrices per frame.
+        start (float): The frame of the first sample.
+        step (float): The frames between samples.
+        scale (bool): Whether to store the scale next to translation and
+            rotation.
+    """
+
+    def __init__(self, path, count, start=0.0, step=1.0, scale=False):
+        self.path = path
+        self.count = count
+        self.start = start
+        self.step = step
+        self.channels = CHANNELS_SCALE if scale else CHANNELS
+        self.frameCount = 0
+
+        self._tmpPath = path + ".tmp"
+        self._file = open(self._tmpPath, "wb")
+        self._writeHeader()
+
+    def _writeHeader(self):
+        header = HEADER.pack(MAGIC, VERSION, self.count, self.frameCount,
+                             self.channels, self.start, self.step)
+        self._file.seek(0)
+        self._file.write(header.ljust(HEADER_SIZE, b"\0"))
+
+    def write(self, matrices):
+        """Append the matrices of one frame or an (F, N, 4, 4) chunk"""
+        matrices = kernels.asMatrices(matrices)
+        if len(matrices) % self.count:
+            raise ValueError("Expected a multiple of {0} matrices, got "
+                             "{1}".format(self.count, len(matrices)))
+
+        data = encodeFrame(matrices, self.channels == CHANNELS_SCALE)
+        self._file.seek(0, 2)
+        self._file.write(data.astype("<f4").tobytes())
+        self.frameCount += len(matrices) // self.count
+
+    def close(self):
+        """Finish the cache and move it onto `path`"""
+        if self._file.closed:
+            return
+        self._writeHeader()
+        self._file.close()
+        _closeCaches(self.path)
+        _replace(self._tmpPath, self.path)
+
+    def abort(self):
+        """Discard the cache written so far, `path` is left untouched"""
+        if self._file.closed:
+            return
+        self._file.close()
+        os.remove(self._tmpPath)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if excType is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class Cache(object):
+    """Read matrices from a cache through a memory map.
+
+    The map stays open until `close()` is called, which a `CacheWriter`
+    does when it replaces the file.
+
+    Args:
+        path (str): The cache file to read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+
+        (magic, version, self.count, self.frameCount, self.channels,
+         self.start, self.step) = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a matrix cache: {0}".format(path))
+
+        # The modification time and size of the file when it was opened, to
+        # find out whether it has been baked again since
+        stat = os.stat(path)
+        self.fileStamp = (stat.st_mtime, stat.st_size)
+
+        self.data = np.memmap(path, dtype="<f4", mode="r",
+                              offset=HEADER_SIZE,
+                              shape=(self.frameCount, self.count,
+                                     self.channels))
+        with _openCachesLock:
+            _openCaches[_normalizedPath(path)].add(self)
+
+    @property
+    def closed(self):
+        """Whether the memory map has been released by `close()`"""
+        return self.data is None
+
+    def close(self):
+        """Release the memory map, the cache can not be sampled after this.
+
+        The file stays mapped as long as arrays taken from `data` are
+        alive, the samples returned by `sample()` are copies.
+        """
+        self.data = None
+
+    @property
+    def end(self):
+        """The frame of the last sample"""
+        return self.start + (self.frameCount - 1) * self.step
+
+    def sample(self, frame, indices=None):
+        """Return the (N, 4, 4) matrices at `frame`.
+
+        Between samples the translation (and scale) is interpolated linearly
+        and the rotation spherically. Outside of the cached range the first
+        or last sample is held.
+
+        Args:
+            frame (float): The frame to sample.
+            indices (array_like, optional): Only return these matrices.
+
+        Returns:
+            np.ndarray: The (N, 4, 4) matrices.
+
+        Raises:
+            ValueError: When the cache is closed or has no frames.
+        """
+        # Hold on to the map in case another thread closes the cache
+        mapped = self.data
+        if mapped is None:
+            raise ValueError("The cache is closed: {0}".format(self.path))
+        if not self.frameCount:
+            raise ValueError("The cache has no frames: {0}".format(
+                self.path))
+        if indices is None:
+            indices = slice(None)
+
+        position = (frame - self.start) / self.step
+        position = min(max(position, 0.0), self.frameCount - 1.0)
+        index = int(position)
+        weight = position - index
+
+        if weight == 0.0:
+            return decodeFrame(mapped[index, indices])
+
+        a = np.asarray(mapped[index, indices], dtype=np.float64)
+        b = np.asarray(mapped[index + 1, indices], dtype=np.float64)
+        data = a + (b - a) * weight
+        data[:, 3:7] = quaternion.slerp(a[:, 3:7], b[:, 3:7], weight)
+        return decodeFrame(data)
+
+
+def bake(path, evaluate, frames, scale=False):
+    """Bake the matrices returned by `evaluate` for each of the `frames`.
+
+    Args:
+        path (str): The cache file to write.
+        evaluate (callable): Returns the (N, 4, 4) matrices for a frame.
+        frames (list): The frames to bake, evenly spaced in ascending order.
+        scale (bool): Whether to store the scale of the matrices.
+
+    Returns:
+        Cache: The baked cache.
+    """
+    frames = list(frames)
+    if not frames:
+        raise ValueError("No frames to bake to: {0}".format(path))
+    step = frames[1] - frames[0] if len(frames) > 1 else 1.0
+
+    writer = None
+    try:
+        for frame in frames:
+            matrices = kernels.asMatrices(evaluate(frame))
+            if writer is None:
+                writer = CacheWriter(path, len(matrices), frames[0], step,
+                                     scale)
+            writer.write(matrices)
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    writer.close()
+
+    return Cache(path)
+
+
+def bakePlugs(path, plugs, frames, scale=False):
+    """Bake the matrix `plugs` in the current Maya scene for each frame.
+
+    Args:
+        path (str): The cache file to write.
+        plugs (list): The matrix plugs to bake, like "matrixBend1.outMatrix"
+            or "matrixBend1.outMatrices[3]".
+        frames (list): The frames to bake, evenly spaced in ascending order.
+        scale (bool): Whether to store the scale of the matrices.
+
+    Returns:
+        Cache: The baked cache.
+    """
+    import maya.cmds as mc
+
+    def evaluate(frame):
+        return [mc.getAttr(plug, time=frame) for plug in plugs]
+
+    return bake(path, evaluate, frames, scale)
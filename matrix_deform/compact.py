@@ -0,0 +1,147 @@
+"""A compact structure-of-arrays layout for batches of matrices.
+
+Instead of a (N, 4, 4) float64 array per batch the matrices are stored as
+a (N, 3) translation, a (N, 4) unit quaternion (x, y, z, w like Maya's
+`MQuaternion`) and an optional (N, 3) scale, in float32 or float64. That is
+7 or 10 values instead of 16 per matrix. Shear is not represented.
+
+The bend and twist deformers compose their rotations directly on the
+quaternions, see `deform()`.
+"""
+import numpy as np
+
+from matrix_deform import kernels, quaternion
+
+# The deformer space point functions of the kernels that only rotate the
+# matrices and the axis they rotate around (in pre-transform space).
+POINT_KERNELS = {
+    "bend": (kernels.bendPoints, 2),
+    "twist": (kernels.twistPoints, 1)
+}
+
+
+class CompactMatrices(object):
+    """Matrices as separate translation, rotation and scale arrays.
+
+    Args:
+        translation (array_like): The (N, 3) translations.
+        rotation (array_like): The (N, 4) unit quaternions.
+        scale (array_like, optional): The (N, 3) scales, by default the
+            matrices are not scaled.
+        dtype (np.dtype, optional): The float type to store the arrays as,
+            by default the type of `translation`.
+    """
+
+    def __init__(self, translation, rotation, scale=None, dtype=None):
+        if dtype is None:
+            dtype = np.asarray(translation).dtype
+        self.translation = np.asarray(translation, dtype=dtype).reshape(-1, 3)
+        self.rotation = np.asarray(rotation, dtype=dtype).reshape(-1, 4)
+        self.scale = None
+        if scale is not None:
+            self.scale = np.asarray(scale, dtype=dtype).reshape(-1, 3)
+
+    def __len__(self):
+        return len(self.translation)
+
+    @property
+    def dtype(self):
+        return self.translation.dtype
+
+    @classmethod
+    def fromMatrices(cls, matrices, scale=True, dtype=np.float64):
+        """Return the compact layout of (N, 4, 4) `matrices`.
+
+        Args:
+            matrices (array_like): The matrices to convert.
+            scale (bool): Whether to keep the scale of the matrices.
+            dtype (np.dtype): The float type to store the arrays as.
+        """
+        matrices = kernels.asMatrices(matrices)
+        scaleShear, rotation = kernels.decompose(matrices)
+        return cls(matrices[:, 3, :3],
+                   quaternion.fromRotations(rotation),
+                   np.diagonal(scaleShear, axis1=1, axis2=2).copy()
+                   if scale else None,
+                   dtype)
+
+    def toMatrices(self):
+        """Return the (N, 4, 4) float64 matrices"""
+        matrices = np.zeros((len(self), 4, 4))
+        rotation = quaternion.toRotations(self.rotation.astype(np.float64))
+        if self.scale is not None:
+            rotation *= self.scale.astype(np.float64)[:, :, None]
+        matrices[:, :3, :3] = rotation
+        matrices[:, 3, :3] = self.translation
+        matrices[:, 3, 3] = 1.0
+        return matrices
+
+
+def deform(kernel, compact, deformMatrix, **parameters):
+    """Deform `compact` matrices by a kernel and return them compact.
+
+    For the bend and twist the positions are deformed by the kernel's point
+    function and the rotation around the matrix' own axis is composed
+    directly onto its quaternion. The wave's Jacobian is not a rotation and
+    a deformer matrix with non-uniform scale, shear or a mirror does not
+    keep the rotations rotations, those go through the full matrices.
+
+    Args:
+        kernel (str): The kernel's name: "bend", "twist" or "wave".
+        compact (CompactMatrices): The world space matrices.
+        deformMatrix (array_like): The (4, 4) deformer matrix.
+        **parameters: The keyword arguments for the kernel.
+
+    Returns:
+        CompactMatrices: The deformed matrices in the same float type.
+    """
+    deformMatrix = np.asarray(deformMatrix, dtype=np.float64).reshape(4, 4)
+    if kernel not in POINT_KERNELS or not _isConformal(deformMatrix):
+        matrices = getattr(kernels, kernel)(compact.toMatrices(),
+                                            deformMatrix, **parameters)
+        return CompactMatrices.fromMatrices(
+            matrices, scale=compact.scale is not None, dtype=compact.dtype)
+
+    pointKernel, axis = POINT_KERNELS[kernel]
+    invDeformMatrix = np.linalg.inv(deformMatrix)
+    positions = np.dot(compact.translation.astype(np.float64),
+                       invDeformMatrix[:3, :3]) + invDeformMatrix[3, :3]
+
+    translation = compact.translation.copy()
+    rotation = compact.rotation.copy()
+    result = CompactMatrices(translation, rotation, compact.scale)
+
+    mask = kernels.affected(kernel, positions, **parameters)
+    if not mask.any():
+        return result
+
+    points, angles = pointKernel(positions[mask], **parameters)
+    translation[mask] = (np.dot(points, deformMatrix[:3, :3]) +
+                         deformMatrix[3, :3])
+
+    # Rotating around the own axis in pre-transform space is a rotation
+    # that is applied before the matrix' rotation. For a negative scale on
+    # one of the other axes that axis and the angle are mirrored.
+    if compact.scale is not None:
+        signs = np.sign(compact.scale[mask].astype(np.float64))
+        signs[signs == 0.0] = 1.0
+        others = [index for index in range(3) if index != axis]
+        angles = angles * signs[:, others[0]] * signs[:, others[1]]
+
+    halfAngles = angles * 0.5
+    local = np.zeros((len(angles), 4))
+    local[:, axis] = np.sin(halfAngles)
+    local[:, 3] = np.cos(halfAngles)
+    rotation[mask] = quaternion.multiply(
+        local, rotation[mask].astype(np.float64))
+    return result
+
+
+def _isConformal(matrix):
+    """Return whether the upper 3x3 of `matrix` is a scaled rotation"""
+    m = matrix[:3, :3]
+    product = np.dot(m, m.T)
+    scale = np.trace(product) / 3.0
+    return (np.linalg.det(m) > 0.0 and
+            np.allclose(product, np.identity(3) * scale,
+                        rtol=0.0, atol=1e-9 * max(scale, 1.0)))
@@ -0,0 +1,217 @@
+"""Slide and orient matrices along a curve with a precomputed lookup table.
+
+A `CurveTable` resamples a curve once to evenly spaced arc lengths and
+stores the position and a rotation-minimizing frame at each sample. The
+matrices are then placed along the curve by vectorized interpolation of the
+table, so deforming many matrices costs a single table build per curve
+change plus a cheap lookup per matrix.
+
+The frames are built by the double reflection method of Wang et al.,
+"Computation of Rotation Minimizing Frames" (2008), so they do not flip at
+inflection points like Frenet frames do.
+"""
+import numpy as np
+
+from matrix_deform import kernels, quaternion
+
+# The default number of evenly spaced arc length samples of a table.
+SAMPLES = 256
+
+
+class CurveTable(object):
+    """The arc length parameterized positions and frames of a curve.
+
+    Each frame is a rotation that maps the y-axis to the curve's tangent and
+    the x- and z-axis to the normal and binormal, rotating as little as
+    possible along the curve.
+
+    Args:
+        points (array_like): The (M, 3) points of the curve densely sampled
+            in order along the curve.
+        samples (int): The number of evenly spaced arc length samples.
+        up (array_like): The direction the normal at the start of the curve
+            points towards.
+    """
+
+    def __init__(self, points, samples=SAMPLES, up=(1.0, 0.0, 0.0)):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        if len(points) < 2:
+            raise ValueError("A curve table needs at least two points")
+        samples = max(int(samples), 2)
+
+        # Resample to evenly spaced arc lengths along the polyline
+        lengths = np.concatenate([[0.0], np.cumsum(np.linalg.norm(
+            np.diff(points, axis=0), axis=1))])
+        self.length = lengths[-1]
+        self.step = self.length / (samples - 1)
+        arcLengths = np.linspace(0.0, self.length, samples)
+        self.positions = np.stack([np.interp(arcLengths, lengths,
+                                             points[:, axis])
+                                   for axis in range(3)], axis=1)
+
+        tangents = _normalize(np.gradient(self.positions, axis=0))
+        normals = _rotationMinimizingNormals(self.positions, tangents, up)
+        self.frames = np.stack([normals, tangents,
+                                np.cross(normals, tangents)], axis=1)
+        self.quaternions = quaternion.fromRotations(self.frames)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def sample(self, lengths):
+        """Return the positions and frames at the arc `lengths`.
+
+        Positions and frames are interpolated between the samples, beyond
+        the ends of the curve the positions continue straight along the end
+        tangents with the end frames.
+
+        Args:
+            lengths (array_like): The (N,) arc lengths along the curve.
+
+        Returns:
+            tuple: The (N, 3) positions and (N, 3, 3) frames.
+        """
+        lengths = np.asarray(lengths, dtype=np.float64).reshape(-1)
+        clamped = np.clip(lengths, 0.0, self.length)
+
+        if self.step > 0.0:
+            position = clamped / self.step
+        else:
+            position = np.zeros_like(clamped)
+        index = np.minimum(position.astype(np.int64), len(self) - 2)
+        weight = position - index
+
+        positions = (self.positions[index] * (1.0 - weight)[:, None] +
+                     self.positions[index + 1] * weight[:, None])
+        frames = quaternion.toRotations(quaternion.slerp(
+            self.quaternions[index], self.quaternions[index + 1], weight))
+
+        # Continue along the tangent outside of the curve
+        positions += frames[:, 1] * (lengths - clamped)[:, None]
+        return positions, frames
+
+
+def nurbsPoints(cvs, knots, degree, count):
+    """Return points evenly spaced in parameter along a NURBS curve.
+
+    All points are evaluated at once by de Boor's algorithm on arrays of
+    the control points of each point's knot span, instead of querying the
+    curve point by point.
+
+    Args:
+        cvs (array_like): The (N, 4) control points with their weight as w,
+            as `MFnNurbsCurve.getCVs` gives them.
+        knots (array_like): The N + degree - 1 knots in Maya's convention,
+            without the outermost knot at either end.
+        degree (int): The degree of the curve.
+        count (int): The number of points over the knot domain.
+
+    Returns:
+        np.ndarray: The (count, 3) points.
+    """
+    cvs = np.asarray(cvs, dtype=np.float64).reshape(-1, 4)
+    knots = np.asarray(knots, dtype=np.float64).reshape(-1)
+    if len(knots) != len(cvs) + degree - 1:
+        raise ValueError("A degree %d curve with %d CVs needs %d knots, not "
+                         "%d" % (degree, len(cvs), len(cvs) + degree - 1,
+                                 len(knots)))
+
+    # Add the outermost knots Maya leaves out
+    knots = np.concatenate([knots[:1], knots, knots[-1:]])
+    params = np.linspace(knots[degree], knots[len(cvs)], max(int(count), 2))
+    spans = np.clip(np.searchsorted(knots, params, side="right") - 1,
+                    degree, len(cvs) - 1)
+
+    # Weigh the control points for rational curves
+    homogeneous = np.concatenate([cvs[:, :3] * cvs[:, 3:], cvs[:, 3:]],
+                                 axis=1)
+    points = homogeneous[spans[:, None] + np.arange(-degree, 1)]
+    for r in range(1, degree + 1):
+        for j in range(degree, r - 1, -1):
+            left = knots[spans + j - degree]
+            width = knots[spans + j + 1 - r] - left
+            alpha = np.divide(params - left, width,
+                              out=np.zeros_like(params), where=width > 0.0)
+            points[:, j] = ((1.0 - alpha)[:, None] * points[:, j - 1] +
+                            alpha[:, None] * points[:, j])
+    return points[:, degree, :3] / points[:, degree, 3:]
+
+
+def deform(matrices, deformMatrix, table, offset=0.0, stretch=1.0,
+           inverse=None):
+    """Slide and orient `matrices` along the curve of `table`.
+
+    In the deformer's space the y-axis is mapped onto the curve: a matrix at
+    height y is moved to the arc length `y * stretch + offset` with its x and
+    z offset along the curve's normal and binormal, and rotated by the
+    curve's frame there. Like the other kernels the results are transformed
+    back to world space by `deformMatrix`.
+
+    Args:
+        matrices (array_like): The (N, 4, 4) world space input matrices.
+        deformMatrix (array_like): The (4, 4) deformer matrix.
+        table (CurveTable): The curve to deform along in the deformer's
+            space.
+        offset (float): The arc length that deformer space y = 0 maps to.
+        stretch (float): The arc length per unit along deformer space y.
+        inverse (array_like, optional): The (4, 4) inverse of
+            `deformMatrix` to use instead of inverting it.
+
+    Returns:
+        np.ndarray: The (N, 4, 4) deformed matrices.
+    """
+    local = kernels.toLocal(kernels.asMatrices(matrices), deformMatrix,
+                            inverse)
+    positions, frames = table.sample(local[:, 3, 1] * stretch + offset)
+
+    result = local.copy()
+    result[:, :3, :3] = np.matmul(local[:, :3, :3], frames)
+    result[:, 3, :3] = (positions +
+                        local[:, 3, 0, None] * frames[:, 0] +
+                        local[:, 3, 2, None] * frames[:, 2])
+    return kernels.toWorld(result, deformMatrix)
+
+
+def _rotationMinimizingNormals(positions, tangents, up):
+    """Return the (S, 3) normals of the rotation-minimizing frames"""
+    up = np.asarray(up, dtype=np.float64).reshape(3)
+    normal = up - np.dot(up, tangents[0]) * tangents[0]
+    if np.dot(normal, normal) < 1e-12:
+        # The up direction is along the tangent, pick the least aligned axis
+        axis = np.identity(3)[np.argmin(np.abs(tangents[0]))]
+        normal = axis - np.dot(axis, tangents[0]) * tangents[0]
+    normal /= np.linalg.norm(normal)
+
+    normals = np.empty_like(positions)
+    normals[0] = normal
+    for i in range(len(positions) - 1):
+        # Reflect the frame in the bisecting plane of the two points and
+        # then once more to align the reflected tangent with the next one
+        v1 = positions[i + 1] - positions[i]
+        c1 = np.dot(v1, v1)
+        if c1 == 0.0:
+            normals[i + 1] = normal
+            continue
+        reflectedNormal = normal - (2.0 / c1) * np.dot(v1, normal) * v1
+        reflectedTangent = (tangents[i] -
+                            (2.0 / c1) * np.dot(v1, tangents[i]) * v1)
+
+        v2 = tangents[i + 1] - reflectedTangent
+        c2 = np.dot(v2, v2)
+        if c2 > 0.0:
+            normal = reflectedNormal - (2.0 / c2) * np.dot(
+                v2, reflectedNormal) * v2
+        else:
+            normal = reflectedNormal
+
+        # Keep the normal exactly perpendicular to the tangent
+        normal = normal - np.dot(normal, tangents[i + 1]) * tangents[i + 1]
+        normal /= np.linalg.norm(normal)
+        normals[i + 1] = normal
+    return normals
+
+
+def _normalize(vectors):
+    length = np.sqrt(np.einsum("ij,ij->i", vectors, vectors))
+    length[length == 0.0] = 1.0
+    return vectors / length[:, None]
@@ -0,0 +1,583 @@
+"""A pure-Python/NumPy stand-in for the subset of `maya.OpenMaya` in use.
+
+Only what the nodes of this package use is implemented. The math classes
+follow Maya's conventions (row vectors, translation in the last row) so the
+`deformMatrix` implementations give the same results as in Maya.
+"""
+import math
+import warnings
+
+import numpy as np
+
+
+class MSpace(object):
+    kInvalid = 0
+    kTransform = 1
+    kPreTransform = 2
+    kPostTransform = 3
+    kWorld = 4
+    kObject = kPreTransform
+
+
+class MTypeId(object):
+    def __init__(self, id):
+        self._id = id
+
+    def id(self):
+        return self._id
+
+    def __eq__(self, other):
+        return isinstance(other, MTypeId) and other._id == self._id
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._id)
+
+
+class MVector(object):
+    def __init__(self, *args):
+        if len(args) == 1:
+            args = tuple(args[0][i] for i in range(3))
+        elif not args:
+            args = (0.0, 0.0, 0.0)
+        self.x, self.y, self.z = (float(value) for value in args)
+
+    def __getitem__(self, index):
+        return (self.x, self.y, self.z)[index]
+
+    def __add__(self, other):
+        return MVector(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other):
+        return MVector(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __mul__(self, scalar):
+        return MVector(self.x * scalar, self.y * scalar, self.z * scalar)
+
+    def __neg__(self):
+        return MVector(-self.x, -self.y, -self.z)
+
+    def __repr__(self):
+        return "MVector({0}, {1}, {2})".format(self.x, self.y, self.z)
+
+    def length(self):
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+
+class MMatrix(object):
+    def __init__(self, values=None):
+        if values is None:
+            self._m = np.identity(4)
+        elif isinstance(values, MMatrix):
+            self._m = values._m.copy()
+        else:
+            self._m = np.array(values, dtype=np.float64).reshape(4, 4)
+
+    def __call__(self, row, column):
+        return float(self._m[row, column])
+
+    def __iter__(self):
+        return iter(self._m.ravel().tolist())
+
+    def __len__(self):
+        return 16
+
+    def __getitem__(self, index):
+        return float(self._m.flat[index])
+
+    def __mul__(self, other):
+        return MMatrix(np.dot(self._m, other._m))
+
+    def __eq__(self, other):
+        return isinstance(other, MMatrix) and np.array_equal(self._m, other._m)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "MMatrix({0})".format(self._m.ravel().tolist())
+
+    def inverse(self):
+        return MMatrix(np.linalg.inv(self._m))
+
+    def transpose(self):
+        return MMatrix(self._m.T)
+
+    def det4x4(self):
+        return float(np.linalg.det(self._m))
+
+    def isEquivalent(self, other, tolerance=1e-10):
+        return bool(np.all(np.abs(self._m - other._m) <= tolerance))
+
+
+class MEulerRotation(object):
+    kXYZ = 0
+
+    def __init__(self, *args):
+        if len(args) == 1:
+            args = (args[0].x, args[0].y, args[0].z)
+        elif not args:
+            args = (0.0, 0.0, 0.0)
+        self.x, self.y, self.z = (float(value) for value in args[:3])
+        self.order = args[3] if len(args) > 3 else self.kXYZ
+
+    def asMatrix(self):
+        if self.order != self.kXYZ:
+            raise NotImplementedError("Only the XYZ rotation order is "
+                                      "supported.")
+        return MMatrix(_embed(np.dot(np.dot(_rotateX(self.x),
+                                            _rotateY(self.y)),
+                                     _rotateZ(self.z))))
+
+
+class MTransformationMatrix(object):
+    """The decomposition of a matrix into translate, rotate and scale-shear.
+
+    The upper 3x3 of the matrix is `scale * shear * rotation` like Maya's
+    transformation matrix without pivots.
+    """
+
+    def __init__(self, matrix=None):
+        matrix = MMatrix(matrix)._m
+        self._translation = matrix[3, :3].copy()
+
+        m = matrix[:3, :3]
+        r0 = _normalized(m[0])
+        r1 = _normalized(m[1] - np.dot(m[1], r0) * r0)
+        r2 = _normalized(m[2] - np.dot(m[2], r0) * r0 - np.dot(m[2], r1) * r1)
+        rotation = np.array([r0, r1, r2])
+        if np.linalg.det(m) < 0.0:
+            rotation *= -1.0
+
+        self._rotation = rotation
+        self._scaleShear = np.dot(m, rotation.T)
+
+    def getTranslation(self, space):
+        return MVector(*self._translation)
+
+    def setTranslation(self, vector, space):
+        self._translation = np.array([vector.x, vector.y, vector.z])
+
+    def rotateBy(self, rotation, space):
+        rotation = rotation.asMatrix()._m[:3, :3]
+        if space == MSpace.kPreTransform:
+            self._rotation = np.dot(rotation, self._rotation)
+        else:
+            self._rotation = np.dot(self._rotation, rotation)
+
+    def asMatrix(self, percent=None):
+        scaleShear = self._scaleShear
+        rotation = self._rotation
+        translation = self._translation
+        if percent is not None:
+            identity = np.identity(3)
+            scaleShear = identity + (scaleShear - identity) * percent
+            rotation = _interpolateRotation(rotation, percent)
+            translation = translation * percent
+
+        matrix = _embed(np.dot(scaleShear, rotation))
+        matrix[3, :3] = translation
+        return MMatrix(matrix)
+
+
+class MVectorArray(object):
+    def __init__(self, vectors=None, count=None):
+        if isinstance(vectors, _Pointer):
+            vectors = vectors.array[:count]
+        elif vectors is not None:
+            vectors = [tuple(MVector(vector)) for vector in vectors]
+        self._vectors = np.array(vectors if vectors is not None else [],
+                                 dtype=np.float64).reshape(-1, 3)
+
+    def __getitem__(self, index):
+        return MVector(*self._vectors[index])
+
+    def __len__(self):
+        return len(self._vectors)
+
+    def length(self):
+        return len(self._vectors)
+
+    def append(self, vector):
+        if not isinstance(self._vectors, list):
+            self._vectors = self._vectors.tolist()
+        self._vectors.append(tuple(MVector(vector)))
+
+    def get(self, pointer):
+        pointer.array[:len(self._vectors)] = self._vectors
+
+
+class MFloatPointArray(object):
+    def __init__(self, pointer=None, count=0):
+        if pointer is None:
+            self._points = np.zeros((0, 4), dtype=np.float32)
+        else:
+            self._points = np.array(pointer.array[:count], dtype=np.float32)
+
+    def __len__(self):
+        return len(self._points)
+
+    def length(self):
+        return len(self._points)
+
+    def get(self, pointer):
+        pointer.array[:len(self._points)] = self._points
+
+
+class MPointArray(object):
+    def __init__(self):
+        self._points = np.zeros((0, 4))
+
+    def __len__(self):
+        return len(self._points)
+
+    def length(self):
+        return len(self._points)
+
+    def get(self, pointer):
+        pointer.array[:len(self._points)] = self._points
+
+
+class MDoubleArray(object):
+    def __init__(self):
+        self._values = np.zeros(0)
+
+    def __len__(self):
+        return len(self._values)
+
+    def length(self):
+        return len(self._values)
+
+    def get(self, pointer):
+        pointer.array[:len(self._values), 0] = self._values
+
+
+class MIntArray(object):
+    def __init__(self):
+        self._values = np.zeros(0, dtype=np.int32)
+
+    def __getitem__(self, index):
+        return int(self._values[index])
+
+    def __len__(self):
+        return len(self._values)
+
+    def length(self):
+        return len(self._values)
+
+
+class MData(object):
+    """The value of a typed attribute, like a vector array"""
+
+    def __init__(self, value=None):
+        self.value = value
+
+    def isNull(self):
+        return self.value is None
+
+
+class MFnVectorArrayData(object):
+    def __init__(self, data=None):
+        self._data = data
+
+    def array(self):
+        value = self._data.value
+        if isinstance(value, MVectorArray):
+            return value
+        return MVectorArray([tuple(vector) for vector in value])
+
+    def create(self, array):
+        self._data = MData(array)
+        return self._data
+
+
+class MFnMeshData(object):
+    def create(self):
+        return MData()
+
+
+class MFnMesh(object):
+    """The mesh is stored as (points, counts, connects) value of an `MData`"""
+
+    def __init__(self, data=None):
+        self._data = data
+
+    def create(self, numVertices, numPolygons, points, counts, connects,
+               parent):
+        parent.value = (np.array(points._points[:numVertices]),
+                        np.array(counts._values[:numPolygons]),
+                        np.array(connects._values))
+        self._data = parent
+        return parent
+
+    def getPoints(self, points, space=None):
+        points._points = np.array(self._data.value[0])
+
+
+class MFnNurbsCurve(object):
+    """The curve is stored as (cvs, knots, degree) value of an `MData`.
+
+    The (N, 4) cvs hold the weight of each control point as w and the
+    knots follow Maya's convention of N + degree - 1 knots.
+    """
+
+    def __init__(self, data=None):
+        self._data = data
+
+    def getCVs(self, points, space=None):
+        points._points = np.array(self._data.value[0], dtype=np.float64)
+
+    def getKnots(self, knots):
+        knots._values = np.array(self._data.value[1], dtype=np.float64)
+
+    def degree(self):
+        return int(self._data.value[2])
+
+
+class _Pointer(object):
+    """A C array handed out by `MScriptUtil`"""
+
+    def __init__(self, array):
+        self.array = array
+
+
+class MScriptUtil(object):
+    def __init__(self):
+        self._values = np.zeros(0)
+        self._pointers = {}
+
+    def createFromList(self, values, length):
+        self._values = np.array(values[:length], dtype=np.float64)
+        self._pointers = {}
+
+    def _pointer(self, dtype, width):
+        if (dtype, width) not in self._pointers:
+            array = self._values.astype(dtype).reshape(-1, width)
+            self._pointers[(dtype, width)] = _Pointer(array)
+        return self._pointers[(dtype, width)]
+
+    def asDoublePtr(self):
+        return self._pointer(np.float64, 1)
+
+    def asDouble3Ptr(self):
+        return self._pointer(np.float64, 3)
+
+    def asDouble4Ptr(self):
+        return self._pointer(np.float64, 4)
+
+    def asFloat4Ptr(self):
+        return self._pointer(np.float32, 4)
+
+    @staticmethod
+    def getDoubleArrayItem(pointer, index):
+        return float(pointer.array[index, 0])
+
+    @staticmethod
+    def _getArrayItem(pointer, row, column):
+        return float(pointer.array[row, column])
+
+    getDouble3ArrayItem = _getArrayItem
+    getDouble4ArrayItem = _getArrayItem
+    getFloat4ArrayItem = _getArrayItem
+
+    @staticmethod
+    def createIntArrayFromList(values, array):
+        array._values = np.array(values, dtype=np.int32)
+
+    @staticmethod
+    def createMatrixFromList(values, matrix):
+        matrix._m = np.array(values, dtype=np.float64).reshape(4, 4)
+
+
+class MFnData(object):
+    kInvalid = 0
+    kNumeric = 1
+    kString = 4
+    kMatrix = 5
+    kDoubleArray = 7
+    kIntArray = 8
+    kVectorArray = 10
+    kNurbsCurve = 14
+    kMesh = 16
+
+
+class MFnNumericData(object):
+    kInvalid = 0
+    kBoolean = 1
+    kShort = 3
+    kInt = 6
+    kFloat = 10
+    kDouble = 13
+    k3Double = 14
+
+
+class MObject(object):
+    """An attribute created by one of the attribute function sets"""
+
+    def __init__(self, longName, shortName, default=None):
+        self.longName = longName
+        self.shortName = shortName
+        self.default = default
+        self.children = []
+        self.parent = None
+        self.array = False
+        self.fields = {}
+
+    def __repr__(self):
+        return "MObject({0!r})".format(self.longName)
+
+    def isNull(self):
+        return False
+
+    def isElement(self):
+        return False
+
+    def attribute(self):
+        # The node computes are given attributes in place of plugs
+        return self
+
+
+class MFnAttribute(object):
+    def __init__(self):
+        self._attribute = None
+
+    def _create(self, longName, shortName, default=None):
+        self._attribute = MObject(longName, shortName, default)
+        return self._attribute
+
+    def setArray(self, state):
+        self._attribute.array = state
+
+    @property
+    def array(self):
+        return self._attribute.array
+
+    @array.setter
+    def array(self, state):
+        self._attribute.array = state
+
+    def __getattr__(self, name):
+        # All other attribute settings are ignored
+        if name.startswith("set"):
+            return lambda *args: None
+        raise AttributeError(name)
+
+
+class MFnNumericAttribute(MFnAttribute):
+    def create(self, longName, shortName, numericType, default=0.0):
+        return self._create(longName, shortName, default)
+
+
+class MFnMatrixAttribute(MFnAttribute):
+    kFloat = 0
+    kDouble = 1
+
+    def create(self, longName, shortName, matrixType=kDouble):
+        return self._create(longName, shortName, MMatrix())
+
+
+class MFnEnumAttribute(MFnAttribute):
+    def create(self, longName, shortName, default=0):
+        return self._create(longName, shortName, default)
+
+    def addField(self, name, index):
+        self._attribute.fields[name] = index
+
+
+class MFnTypedAttribute(MFnAttribute):
+    def create(self, longName, shortName, dataType, default=None):
+        return self._create(longName, shortName, default)
+
+
+class MFnCompoundAttribute(MFnAttribute):
+    def create(self, longName, shortName):
+        return self._create(longName, shortName, None)
+
+    def addChild(self, attribute):
+        attribute.parent = self._attribute
+        self._attribute.children.append(attribute)
+
+
+class MGlobal(object):
+    @staticmethod
+    def displayWarning(message):
+        warnings.warn(message, RuntimeWarning)
+
+
+class MFnDependencyNode(object):
+    def __init__(self, node):
+        self._node = node
+
+    def name(self):
+        return self._node._name
+
+
+class MArrayDataBuilder(object):
+    def __init__(self, datablock, attribute, count):
+        self._attribute = attribute
+        self._elements = {}
+
+    def addElement(self, index):
+        from matrix_deform.headless.datablock import MDataHandle
+
+        handle = MDataHandle(self._attribute, None)
+        self._elements[index] = handle
+        return handle
+
+    def values(self):
+        return dict((index, handle.value)
+                    for index, handle in self._elements.items())
+
+
+def _normalized(vector):
+    length = np.sqrt(np.dot(vector, vector))
+    return vector / length if length else vector
+
+
+def _embed(matrix):
+    result = np.identity(4)
+    result[:3, :3] = matrix
+    return result
+
+
+def _rotateX(angle):
+    c, s = math.cos(angle), math.sin(angle)
+    return np.array([[1.0, 0.0, 0.0], [0.0, c, s], [0.0, -s, c]])
+
+
+def _rotateY(angle):
+    c, s = math.cos(angle), math.sin(angle)
+    return np.array([[c, 0.0, -s], [0.0, 1.0, 0.0], [s, 0.0, c]])
+
+
+def _rotateZ(angle):
+    c, s = math.cos(angle), math.sin(angle)
+    return np.array([[c, s, 0.0], [-s, c, 0.0], [0.0, 0.0, 1.0]])
+
+
+def _interpolateRotation(rotation, percent):
+    """Return the rotation scaled by `percent` along its axis"""
+    angle = math.acos(max(-1.0, min(1.0, (np.trace(rotation) - 1.0) / 2.0)))
+    if angle < 1e-12:
+        return np.identity(3)
+
+    # The axis of the row-vector rotation matrix
+    axis = np.array([rotation[1, 2] - rotation[2, 1],
+                     rotation[2, 0] - rotation[0, 2],
+                     rotation[0, 1] - rotation[1, 0]])
+    if np.dot(axis, axis) < 1e-24:
+        # A half turn, take the axis from the symmetric part
+        symmetric = (rotation + np.identity(3)) / 2.0
+        axis = symmetric[np.argmax(np.diag(symmetric))]
+    axis = _normalized(axis)
+
+    angle *= percent
+    c, s = math.cos(angle), math.sin(angle)
+    x, y, z = axis
+    return np.array([
+        [c + x * x * (1 - c), x * y * (1 - c) + z * s, x * z * (1 - c) - y * s],
+        [y * x * (1 - c) - z * s, c + y * y * (1 - c), y * z * (1 - c) + x * s],
+        [z * x * (1 - c) + y * s, z * y * (1 - c) - x * s, c + z * z * (1 - c)]
+    ])
@@ -0,0 +1,7 @@
+"""A stand-in for the subset of `maya.api.OpenMaya` (API 2.0) in use.
+
+The API 2.0 nodes use the same classes as the API 1.0 stand-in, with the
+attribute settings as properties and `MPxNode` in this module.
+"""
+from matrix_deform.headless.OpenMaya import *  # noqa: F401,F403
+from matrix_deform.headless.OpenMayaMPx import MPxNode  # noqa: F401
@@ -0,0 +1,46 @@
+"""A stand-in for the subset of `maya.OpenMayaMPx` in use."""
+
+
+class MPxNode(object):
+    kDefaultScheduling = 0
+    kParallel = 1
+    kSerial = 2
+    kGloballySerial = 3
+    kUntrusted = 4
+
+    def __init__(self):
+        self._name = type(self).__name__
+
+    def thisMObject(self):
+        return self
+
+    def connectionMade(self, plug, otherPlug, asSrc):
+        pass
+
+    def connectionBroken(self, plug, otherPlug, asSrc):
+        pass
+
+    @classmethod
+    def addAttribute(cls, attribute):
+        if "_attributes" not in cls.__dict__:
+            cls._attributes = []
+        cls._attributes.append(attribute)
+
+    @classmethod
+    def attributeAffects(cls, source, destination):
+        pass
+
+    @classmethod
+    def attributesByName(cls):
+        """Return all attributes of the node (and their children) by name"""
+        attributes = {}
+        stack = list(cls.__dict__.get("_attributes", []))
+        while stack:
+            attribute = stack.pop()
+            attributes[attribute.longName] = attribute
+            stack.extend(attribute.children)
+        return attributes
+
+
+def asMPxPtr(node):
+    return node
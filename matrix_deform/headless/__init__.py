@@ -0,0 +1,102 @@
+"""Evaluate the matrix deformer nodes outside of Maya.
+
+This package holds a small pure-Python/NumPy stand-in for the subset of
+`maya.OpenMaya`, `maya.OpenMayaMPx` and `maya.api.OpenMaya` that the nodes
+use, so the existing `compute` and `deformMatrix` implementations run
+unchanged on machines without Maya, for example for benchmarks or
+regression tests.
+
+Example:
+    >>> from matrix_deform import headless
+    >>> headless.install()
+    >>> from matrix_deform.nodes.matrixBend import MatrixBend
+    >>> node = headless.createNode(MatrixBend)
+    >>> outMat = headless.compute(node, "outMatrix", {"curvature": 45.0})
+
+"""
+import sys
+import types
+
+_initialized = set()
+_names = []
+
+
+def install(force=False):
+    """Make the stand-in importable as `maya.OpenMaya` and friends.
+
+    Args:
+        force (bool): Install even when Maya itself is importable.
+
+    Returns:
+        bool: Whether the stand-in is installed.
+    """
+    if not force:
+        try:
+            import maya.OpenMaya  # noqa: F401
+        except ImportError:
+            pass
+        else:
+            return sys.modules["maya.OpenMaya"].__name__.startswith(
+                __name__)
+
+    from matrix_deform.headless import OpenMaya, OpenMaya2, OpenMayaMPx
+
+    maya = types.ModuleType("maya")
+    maya.OpenMaya = OpenMaya
+    maya.OpenMayaMPx = OpenMayaMPx
+    maya.OpenMayaAnim = types.ModuleType("maya.OpenMayaAnim")
+    maya.api = types.ModuleType("maya.api")
+    maya.api.OpenMaya = OpenMaya2
+
+    sys.modules["maya"] = maya
+    sys.modules["maya.OpenMaya"] = OpenMaya
+    sys.modules["maya.OpenMayaMPx"] = OpenMayaMPx
+    sys.modules["maya.OpenMayaAnim"] = maya.OpenMayaAnim
+    sys.modules["maya.api"] = maya.api
+    sys.modules["maya.api.OpenMaya"] = OpenMaya2
+    return True
+
+
+def createNode(nodeClass, name=None):
+    """Return a new instance of `nodeClass` with its attributes initialized"""
+    if nodeClass not in _initialized:
+        nodeClass.nodeInitialize()
+        _initialized.add(nodeClass)
+
+    node = nodeClass.creator()
+    node._name = name or "{0}{1}".format(nodeClass.pluginNodeTypeName,
+                                         len(_names) + 1)
+    _names.append(node._name)
+    return node
+
+
+def compute(node, plug, values=None, datablock=None):
+    """Compute the output `plug` of `node` and return its value.
+
+    Args:
+        node (MPxNode): The node created with `createNode()`.
+        plug (str): The name of the output attribute to compute.
+        values (dict): The input values by attribute name.
+        datablock (MDataBlock, optional): The datablock to compute in, by
+            default a new one is created from `values`.
+
+    Returns:
+        The output value, like an `MMatrix` for "outMatrix", a dict of
+        index to `MMatrix` for "outMatrices" or an `MVectorArray` for a
+        vector array output.
+    """
+    from matrix_deform.headless.datablock import MDataBlock
+    from matrix_deform.headless.OpenMaya import MData
+
+    if datablock is None:
+        datablock = MDataBlock(node, values)
+    else:
+        for name, value in (values or {}).items():
+            datablock.setValue(name, value)
+
+    attribute = type(node).attributesByName()[plug]
+    node.compute(attribute, datablock)
+    value = datablock.value(plug)
+    if isinstance(value, MData):
+        value = value.value
+    return value
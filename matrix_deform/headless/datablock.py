@@ -0,0 +1,164 @@
+"""A fake `MDataBlock` holding plain Python values for the node attributes.
+
+Input values are given by attribute name. Matrices may be given as an
+`MMatrix`, a (4, 4) nested sequence or 16 values. Array attributes take a
+dict of index to value (or a list) and compound attributes take a dict of
+child attribute name to value.
+"""
+from matrix_deform.headless.OpenMaya import MData, MMatrix
+
+
+class MDataHandle(object):
+    def __init__(self, attribute, value, datablock=None):
+        self.attribute = attribute
+        self.value = value
+        self._datablock = datablock
+
+    def asBool(self):
+        return bool(self.value)
+
+    def asShort(self):
+        return int(self.value)
+
+    def asInt(self):
+        return int(self.value)
+
+    def asFloat(self):
+        return float(self.value)
+
+    def asDouble(self):
+        return float(self.value)
+
+    def asMatrix(self):
+        return MMatrix(self.value)
+
+    def data(self):
+        if isinstance(self.value, MData):
+            return self.value
+        return MData(self.value)
+
+    def asMesh(self):
+        return self.data()
+
+    def asNurbsCurve(self):
+        return self.data()
+
+    def child(self, attribute):
+        values = self.value or {}
+        value = values.get(attribute.longName, attribute.default)
+        return MDataHandle(attribute, value)
+
+    def set(self, value):
+        self.value = value
+        if self._datablock is not None:
+            self._datablock._values[self.attribute] = value
+
+    def setMatrix(self, matrix):
+        self.set(MMatrix(matrix))
+
+    def setMMatrix(self, matrix):
+        self.set(MMatrix(matrix))
+
+    def setDouble(self, value):
+        self.set(float(value))
+
+    def setMObject(self, value):
+        self.set(value)
+
+    def setClean(self):
+        pass
+
+
+class MArrayDataHandle(object):
+    def __init__(self, attribute, values):
+        self.attribute = attribute
+        self.values = values
+        self._indices = sorted(values)
+        self._current = 0
+
+    def __len__(self):
+        return len(self._indices)
+
+    def elementCount(self):
+        return len(self._indices)
+
+    def jumpToArrayElement(self, position):
+        self._current = position
+
+    def jumpToElement(self, index):
+        self._current = self._indices.index(index)
+
+    def jumpToPhysicalElement(self, position):
+        self._current = position
+
+    def elementIndex(self):
+        return self._indices[self._current]
+
+    def elementLogicalIndex(self):
+        return self._indices[self._current]
+
+    def inputValue(self):
+        index = self.elementIndex()
+        return MDataHandle(self.attribute, self.values[index])
+
+    def outputValue(self):
+        return self.inputValue()
+
+    def set(self, builder):
+        self.values.clear()
+        self.values.update(builder.values())
+
+    def setAllClean(self):
+        pass
+
+
+class MDataBlock(object):
+    """The data of a single node instance.
+
+    Args:
+        node (MPxNode): The node instance the data belongs to.
+        values (dict): The input values by attribute name.
+    """
+
+    def __init__(self, node, values=None):
+        self._attributes = type(node).attributesByName()
+        self._values = {}
+        self._clean = set()
+        for name, value in (values or {}).items():
+            self.setValue(name, value)
+
+    def setValue(self, name, value):
+        """Set the value of the attribute with `name`"""
+        attribute = self._attributes[name]
+        if attribute.array and isinstance(value, (list, tuple)):
+            value = dict(enumerate(value))
+        self._values[attribute] = value
+        self._clean.clear()
+
+    def value(self, name):
+        """Return the current value of the attribute with `name`"""
+        return self._value(self._attributes[name])
+
+    def _value(self, attribute):
+        if attribute not in self._values:
+            default = {} if attribute.array else attribute.default
+            self._values[attribute] = default
+        return self._values[attribute]
+
+    def inputValue(self, attribute):
+        return MDataHandle(attribute, self._value(attribute))
+
+    def outputValue(self, attribute):
+        return MDataHandle(attribute, self._value(attribute), self)
+
+    def inputArrayValue(self, attribute):
+        return MArrayDataHandle(attribute, self._value(attribute))
+
+    def outputArrayValue(self, attribute):
+        return MArrayDataHandle(attribute, self._value(attribute))
+
+    def setClean(self, attribute):
+        self._clean.add(attribute)
+
+    def isClean(self, attribute):
+        return attribute in self._clean
@@ -0,0 +1,101 @@
+"""Deform matrices by any point deformation function through its Jacobian.
+
+A deformer only has to supply a vectorized point function `f(points)` that
+maps (N, 3) deformer space points to their deformed positions. The matrix
+position is deformed by `f` and its orientation by the Jacobian of `f` at
+that position, either from an analytic Jacobian function or from batched
+central finite differences.
+
+The Jacobians follow Maya's row-vector convention: `jacobian[n, i, j]` is
+the derivative of the j-th output coordinate to the i-th input coordinate,
+so the deformed axes (rows) of a matrix are `axes * jacobian`.
+"""
+import numpy as np
+
+from matrix_deform.approximation import orthonormalize
+from matrix_deform.kernels import asMatrices, toLocal, toWorld
+
+# The relative step of the central differences, the cube root of the
+# machine epsilon balances truncation and rounding errors.
+STEP = np.finfo(np.float64).eps ** (1.0 / 3.0)
+
+
+def finiteDifferences(pointFunction, points, step=STEP):
+    """Return the (N, 3, 3) Jacobians of `pointFunction` at `points`.
+
+    The step per coordinate is the relative `step` scaled by the magnitude
+    of the coordinate (`step * max(abs(p), 1)`), it does not adapt to the
+    error of the differences. All 6 * N offset points are evaluated by a
+    single call of `pointFunction`.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    count = len(points)
+
+    steps = step * np.maximum(np.abs(points), 1.0)
+    offsets = np.zeros((2, 3, count, 3))
+    for axis in range(3):
+        offsets[0, axis, :, axis] = steps[:, axis]
+        offsets[1, axis, :, axis] = -steps[:, axis]
+
+    samples = (points + offsets).reshape(-1, 3)
+    deformed = np.asarray(pointFunction(samples)).reshape(2, 3, count, 3)
+
+    # (axis, N, 3) to (N, axis, 3)
+    jacobian = (deformed[0] - deformed[1]) / (2.0 * steps.T[:, :, None])
+    return np.swapaxes(jacobian, 0, 1)
+
+
+def deformLocal(local, pointFunction, jacobianFunction=None, step=STEP,
+                orthonormal=True):
+    """Deform deformer space matrices by a point deformation function.
+
+    Args:
+        local (array_like): The (N, 4, 4) deformer space matrices.
+        pointFunction (callable): Maps (N, 3) points to the deformed (N, 3)
+            points.
+        jacobianFunction (callable, optional): Maps (N, 3) points to their
+            (N, 3, 3) analytic Jacobians. When not given or when it returns
+            None the Jacobians are computed by finite differences of
+            `pointFunction`.
+        step (float): The relative step of the finite differences.
+        orthonormal (bool): Rotate the matrices only by the rotation of the
+            Jacobian, so their scale and shear are kept. Otherwise the axes
+            are multiplied by the full Jacobian, like a deformed tangent
+            frame.
+
+    Returns:
+        np.ndarray: The (N, 4, 4) deformed matrices.
+    """
+    local = asMatrices(local)
+    result = local.copy()
+    if not len(local):
+        return result
+
+    points = local[:, 3, :3]
+    jacobian = None
+    if jacobianFunction is not None:
+        jacobian = jacobianFunction(points)
+    if jacobian is None:
+        jacobian = finiteDifferences(pointFunction, points, step)
+    jacobian = np.asarray(jacobian, dtype=np.float64).reshape(-1, 3, 3)
+
+    if orthonormal:
+        jacobian = orthonormalize(jacobian)
+
+    result[:, :3, :3] = np.matmul(local[:, :3, :3], jacobian)
+    result[:, 3, :3] = pointFunction(points)
+    return result
+
+
+def deform(matrices, deformMatrix, pointFunction, jacobianFunction=None,
+           step=STEP, orthonormal=True, inverse=None):
+    """Deform world space matrices by a point deformation function.
+
+    The point function works in the space of `deformMatrix`, the `inverse`
+    of the deformer matrix is used when given. See `deformLocal()` for the
+    other arguments.
+    """
+    local = toLocal(asMatrices(matrices), deformMatrix, inverse)
+    return toWorld(deformLocal(local, pointFunction, jacobianFunction, step,
+                               orthonormal),
+                   deformMatrix)
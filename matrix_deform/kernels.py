@@ -0,0 +1,776 @@
+"""Vectorized NumPy implementations of the matrix deformation algorithms.
+
+These kernels are Maya independent and deform a whole array of matrices in
+a single call. They follow Maya's row-vector convention, so a matrix is
+laid out as in `MMatrix` with the translation in the last row and a point
+is transformed as `point * matrix`.
+
+Each algorithm is available in two flavours:
+
+    - `bend`, `twist` and `wave` take matrices in world space together with
+      the deformer matrix.
+    - `bendLocal`, `twistLocal` and `waveLocal` take matrices that are
+      already in the deformer's space.
+
+`stack` evaluates an ordered chain of these deformers in a single pass and
+`blend` blends deformed matrices with their inputs by an envelope or
+per-matrix weights.
+
+The results match the scalar `deformMatrix` implementations of the nodes to
+within `TOLERANCE` relative to the magnitude of each matrix, see
+`matrixErrors()`.
+
+The deformer space kernels compute in the float type of their input, so
+float32 matrices are deformed in single precision. The world space kernels
+take a `dtype` to convert the matrices to, see `matrix_deform.accuracy` for
+the error of single precision against double precision.
+"""
+import math
+
+import numpy as np
+
+from matrix_deform import quaternion
+
+# Maximum difference per matrix element between the kernels and the scalar
+# `deformMatrix` implementations of the nodes, relative to the largest element
+# of the matrix but at least 1.0 (see `matrixErrors()`). The rounding errors
+# grow with the magnitude of the values, for example the translations of far
+# away or strongly sheared matrices, so an absolute bound does not hold.
+TOLERANCE = 1e-9
+
+
+def asMatrices(matrices, dtype=np.float64):
+    """Return `matrices` as a float64 (or `dtype`) array of shape (N, 4, 4).
+
+    Any input holding a multiple of 16 values is accepted, like a single
+    (4, 4) matrix or a list of flat lists of 16 values per matrix.
+    """
+    return np.asarray(matrices, dtype=dtype).reshape(-1, 4, 4)
+
+
+def matrixErrors(expected, result):
+    """Return the (N,) errors of `result` against the `expected` matrices.
+
+    The error of a matrix is its largest absolute difference per element
+    divided by its largest absolute expected element, but at least 1.0, so
+    it is the absolute error for matrices of unit scale and the relative
+    error for larger ones. Compare against `TOLERANCE`.
+    """
+    expected = asMatrices(expected)
+    result = asMatrices(result)
+    scale = np.maximum(np.abs(expected).max(axis=(1, 2)), 1.0)
+    return np.abs(result - expected).max(axis=(1, 2)) / scale
+
+
+def floatType(values):
+    """Return float32 for float32 `values` and float64 for anything else"""
+    if getattr(values, "dtype", None) == np.float32:
+        return np.float32
+    return np.float64
+
+
+def toLocal(matrices, deformMatrix, inverse=None):
+    """Return `matrices` transformed into the deformer's space.
+
+    The `inverse` of the deformer matrix is used when given, otherwise the
+    deformer matrix is inverted.
+    """
+    if inverse is None:
+        inverse = np.linalg.inv(np.asarray(deformMatrix).reshape(4, 4))
+    return np.matmul(matrices, np.asarray(inverse).reshape(4, 4))
+
+
+def toWorld(local, deformMatrix):
+    """Return `local` deformer space matrices transformed back to world"""
+    return np.matmul(local, np.asarray(deformMatrix).reshape(4, 4))
+
+
+def decompose(matrices):
+    """Split the upper 3x3 of `matrices` into scale-shear and rotation.
+
+    This mirrors how `MTransformationMatrix` decomposes a matrix: the upper
+    3x3 equals `scaleShear * rotation` where the rotation rows are found by
+    Gram-Schmidt orthonormalization of the matrix rows.
+
+    Returns:
+        tuple: The (N, 3, 3) scale-shear and (N, 3, 3) rotation arrays.
+    """
+    m = matrices[:, :3, :3]
+    row0 = m[:, 0]
+    row1 = m[:, 1]
+    row2 = m[:, 2]
+
+    r0 = _normalize(row0)
+    r1 = _normalize(row1 - _dot(row1, r0)[:, None] * r0)
+    r2 = _normalize(row2 -
+                    _dot(row2, r0)[:, None] * r0 -
+                    _dot(row2, r1)[:, None] * r1)
+
+    rotation = np.stack([r0, r1, r2], axis=1)
+
+    # Keep the rotation a proper rotation for mirrored matrices by
+    # negating the scale instead.
+    flipped = np.linalg.det(m) < 0.0
+    rotation[flipped] *= -1.0
+
+    scaleShear = np.matmul(m, np.swapaxes(rotation, 1, 2))
+    return scaleShear, rotation
+
+
+def rotationX(angles):
+    """Return (N, 3, 3) rotation matrices around the x-axis (radians)"""
+    c = np.cos(angles)
+    s = np.sin(angles)
+    rotation = np.zeros(np.shape(angles) + (3, 3))
+    rotation[..., 0, 0] = 1.0
+    rotation[..., 1, 1] = c
+    rotation[..., 1, 2] = s
+    rotation[..., 2, 1] = -s
+    rotation[..., 2, 2] = c
+    return rotation
+
+
+def rotationY(angles):
+    """Return (N, 3, 3) rotation matrices around the y-axis (radians)"""
+    c = np.cos(angles)
+    s = np.sin(angles)
+    rotation = np.zeros(np.shape(angles) + (3, 3))
+    rotation[..., 0, 0] = c
+    rotation[..., 0, 2] = -s
+    rotation[..., 1, 1] = 1.0
+    rotation[..., 2, 0] = s
+    rotation[..., 2, 2] = c
+    return rotation
+
+
+def rotationZ(angles):
+    """Return (N, 3, 3) rotation matrices around the z-axis (radians)"""
+    c = np.cos(angles)
+    s = np.sin(angles)
+    rotation = np.zeros(np.shape(angles) + (3, 3))
+    rotation[..., 0, 0] = c
+    rotation[..., 0, 1] = s
+    rotation[..., 1, 0] = -s
+    rotation[..., 1, 1] = c
+    rotation[..., 2, 2] = 1.0
+    return rotation
+
+
+def preTransformAxes(matrices, axis):
+    """Return the (N, 3) vectors to rotate around for pre-transform rotations.
+
+    Rotating a matrix in pre-transform space around its own `axis` (0, 1 or
+    2 for x, y or z) equals a rotation of its upper 3x3 around the returned
+    vector. See `rotationsAboutAxes()`.
+    """
+    m = matrices[:, :3, :3]
+    if axis == 2:
+        return _normalize(np.cross(m[:, 0], m[:, 1]))
+
+    # For mirrored matrices the decomposed rotation is negated
+    sign = np.where(np.linalg.det(m) < 0.0, -1.0, 1.0).astype(m.dtype)
+    sign = sign[:, None]
+    vectors = _normalize(m[:, 0])
+    if axis == 1:
+        vectors = _normalize(m[:, 1] - _dot(m[:, 1], vectors)[:, None] *
+                             vectors)
+    return vectors * sign
+
+
+def rotationsAboutAxes(vectors, angles):
+    """Return (N, 3, 3) rotation matrices around (N, 3) unit vectors"""
+    x = vectors[:, 0]
+    y = vectors[:, 1]
+    z = vectors[:, 2]
+    c = np.cos(angles)
+    s = np.sin(angles)
+    t = 1.0 - c
+
+    rotation = np.empty((len(vectors), 3, 3), dtype=vectors.dtype)
+    rotation[:, 0, 0] = c + x * x * t
+    rotation[:, 0, 1] = x * y * t + z * s
+    rotation[:, 0, 2] = x * z * t - y * s
+    rotation[:, 1, 0] = y * x * t - z * s
+    rotation[:, 1, 1] = c + y * y * t
+    rotation[:, 1, 2] = y * z * t + x * s
+    rotation[:, 2, 0] = z * x * t + y * s
+    rotation[:, 2, 1] = z * y * t - x * s
+    rotation[:, 2, 2] = c + z * z * t
+    return rotation
+
+
+def bend(matrices, deformMatrix, curvature=0.0, lowBound=-1.0,
+         highBound=1.0, asDegrees=True, stats=None, dtype=np.float64,
+         weights=None, inverse=None):
+    """Deform `matrices` by the non-linear bend algorithm.
+
+    Args:
+        matrices (array_like): The (N, 4, 4) world space input matrices.
+        deformMatrix (array_like): The (4, 4) deformer matrix.
+        curvature (float): The amount of bend.
+        lowBound (float): The lower bound of the bend along the y-axis.
+        highBound (float): The upper bound of the bend along the y-axis.
+        asDegrees (bool): Whether `curvature` is in degrees.
+        stats (dict, optional): Filled with the culling statistics, see
+            `cull()`.
+        dtype (np.dtype): The float type to deform the matrices in.
+        weights (float or array_like, optional): The envelope or (N,)
+            per-matrix weights to blend the deformation by, see `blend()`.
+        inverse (array_like, optional): The (4, 4) inverse of
+            `deformMatrix`, for example a connected inverse matrix, instead
+            of inverting `deformMatrix`.
+
+    Returns:
+        np.ndarray: The (N, 4, 4) deformed matrices in `dtype`.
+    """
+    return cull(matrices, deformMatrix, "bend", stats, dtype, weights,
+                inverse, curvature=curvature, lowBound=lowBound,
+                highBound=highBound, asDegrees=asDegrees)
+
+
+def bendLocal(local, curvature=0.0, lowBound=-1.0, highBound=1.0,
+              asDegrees=True):
+    """Deform deformer space matrices by the non-linear bend algorithm.
+
+    See `bend()` for the arguments.
+    """
+    local = asMatrices(local, floatType(local))
+    curvature, lowBound, highBound = _cast(local.dtype, curvature, lowBound,
+                                           highBound)
+    result = local.copy()
+    active = _active(np.not_equal(curvature, 0.0) &
+                     np.less(lowBound, highBound), len(local))
+    if not active.any():
+        return result
+
+    points, angles = bendPoints(local[:, 3, :3], curvature, lowBound,
+                                highBound, asDegrees)
+
+    # Rotate around the z-axis in pre-transform space
+    rotation = rotationsAboutAxes(preTransformAxes(local, 2), angles)
+    result[:, :3, :3] = np.matmul(local[:, :3, :3], rotation)
+    result[:, 3, :3] = points
+
+    # At exactly zero it won't bend at all
+    unchanged = (local[:, 3, 1] == 0.0) | ~active
+    result[unchanged] = local[unchanged]
+    return result
+
+
+def bendPoints(points, curvature=0.0, lowBound=-1.0, highBound=1.0,
+               asDegrees=True):
+    """Bend deformer space points without any early exits.
+
+    Args:
+        points (np.ndarray): The (N, 3) deformer space points.
+
+    See `bend()` for the other arguments.
+
+    Returns:
+        tuple: The (N, 3) bent points and the (N,) angles in radians to
+            rotate the matrices by around their z-axis in pre-transform
+            space.
+    """
+    curvature = np.where(asDegrees, np.multiply(curvature, math.pi / 180.0),
+                         curvature).astype(points.dtype)
+
+    x = points[:, 0]
+    y = points[:, 1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = 1.0 / curvature  # bend radius
+        yLimited = np.clip(y, lowBound, highBound)
+        yr = yLimited * curvature
+
+        c = np.cos(math.pi - yr)
+        s = np.sin(math.pi - yr)
+        px = (r * c) + r - (x * c)
+        py = (r * s) - (x * s)
+
+        # Continue straight along the tangent outside of the bounds
+        outside = y - yLimited
+        py += -c * outside
+        px += s * outside
+
+    return np.stack([px, py, points[:, 2]], axis=1), -yr
+
+
+def twist(matrices, deformMatrix, startAngle=0.0, endAngle=0.0,
+          lowBound=-1.0, highBound=1.0, stats=None, dtype=np.float64,
+          weights=None, inverse=None):
+    """Deform `matrices` by the non-linear twist algorithm.
+
+    Args:
+        matrices (array_like): The (N, 4, 4) world space input matrices.
+        deformMatrix (array_like): The (4, 4) deformer matrix.
+        startAngle (float): The twist in degrees at the low bound.
+        endAngle (float): The twist in degrees at the high bound.
+        lowBound (float): The lower bound of the twist along the y-axis.
+        highBound (float): The upper bound of the twist along the y-axis.
+        stats (dict, optional): Filled with the culling statistics, see
+            `cull()`.
+        dtype (np.dtype): The float type to deform the matrices in.
+        weights (float or array_like, optional): The envelope or (N,)
+            per-matrix weights to blend the deformation by, see `blend()`.
+        inverse (array_like, optional): The (4, 4) inverse of
+            `deformMatrix`, for example a connected inverse matrix, instead
+            of inverting `deformMatrix`.
+
+    Returns:
+        np.ndarray: The (N, 4, 4) deformed matrices in `dtype`.
+    """
+    return cull(matrices, deformMatrix, "twist", stats, dtype, weights,
+                inverse, startAngle=startAngle, endAngle=endAngle,
+                lowBound=lowBound, highBound=highBound)
+
+
+def twistLocal(local, startAngle=0.0, endAngle=0.0, lowBound=-1.0,
+               highBound=1.0):
+    """Deform deformer space matrices by the non-linear twist algorithm.
+
+    See `twist()` for the arguments.
+    """
+    local = asMatrices(local, floatType(local))
+    startAngle, endAngle, lowBound, highBound = _cast(
+        local.dtype, startAngle, endAngle, lowBound, highBound)
+    result = local.copy()
+    active = _active((np.not_equal(startAngle, 0.0) |
+                      np.not_equal(endAngle, 0.0)) &
+                     np.less(lowBound, highBound), len(local))
+    if not active.any():
+        return result
+
+    points, angles = twistPoints(local[:, 3, :3], startAngle, endAngle,
+                                 lowBound, highBound)
+
+    # Rotate around the y-axis in pre-transform space
+    rotation = rotationsAboutAxes(preTransformAxes(local, 1), angles)
+    result[:, :3, :3] = np.matmul(local[:, :3, :3], rotation)
+    result[:, 3, :3] = points
+
+    unchanged = ~(_twistAffected(local[:, 3, 1], startAngle, endAngle,
+                                 lowBound, highBound) & active)
+    result[unchanged] = local[unchanged]
+    return result
+
+
+def twistPoints(points, startAngle=0.0, endAngle=0.0, lowBound=-1.0,
+                highBound=1.0):
+    """Twist deformer space points without any early exits.
+
+    Args:
+        points (np.ndarray): The (N, 3) deformer space points.
+
+    See `twist()` for the other arguments.
+
+    Returns:
+        tuple: The (N, 3) twisted points and the (N,) angles in radians to
+            rotate the matrices by around their y-axis in pre-transform
+            space.
+    """
+    x = points[:, 0]
+    y = points[:, 1]
+    z = points[:, 2]
+
+    # Percentage between the bounds
+    yLimited = np.where(y >= highBound, highBound,
+                        np.where(y < lowBound, lowBound, y))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percentage = (yLimited - lowBound) / np.subtract(highBound, lowBound)
+    angle = (percentage * np.subtract(endAngle, startAngle)) + startAngle
+
+    # Maya does it the exact opposite way, so we reverse our angle
+    angle *= -(math.pi / 180.0)
+
+    c = np.cos(angle)
+    s = np.sin(angle)
+
+    # Note that the z term mirrors `MatrixTwist.deformMatrix`
+    return np.stack([x * c + z * s, y, x * s + z * c], axis=1), angle
+
+
+def wave(matrices, deformMatrix, amplitude=0.0, wavelength=1.0, offset=0.0,
+         dropoff=0.0, minRadius=0.0, maxRadius=1.0, stats=None,
+         dtype=np.float64, weights=None, inverse=None):
+    """Deform `matrices` by the non-linear wave algorithm.
+
+    Args:
+        matrices (array_like): The (N, 4, 4) world space input matrices.
+        deformMatrix (array_like): The (4, 4) deformer matrix.
+        amplitude (float): The height of the wave.
+        wavelength (float): The length of the wave.
+        offset (float): The offset of the wave along its radius.
+        dropoff (float): The decrease of amplitude over the radius.
+        minRadius (float): The radius at which the wave starts.
+        maxRadius (float): The radius at which the wave ends.
+        stats (dict, optional): Filled with the culling statistics, see
+            `cull()`.
+        dtype (np.dtype): The float type to deform the matrices in.
+        weights (float or array_like, optional): The envelope or (N,)
+            per-matrix weights to blend the deformation by, see `blend()`.
+        inverse (array_like, optional): The (4, 4) inverse of
+            `deformMatrix`, for example a connected inverse matrix, instead
+            of inverting `deformMatrix`.
+
+    Returns:
+        np.ndarray: The (N, 4, 4) deformed matrices in `dtype`.
+    """
+    return cull(matrices, deformMatrix, "wave", stats, dtype, weights,
+                inverse, amplitude=amplitude, wavelength=wavelength,
+                offset=offset, dropoff=dropoff, minRadius=minRadius,
+                maxRadius=maxRadius)
+
+
+def waveLocal(local, amplitude=0.0, wavelength=1.0, offset=0.0, dropoff=0.0,
+              minRadius=0.0, maxRadius=1.0):
+    """Deform deformer space matrices by the non-linear wave algorithm.
+
+    The wave moves each point along y by the height `h(r)` of the wave at
+    its radius `r`, with the amplitude scaled by the dropoff weight. The
+    orientation is the matrix multiplied by the analytic Jacobian of that
+    displacement, including the amplitude and the change of the dropoff
+    weight over the radius. At the wave's center (r == 0) the gradient is
+    undefined, there the orientation is left unchanged.
+
+    See `wave()` for the arguments.
+    """
+    local = asMatrices(local, floatType(local))
+    (amplitude, wavelength, offset, dropoff, minRadius,
+     maxRadius) = _cast(local.dtype, amplitude, wavelength, offset, dropoff,
+                        minRadius, maxRadius)
+    result = local.copy()
+    active = _active(np.not_equal(amplitude, 0.0) &
+                     np.less(minRadius, maxRadius), len(local))
+    if not active.any():
+        return result
+
+    x = local[:, 3, 0]
+    y = local[:, 3, 1]
+    z = local[:, 3, 2]
+
+    radius = np.hypot(x, z)
+    inside = (radius >= minRadius) & (radius <= maxRadius) & active
+
+    height, slope = _waveProfile(radius, amplitude, wavelength, offset,
+                                 dropoff, minRadius, maxRadius)
+    result[:, 3, 1] = y + height
+
+    # The displacement (0, h(r), 0) has the gradient h'(r) * (x, 0, z) / r,
+    # so each axis (row) of the matrix gains its dot product with that
+    # gradient along y.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(radius == 0.0, 0.0, slope / radius)
+    rows = local[:, :3, :3]
+    result[:, :3, 1] = rows[:, :, 1] + slope[:, None] * (
+        rows[:, :, 0] * x[:, None] + rows[:, :, 2] * z[:, None])
+
+    result[~inside] = local[~inside]
+    return result
+
+
+# The deformer space kernels by name
+LOCAL_KERNELS = {
+    "bend": bendLocal,
+    "twist": twistLocal,
+    "wave": waveLocal
+}
+
+
+def affected(kernelName, positions, **parameters):
+    """Return the mask of the deformer space positions the kernel changes.
+
+    This is the same test as the scalar nodes use to return a matrix
+    unchanged, it only needs the (N, 3) positions of the matrices.
+    """
+    if not hasEffect(kernelName, **parameters):
+        return np.zeros(len(positions), dtype=bool)
+
+    get = parameters.get
+    if kernelName == "bend":
+        # At exactly zero it won't bend at all
+        return positions[:, 1] != 0.0
+    elif kernelName == "twist":
+        return _twistAffected(positions[:, 1], get("startAngle", 0.0),
+                              get("endAngle", 0.0), get("lowBound", -1.0),
+                              get("highBound", 1.0))
+    elif kernelName == "wave":
+        radius = np.hypot(positions[:, 0], positions[:, 2])
+        return ((radius >= get("minRadius", 0.0)) &
+                (radius <= get("maxRadius", 1.0)))
+    raise ValueError("Unknown kernel: {0}".format(kernelName))
+
+
+def cull(matrices, deformMatrix, kernelName, stats=None, dtype=np.float64,
+         weights=None, inverse=None, **parameters):
+    """Deform only the matrices affected by the kernel.
+
+    The positions of all matrices are first transformed into deformer space
+    with a single vector-matrix product to find the affected matrices (see
+    `affected()`). Only those are converted to deformer space, deformed and
+    converted back, all other matrices are returned bit-identical. Matrices
+    with a zero weight count as unaffected, the others are blended by their
+    weight in the same pass.
+
+    Args:
+        matrices (array_like): The (N, 4, 4) world space input matrices.
+        deformMatrix (array_like): The (4, 4) deformer matrix.
+        kernelName (str): The kernel's name: "bend", "twist" or "wave".
+        stats (dict, optional): Filled with the number of matrices as
+            "count", the number of deformed matrices as "affected", the
+            number of passed through matrices as "culled" and their
+            fraction as "cullRatio".
+        dtype (np.dtype): The float type to deform the matrices in.
+        weights (float or array_like, optional): The envelope or (N,)
+            per-matrix weights to blend the deformation by, see `blend()`.
+        inverse (array_like, optional): The (4, 4) inverse of
+            `deformMatrix`, for example a connected inverse matrix, instead
+            of inverting `deformMatrix`.
+        **parameters: The keyword arguments for the kernel.
+
+    Returns:
+        np.ndarray: The (N, 4, 4) deformed matrices in `dtype`.
+    """
+    matrices = asMatrices(matrices, dtype)
+    count = len(matrices)
+    if weights is not None:
+        weights = np.broadcast_to(np.asarray(weights, dtype=dtype), (count,))
+
+    affectedCount = 0
+    if count and hasEffect(kernelName, **parameters):
+        deformMatrix = np.asarray(deformMatrix,
+                                  dtype=np.float64).reshape(4, 4)
+        if inverse is None:
+            invDeformMatrix = np.linalg.inv(deformMatrix)
+        else:
+            invDeformMatrix = np.asarray(inverse,
+                                         dtype=np.float64).reshape(4, 4)
+
+        # Invert in double precision, then stay in the matrices' type
+        deformMatrix = deformMatrix.astype(dtype)
+        invDeformMatrix = invDeformMatrix.astype(dtype)
+        positions = np.matmul(matrices[:, 3], invDeformMatrix)[:, :3]
+        mask = affected(kernelName, positions, **parameters)
+        if weights is not None:
+            mask &= weights != 0.0
+        affectedCount = int(np.count_nonzero(mask))
+
+    kernel = LOCAL_KERNELS[kernelName]
+    if not affectedCount:
+        result = matrices.copy()
+    elif affectedCount == count:
+        result = toWorld(kernel(np.matmul(matrices, invDeformMatrix),
+                                **parameters), deformMatrix)
+        if weights is not None:
+            result = blend(matrices, result, weights)
+    else:
+        result = matrices.copy()
+        deformed = toWorld(kernel(np.matmul(matrices[mask],
+                                            invDeformMatrix),
+                                  **parameters), deformMatrix)
+        if weights is not None:
+            deformed = blend(matrices[mask], deformed, weights[mask])
+        result[mask] = deformed
+
+    if stats is not None:
+        stats["count"] = count
+        stats["affected"] = affectedCount
+        stats["culled"] = count - affectedCount
+        stats["cullRatio"] = (count - affectedCount) / float(max(count, 1))
+    return result
+
+
+def blend(matrices, deformed, weights):
+    """Blend `matrices` towards their `deformed` matrices by `weights`.
+
+    The translation and the scale-shear (see `decompose()`) are interpolated
+    linearly and the rotation spherically. Matrices with a weight of 0.0 or
+    1.0 are returned bit-identical to the input or the deformed matrix.
+
+    Args:
+        matrices (array_like): The (N, 4, 4) input matrices.
+        deformed (array_like): The (N, 4, 4) deformed matrices.
+        weights (float or array_like): The envelope or (N,) per-matrix
+            weights, 0.0 for the input and 1.0 for the deformed matrix.
+
+    Returns:
+        np.ndarray: The (N, 4, 4) blended matrices in the type of
+            `deformed`.
+    """
+    deformed = asMatrices(deformed, floatType(deformed))
+    matrices = asMatrices(matrices, deformed.dtype)
+    weights = np.broadcast_to(np.asarray(weights, dtype=deformed.dtype),
+                              (len(matrices),))
+
+    result = deformed.copy()
+    unweighted = weights == 0.0
+    result[unweighted] = matrices[unweighted]
+
+    partial = ~unweighted & (weights != 1.0)
+    if not partial.any():
+        return result
+
+    a = matrices[partial].astype(np.float64)
+    b = deformed[partial].astype(np.float64)
+    t = weights[partial].astype(np.float64)
+
+    scaleShearA, rotationA = decompose(a)
+    scaleShearB, rotationB = decompose(b)
+    rotation = quaternion.toRotations(quaternion.slerp(
+        quaternion.fromRotations(rotationA),
+        quaternion.fromRotations(rotationB), t))
+    scaleShear = scaleShearA + (scaleShearB - scaleShearA) * t[:, None, None]
+
+    blended = a + (b - a) * t[:, None, None]
+    blended[:, :3, :3] = np.matmul(scaleShear, rotation)
+    result[partial] = blended
+    return result
+
+
+def hasEffect(kernelName, **parameters):
+    """Return whether the deformer can change any matrix at all.
+
+    This evaluates the same early-exit conditions as the kernels, so a
+    deformer without effect can be skipped without touching the matrices.
+
+    Args:
+        kernelName (str): The kernel's name: "bend", "twist" or "wave".
+        **parameters: The keyword arguments for the kernel.
+
+    Returns:
+        bool: False when the kernel would return all matrices unchanged.
+    """
+    return noEffectReason(kernelName, **parameters) is None
+
+
+def noEffectReason(kernelName, **parameters):
+    """Return why the deformer can not change any matrix, or None.
+
+    The reasons are those of the early exits of the nodes' `deformMatrix`:
+    "curvature", "angles" or "amplitude" when the deformer is at rest and
+    "bounds" when its bounds or radii leave an empty range.
+
+    Args:
+        kernelName (str): The kernel's name: "bend", "twist" or "wave".
+        **parameters: The keyword arguments for the kernel.
+
+    Returns:
+        str: The early exit's reason or None when the deformer has effect.
+    """
+    get = parameters.get
+    if kernelName == "bend":
+        if get("curvature", 0.0) == 0.0:
+            return "curvature"
+        if get("lowBound", -1.0) >= get("highBound", 1.0):
+            return "bounds"
+        return None
+    elif kernelName == "twist":
+        if get("startAngle", 0.0) == 0.0 and get("endAngle", 0.0) == 0.0:
+            return "angles"
+        if get("lowBound", -1.0) >= get("highBound", 1.0):
+            return "bounds"
+        return None
+    elif kernelName == "wave":
+        if get("amplitude", 0.0) == 0.0:
+            return "amplitude"
+        if get("minRadius", 0.0) >= get("maxRadius", 1.0):
+            return "bounds"
+        return None
+    raise ValueError("Unknown kernel: {0}".format(kernelName))
+
+
+def stack(matrices, deformMatrix, layers):
+    """Deform `matrices` by an ordered stack of deformers in one pass.
+
+    The matrices stay in deformer space between the layers, so going from
+    one layer's space to the next costs a single matrix product with a
+    precomputed conversion matrix instead of a round trip through world
+    space. Layers without effect (see `hasEffect()`) are skipped entirely.
+
+    Args:
+        matrices (array_like): The (N, 4, 4) world space input matrices.
+        deformMatrix (array_like): The (4, 4) matrix of the stack that the
+            layer matrices are relative to.
+        layers (list): The (kernelName, layerMatrix, parameters) tuples of
+            the layers in order of evaluation. The parameters are a dict
+            of keyword arguments for the kernel.
+
+    Returns:
+        np.ndarray: The (N, 4, 4) deformed matrices.
+    """
+    matrices = asMatrices(matrices)
+    deformMatrix = np.asarray(deformMatrix, dtype=np.float64).reshape(4, 4)
+
+    result = matrices
+    space = None
+    for kernelName, layerMatrix, parameters in layers:
+        if not hasEffect(kernelName, **parameters):
+            continue
+
+        layerMatrix = np.matmul(np.asarray(layerMatrix).reshape(4, 4),
+                                deformMatrix)
+        conversion = np.linalg.inv(layerMatrix)
+        if space is not None:
+            conversion = np.matmul(space, conversion)
+
+        result = LOCAL_KERNELS[kernelName](np.matmul(result, conversion),
+                                           **parameters)
+        space = layerMatrix
+
+    if space is None:
+        return matrices.copy()
+    return np.matmul(result, space)
+
+
+def _waveProfile(radius, amplitude, wavelength, offset, dropoff, minRadius,
+                 maxRadius):
+    """Return the wave's height and its derivative at `radius`.
+
+    The height is `amplitude * weight(r) * sin((r + offset) / wavelength)`
+    where the dropoff weight changes linearly over the radius range.
+    """
+    span = np.subtract(maxRadius, minRadius)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percentage = (radius - minRadius) / span
+        weight = np.where(np.greater(dropoff, 0.0),
+                          1 - (dropoff * percentage),
+                          np.where(np.less(dropoff, 0.0),
+                                   1 - (dropoff * (1 - percentage)), 1.0))
+        weightSlope = np.where(np.greater(dropoff, 0.0), -dropoff / span,
+                               np.where(np.less(dropoff, 0.0),
+                                        dropoff / span, 0.0))
+
+    frequency = 1.0 / np.asarray(wavelength, dtype=floatType(radius))
+    phase = (radius + offset) * frequency
+    sin = np.sin(phase)
+    height = amplitude * weight * sin
+    slope = amplitude * (weightSlope * sin +
+                         weight * frequency * np.cos(phase))
+    return height, slope
+
+
+def _twistAffected(y, startAngle, endAngle, lowBound, highBound):
+    """Return the mask of deformer space heights changed by the twist"""
+    affected = np.ones(np.shape(y), dtype=bool)
+    affected &= np.not_equal(endAngle, 0.0) | (y < highBound)
+    affected &= np.not_equal(startAngle, 0.0) | (y >= lowBound)
+    return affected
+
+
+def _cast(dtype, *parameters):
+    """Return scalar or per-matrix `parameters` as arrays of `dtype`"""
+    return [np.asarray(parameter, dtype=dtype) for parameter in parameters]
+
+
+def _active(mask, count):
+    """Return the per-matrix mask of a scalar or per-matrix parameter test"""
+    return np.broadcast_to(mask, (count,))
+
+
+def _dot(a, b):
+    return np.einsum("ij,ij->i", a, b)
+
+
+def _normalize(vectors):
+    length = np.sqrt(_dot(vectors, vectors))
+    length[length == 0.0] = 1.0
+    return vectors / length[:, None]
@@ -5,6 +5,131 @@ import maya.OpenMaya as om
 import maya.OpenMayaAnim as omAnim
 import maya.OpenMayaMPx as omMPx
 
+from matrix_deform import memo, profiling
+
+
+def matrixToList(mat):
+    """Return the 16 values of an `om.MMatrix` as a flat list (row-major)"""
+    return [mat(row, column) for row in range(4) for column in range(4)]
+
+
+def listToMatrix(values):
+    """Return an `om.MMatrix` created from 16 values (row-major)"""
+    mat = om.MMatrix()
+    om.MScriptUtil.createMatrixFromList(list(values), mat)
+    return mat
+
+
+def arrayToScriptUtil(values):
+    """Return an `om.MScriptUtil` holding the values of a NumPy array.
+
+    Its pointers, like `asFloat4Ptr()` for an `om.MFloatPointArray`, fill or
+    receive a whole API array in a single call instead of per element.
+    """
+    values = values.ravel().tolist()
+    util = om.MScriptUtil()
+    util.createFromList(values, len(values))
+    return util
+
+
+def pointerToArray(pointer, shape, dtype):
+    """Return a NumPy copy of the C array an `om.MScriptUtil` pointer holds.
+
+    The values are read with the `om.MScriptUtil` getter for the pointer
+    type, e.g. `getFloat4ArrayItem` for an (N, 4) float array, which SWIG
+    checks against the pointer instead of trusting a raw address.
+    """
+    import numpy as np
+
+    dtype = np.dtype(dtype)
+    typeName = "Float" if dtype == np.float32 else "Double"
+    if len(shape) == 1:
+        getItem = getattr(om.MScriptUtil, "get%sArrayItem" % typeName)
+        values = [getItem(pointer, i) for i in range(shape[0])]
+    else:
+        getItem = getattr(om.MScriptUtil,
+                          "get%s%dArrayItem" % (typeName, shape[1]))
+        values = [[getItem(pointer, row, column)
+                   for column in range(shape[1])]
+                  for row in range(shape[0])]
+    return np.array(values, dtype=dtype).reshape(shape)
+
+
+def preTransformAxis(mat, axis):
+    """Return the vector to rotate `mat` around for a pre-transform rotation.
+
+    Rotating the matrix in pre-transform space around its own `axis` (0, 1
+    or 2 for x, y or z) equals a rotation of its upper 3x3 around the
+    returned vector. This allows the rotation as a direct product without
+    decomposing the matrix, also for scaled and sheared matrices.
+    """
+    row0 = [mat(0, 0), mat(0, 1), mat(0, 2)]
+    row1 = [mat(1, 0), mat(1, 1), mat(1, 2)]
+
+    if axis == 2:
+        return _normalized(_cross(row0, row1))
+
+    # Gram-Schmidt orthonormalize the rows like a decomposition would, for
+    # mirrored matrices the decomposed rotation is negated.
+    row2 = [mat(2, 0), mat(2, 1), mat(2, 2)]
+    sign = 1.0 if _dot(_cross(row0, row1), row2) >= 0.0 else -1.0
+    vector = _normalized(row0)
+    if axis == 1:
+        projection = _dot(row1, vector)
+        vector = _normalized([row1[i] - projection * vector[i]
+                              for i in range(3)])
+    return [sign * value for value in vector]
+
+
+def rotatedMatrix(mat, vector, angle, translation):
+    """Return `mat` rotated around `vector` by `angle` with a new translation.
+
+    This computes the result in closed form as a product of the upper 3x3
+    with the rotation matrix around the normalized `vector`.
+    """
+    x, y, z = vector
+    c = math.cos(angle)
+    s = math.sin(angle)
+    t = 1.0 - c
+    rotation = [[c + x * x * t, x * y * t + z * s, x * z * t - y * s],
+                [y * x * t - z * s, c + y * y * t, y * z * t + x * s],
+                [z * x * t + y * s, z * y * t - x * s, c + z * z * t]]
+
+    values = []
+    for row in range(3):
+        m0, m1, m2 = mat(row, 0), mat(row, 1), mat(row, 2)
+        values.extend([m0 * rotation[0][column] +
+                       m1 * rotation[1][column] +
+                       m2 * rotation[2][column] for column in range(3)])
+        values.append(mat(row, 3))
+    values.extend([translation[0], translation[1], translation[2],
+                   mat(3, 3)])
+    return listToMatrix(values)
+
+
+def translatedMatrix(mat, translation):
+    """Return a copy of `mat` with its translation set to `translation`"""
+    values = matrixToList(mat)
+    values[12:15] = translation
+    return listToMatrix(values)
+
+
+def _cross(a, b):
+    return [a[1] * b[2] - a[2] * b[1],
+            a[2] * b[0] - a[0] * b[2],
+            a[0] * b[1] - a[1] * b[0]]
+
+
+def _dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def _normalized(vector):
+    length = math.sqrt(_dot(vector, vector))
+    if length == 0.0:
+        return vector
+    return [value / length for value in vector]
+
 
 class MatrixDeform(omMPx.MPxNode):
     """The abstract base class for Matrix deformation nodes."""
@@ -12,12 +137,36 @@ class MatrixDeform(omMPx.MPxNode):
     id = om.MTypeId(0x0010A52B)
     pluginNodeTypeName = "matrixDeform"
 
+    # The name of the function in `matrix_deform.kernels` that implements
+    # the node's algorithm for arrays of matrices.
+    kernel = None
+
+    # Whether `outMatrix` is memoized by its inputs and parameters, nodes
+    # with inputs outside of `deformParameters` should disable this.
+    cacheOutputs = True
+    evaluationCacheSize = 32
+
+    # The float types `outMatrices` can be deformed in by the kernels, in
+    # order of the `precision` enum. Nodes that do not deform with one of
+    # `kernels.LOCAL_KERNELS` set this to None to leave out the attribute.
+    precisions = ["double", "single"]
+
     def __init__(self):
         omMPx.MPxNode.__init__(self)
+        self.evaluationCache = memo.EvaluationCache(self.evaluationCacheSize)
+
+        # Whether the inverse deformer matrix is connected, for example from
+        # a shared `matrixDeformContext` node
+        self.inverseConnected = False
 
     def isAbstractClass(self):
         return True
 
+    def schedulingType(self):
+        # The node keeps no state shared between computes other than its
+        # (locked) caches, so it is safe for parallel evaluation
+        return omMPx.MPxNode.kParallel
+
     @classmethod
     def creator(cls):
         return omMPx.asMPxPtr(cls())
@@ -36,6 +185,27 @@ class MatrixDeform(omMPx.MPxNode):
         nAttr.setSoftMax(1)
         cls.addAttribute(cls.envelope)
 
+        # Attr: weights
+        cls.weights = nAttr.create("weights", "weights",
+                                   om.MFnNumericData.kFloat, 1.0)
+        nAttr.setArray(True)
+        nAttr.setKeyable(True)
+        nAttr.setStorable(True)
+        nAttr.setSoftMin(0)
+        nAttr.setSoftMax(1)
+        cls.addAttribute(cls.weights)
+
+        # Attr: precision
+        cls.precision = None
+        if cls.precisions:
+            eAttr = om.MFnEnumAttribute()
+            cls.precision = eAttr.create("precision", "precision", 0)
+            for index, precision in enumerate(cls.precisions):
+                eAttr.addField(precision, index)
+            eAttr.setKeyable(False)
+            eAttr.setStorable(True)
+            cls.addAttribute(cls.precision)
+
         mAttr = om.MFnMatrixAttribute()
 
         # Attr: inMatrix
@@ -52,6 +222,14 @@ class MatrixDeform(omMPx.MPxNode):
         mAttr.setKeyable(False)
         cls.addAttribute(cls.inDeformMatrix)
 
+        # Attr: inInverseDeformerMatrix
+        cls.inInverseDeformMatrix = mAttr.create(
+            "inInverseDeformerMatrix", "inInvDeformMat",
+            om.MFnMatrixAttribute.kDouble)
+        mAttr.setHidden(False)
+        mAttr.setKeyable(False)
+        cls.addAttribute(cls.inInverseDeformMatrix)
+
         # Attr: outMatrix
         cls.outMatrix = mAttr.create("outMatrix", "outMatrix",
                                      om.MFnMatrixAttribute.kDouble)
@@ -60,12 +238,62 @@ class MatrixDeform(omMPx.MPxNode):
         mAttr.setHidden(False)
         cls.addAttribute(cls.outMatrix)
 
+        # Attr: inMatrices
+        cls.inMatrices = mAttr.create("inMatrices", "inMats",
+                                      om.MFnMatrixAttribute.kDouble)
+        mAttr.setArray(True)
+        mAttr.setHidden(False)
+        mAttr.setKeyable(False)
+        cls.addAttribute(cls.inMatrices)
+
+        # Attr: outMatrices
+        cls.outMatrices = mAttr.create("outMatrices", "outMats",
+                                       om.MFnMatrixAttribute.kDouble)
+        mAttr.setArray(True)
+        mAttr.setUsesArrayDataBuilder(True)
+        mAttr.setKeyable(False)
+        mAttr.setWritable(False)
+        mAttr.setHidden(False)
+        cls.addAttribute(cls.outMatrices)
+
         # Attribute Affects
         cls.attributeAffects(cls.inMatrix, cls.outMatrix)
-        cls.attributeAffects(cls.inDeformMatrix, cls.outMatrix)
-        cls.attributeAffects(cls.envelope, cls.outMatrix)
+        cls.attributeAffects(cls.inMatrices, cls.outMatrices)
+        cls.attributeAffects(cls.weights, cls.outMatrices)
+        if cls.precision is not None:
+            cls.attributeAffects(cls.precision, cls.outMatrices)
+        cls.affectsOutputs(cls.inDeformMatrix)
+        cls.affectsOutputs(cls.inInverseDeformMatrix)
+        cls.affectsOutputs(cls.envelope)
+
+    @classmethod
+    def affectsOutputs(cls, attribute):
+        """Set `attribute` to affect both `outMatrix` and `outMatrices`"""
+        cls.attributeAffects(attribute, cls.outMatrix)
+        cls.attributeAffects(attribute, cls.outMatrices)
+
+    def connectionMade(self, plug, otherPlug, asSrc):
+        if plug == self.inInverseDeformMatrix:
+            self.inverseConnected = True
+        return omMPx.MPxNode.connectionMade(self, plug, otherPlug, asSrc)
+
+    def connectionBroken(self, plug, otherPlug, asSrc):
+        if plug == self.inInverseDeformMatrix:
+            self.inverseConnected = False
+        return omMPx.MPxNode.connectionBroken(self, plug, otherPlug, asSrc)
 
     def compute(self, plug, datablock):
+        if not profiling.enabled:
+            return self.computeOutputs(plug, datablock)
+
+        start = profiling.timer()
+        try:
+            return self.computeOutputs(plug, datablock)
+        finally:
+            profiling.recordCompute(self, profiling.timer() - start)
+
+    def computeOutputs(self, plug, datablock):
+        """Compute `outMatrix` or `outMatrices` (see `compute`)"""
 
         if plug == self.outMatrix:
 
@@ -75,14 +303,29 @@ class MatrixDeform(omMPx.MPxNode):
 
             # If envelope is zero then just pass through inMatrix to outMatrix
             if env == 0.0:
-                datablock.outputValue(self.outMatrix).setMatrix(inMat)
+                datablock.outputValue(self.outMatrix).setMatrix(
+                    self.passThrough(inMat, "envelope"))
                 return
 
             deformMat = datablock.inputValue(self.inDeformMatrix).asMatrix()
 
-            # Calculate the deformed matrix (allow the children nodes to
-            # implement that)
-            outMat = self.deformMatrix(datablock, deformMat, inMat, env)
+            # Reuse the output of bit-identical inputs and parameters
+            key = self.outputKey(datablock, inMat, deformMat, env)
+            outMat = None
+            if key is not None:
+                outMat = self.evaluationCache.output(key)
+
+            if outMat is not None:
+                self.passThrough(outMat, "cached")
+            else:
+                # Calculate the deformed matrix (allow the children nodes to
+                # implement that)
+                outMat = self.deformMatrix(datablock, deformMat, inMat, env)
+                if env != 1.0 and outMat is not inMat:
+                    # Passed through matrices stay bit-identical
+                    outMat = self.blendMatrix(inMat, outMat, env)
+                if key is not None:
+                    self.evaluationCache.setOutput(key, outMat)
 
             # Set the deformed matrix
             # deformedMatrix = om.MMatrix()
@@ -90,9 +333,258 @@ class MatrixDeform(omMPx.MPxNode):
             datablock.outputValue(self.outMatrix).setMMatrix(outMat)
             return
 
+        if plug == self.outMatrices or (plug.isElement() and
+                                        plug.array() == self.outMatrices):
+            self.computeArray(datablock)
+            datablock.setClean(self.outMatrices)
+            return
+
+    def computeArray(self, datablock):
+        """Compute `outMatrices` from `inMatrices` in a single batched pass.
+
+        The deformer parameters are read once for the whole array and the
+        matrices are deformed together by `deformMatrices`, blended by the
+        envelope times the element of `weights` with the same index.
+        """
+        inArray = datablock.inputArrayValue(self.inMatrices)
+        indices = []
+        inMats = []
+        for i in range(inArray.elementCount()):
+            inArray.jumpToArrayElement(i)
+            indices.append(inArray.elementIndex())
+            inMats.append(inArray.inputValue().asMatrix())
+
+        outArray = datablock.outputArrayValue(self.outMatrices)
+        builder = om.MArrayDataBuilder(datablock, self.outMatrices,
+                                       len(indices))
+
+        env = datablock.inputValue(self.envelope).asFloat()
+        if env == 0.0 or not indices:
+            # If envelope is zero then just pass through inMatrices
+            if indices:
+                self.passThrough(None, "envelope", len(indices))
+            for index, inMat in zip(indices, inMats):
+                builder.addElement(index).setMMatrix(inMat)
+        else:
+            deformMat = datablock.inputValue(self.inDeformMatrix).asMatrix()
+            weights = self.matrixWeights(datablock, indices)
+            outMats = self.deformMatrices(datablock, deformMat,
+                                          [matrixToList(inMat)
+                                           for inMat in inMats],
+                                          [env * weight
+                                           for weight in weights])
+            for index, outMat in zip(indices, outMats):
+                builder.addElement(index).setMMatrix(
+                    listToMatrix(outMat.astype("float64").ravel().tolist()))
+
+        outArray.set(builder)
+        outArray.setAllClean()
+
+    def matrixWeights(self, datablock, indices):
+        """Return the `weights` of the `inMatrices` indices, 1.0 if unset"""
+        weightArray = datablock.inputArrayValue(self.weights)
+        weightsByIndex = {}
+        for i in range(weightArray.elementCount()):
+            weightArray.jumpToArrayElement(i)
+            weightsByIndex[weightArray.elementIndex()] = \
+                weightArray.inputValue().asFloat()
+        return [weightsByIndex.get(index, 1.0) for index in indices]
+
+    def blendMatrix(self, mat, outMat, weight):
+        """Return `mat` blended towards the deformed `outMat` by `weight`"""
+        from matrix_deform import kernels
+
+        blended = kernels.blend(matrixToList(mat), matrixToList(outMat),
+                                weight)
+        return listToMatrix(blended.astype("float64").ravel().tolist())
+
+    def weightedMatrices(self, matrices, weights, deform):
+        """Return `matrices` deformed by `deform` and blended by `weights`.
+
+        Matrices with a zero weight are not deformed at all and recorded as
+        the "weight" early exit.
+        """
+        import numpy as np
+        from matrix_deform import kernels
+
+        matrices = kernels.asMatrices(matrices)
+        weights = np.broadcast_to(np.asarray(weights, dtype=np.float64),
+                                  (len(matrices),))
+        mask = weights != 0.0
+        skipped = len(matrices) - int(np.count_nonzero(mask))
+        if not skipped:
+            return kernels.blend(matrices, deform(matrices), weights)
+
+        self.passThrough(None, "weight", skipped)
+        result = matrices.copy()
+        if skipped < len(matrices):
+            result[mask] = kernels.blend(matrices[mask],
+                                         deform(matrices[mask]),
+                                         weights[mask])
+        return result
+
+    def outputKey(self, datablock, inMat, deformMat, envelope):
+        """Return the key to memoize `outMatrix` by, or None to not cache.
+
+        The connected `inInverseDeformerMatrix` is part of the key, as the
+        result depends on it instead of the inverse of `deformMat`.
+        """
+        if not self.cacheOutputs:
+            return None
+        inverse = self.connectedInverse(datablock)
+        return (tuple(matrixToList(inMat)),
+                tuple(matrixToList(deformMat)),
+                tuple(inverse) if inverse is not None else None,
+                envelope,
+                memo.freeze(self.deformParameters(datablock)))
+
+    def localMatrix(self, datablock, mat, deformMat):
+        """Return `mat` in the space of `deformMat`.
+
+        When `inInverseDeformerMatrix` is connected that inverse is used as
+        is, otherwise the inverse of the deformer matrix and the local matrix
+        are memoized by their values in the node's `evaluationCache`.
+        """
+        if self.inverseConnected:
+            invDeformMat = datablock.inputValue(
+                self.inInverseDeformMatrix).asMatrix()
+            return mat * invDeformMat
+
+        return self.evaluationCache.local(tuple(matrixToList(mat)),
+                                          tuple(matrixToList(deformMat)),
+                                          mat, deformMat)
+
+    def connectedInverse(self, datablock):
+        """Return the 16 values of the connected `inInverseDeformerMatrix`.
+
+        Returns None when it is not connected, then the kernels invert the
+        deformer matrix themselves.
+        """
+        if not self.inverseConnected:
+            return None
+        return matrixToList(datablock.inputValue(
+            self.inInverseDeformMatrix).asMatrix())
+
+    def invalidateCache(self):
+        """Drop all memoized results of this node"""
+        self.evaluationCache.clear()
+
+    def nodeName(self):
+        """Return the name of the node in the scene"""
+        return om.MFnDependencyNode(self.thisMObject()).name()
+
+    def passThrough(self, mat, reason, count=1):
+        """Return `mat` unchanged because of an early exit.
+
+        With profiling enabled the early exit is recorded by its `reason`.
+        """
+        if profiling.enabled:
+            profiling.recordExit(self, reason, count)
+        return mat
+
     def deformMatrix(self, datablock, deformMat, mat, envelope):
         """Return the deformed matrix"""
         raise NotImplementedError("The node's deformMatrix method should be "
                                   "implemented on inherited nodes.")
 
+    def deformParameters(self, datablock):
+        """Return the deformer parameters as keyword arguments for `kernel`"""
+        raise NotImplementedError("The node's deformParameters method should "
+                                  "be implemented on inherited nodes.")
+
+    def deformMatrices(self, datablock, deformMat, matrices, envelope):
+        """Return the deformed matrices for an (N, 4, 4) array of matrices.
+
+        This evaluates the node's algorithm for all matrices at once with the
+        vectorized kernel from `matrix_deform.kernels` and blends them by the
+        `envelope`, a single value or one weight per matrix. Matrices outside
+        of the deformer's influence or with a zero weight are culled up
+        front and recorded as the "culled" early exit.
+        """
+        from matrix_deform import kernels
+
+        kernel = getattr(kernels, self.kernel)
+        parameters = self.deformParameters(datablock)
+        if self.kernel not in kernels.LOCAL_KERNELS:
+            return self.weightedMatrices(
+                matrices, envelope,
+                lambda mats: kernel(mats, matrixToList(deformMat),
+                                    **parameters))
+
+        # Only the affected matrices are deformed, the others are culled
+        stats = {}
+        outMats = kernel(matrices,
+                         matrixToList(deformMat),
+                         stats=stats,
+                         dtype=self.floatType(datablock),
+                         weights=envelope,
+                         inverse=self.connectedInverse(datablock),
+                         **parameters)
+        if stats["culled"]:
+            self.passThrough(None, "culled", stats["culled"])
+        return outMats
+
+    def floatType(self, datablock):
+        """Return the float type to deform `outMatrices` in"""
+        if self.precision is None:
+            return "float64"
+        precision = datablock.inputValue(self.precision).asShort()
+        return "float32" if self.precisions[precision] == "single" \
+            else "float64"
+
+
+class MatrixDeformFunction(MatrixDeform):
+    """The abstract base class for deformers defined by a point function.
+
+    Inherited nodes only implement `deformPoints`, a vectorized function of
+    deformer space points, and optionally `deformJacobians` for analytic
+    Jacobians. Both `outMatrix` and `outMatrices` are then evaluated in
+    batches by `matrix_deform.jacobian`, which orients the matrices by the
+    (orthonormalized) Jacobian of the point function.
+    """
+
+    # Rotate the matrices only by the rotation of the Jacobian
+    orthonormal = True
+
+    # The Jacobians are evaluated in double precision
+    precisions = None
+
+    def deformPoints(self, points, **parameters):
+        """Return the deformed (N, 3) deformer space `points`"""
+        raise NotImplementedError("The node's deformPoints method should be "
+                                  "implemented on inherited nodes.")
+
+    def deformJacobians(self, points, **parameters):
+        """Return the (N, 3, 3) Jacobians at `points` or None.
+
+        When None is returned the Jacobians are computed by finite
+        differences of `deformPoints`.
+        """
+        return None
+
+    def deformMatrix(self, datablock, deformMat, mat, envelope):
+        # The envelope is applied to `outMatrix` by `compute`
+        outMats = self.deformMatrices(datablock, deformMat,
+                                      matrixToList(mat), 1.0)
+        return listToMatrix(outMats[0].astype("float64").ravel().tolist())
+
+    def deformMatrices(self, datablock, deformMat, matrices, envelope):
+        from matrix_deform import jacobian
+
+        parameters = self.deformParameters(datablock)
+
+        def pointFunction(points):
+            return self.deformPoints(points, **parameters)
+
+        def jacobianFunction(points):
+            return self.deformJacobians(points, **parameters)
+
+        inverse = self.connectedInverse(datablock)
+
+        def deform(mats):
+            return jacobian.deform(mats, matrixToList(deformMat),
+                                   pointFunction, jacobianFunction,
+                                   orthonormal=self.orthonormal,
+                                   inverse=inverse)
 
+        return self.weightedMatrices(matrices, envelope, deform)
@@ -0,0 +1,121 @@
+"""Memoization of the intermediate results of a deformer node's compute.
+
+Each `MatrixDeform` node owns an `EvaluationCache` that remembers:
+
+- the inverse of the deformer matrix,
+- the deformer space (local) matrix of each input matrix,
+- the output matrix of each set of inputs and parameters.
+
+All entries are keyed on the bit-identical input values, so a dirty pull
+with unchanged inputs (or a parameter set back to a previous value) returns
+the cached result and only the stages whose inputs changed are recomputed.
+Every stage holds at most `size` entries, the least recently used entries
+are dropped first. Inputs that are not part of a key, like a connected mesh,
+are not tracked so those require an explicit `clear()`.
+
+The cache is safe to use from concurrent computes, every access holds the
+cache's lock.
+"""
+import collections
+import threading
+
+
+class _LRU(object):
+    """A dict holding at most `size` items by least recent use"""
+
+    def __init__(self, size):
+        self.size = size
+        self._items = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        try:
+            value = self._items.pop(key)
+        except KeyError:
+            return None
+        self._items[key] = value
+        return value
+
+    def set(self, key, value):
+        self._items.pop(key, None)
+        self._items[key] = value
+        while len(self._items) > self.size:
+            self._items.popitem(last=False)
+
+    def clear(self):
+        self._items.clear()
+
+
+class EvaluationCache(object):
+    """The memoized inverse, local and output matrices of a single node.
+
+    Args:
+        size (int): The maximum number of entries per stage.
+    """
+
+    def __init__(self, size=32):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._inverses = _LRU(size)
+        self._locals = _LRU(size)
+        self._outputs = _LRU(size)
+
+    def __len__(self):
+        with self._lock:
+            return (len(self._inverses) + len(self._locals) +
+                    len(self._outputs))
+
+    def inverse(self, key, mat):
+        """Return the (cached) inverse of `mat` keyed by its values `key`"""
+        with self._lock:
+            inverse = self._inverses.get(key)
+        if inverse is None:
+            inverse = mat.inverse()
+            with self._lock:
+                self._inverses.set(key, inverse)
+        return inverse
+
+    def local(self, key, deformKey, mat, deformMat):
+        """Return the (cached) matrix `mat` in the space of `deformMat`"""
+        localKey = (key, deformKey)
+        with self._lock:
+            localMat = self._locals.get(localKey)
+        if localMat is None:
+            localMat = mat * self.inverse(deformKey, deformMat)
+            with self._lock:
+                self._locals.set(localKey, localMat)
+        return localMat
+
+    def output(self, key):
+        """Return the cached output for `key` or None"""
+        with self._lock:
+            outMat = self._outputs.get(key)
+            if outMat is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return outMat
+
+    def setOutput(self, key, outMat):
+        """Remember `outMat` as the output for `key`"""
+        with self._lock:
+            self._outputs.set(key, outMat)
+
+    def clear(self):
+        """Drop all cached entries"""
+        with self._lock:
+            self._inverses.clear()
+            self._locals.clear()
+            self._outputs.clear()
+
+
+def freeze(value):
+    """Return `value` as hashable key with lists and dicts as tuples"""
+    if isinstance(value, dict):
+        return tuple((key, freeze(value[key])) for key in sorted(value))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
@@ -1,7 +1,7 @@
 import math
 import maya.OpenMaya as om
 
-from matrix_deform.lib import MatrixDeform
+from matrix_deform.lib import MatrixDeform, preTransformAxis, rotatedMatrix
 
 
 class MatrixBend(MatrixDeform):
@@ -10,13 +10,14 @@ class MatrixBend(MatrixDeform):
     # default
     id = om.MTypeId(0x0010A52C)
     pluginNodeTypeName = "matrixBend"
+    kernel = "bend"
 
     def isAbstractClass(self):
         return False
 
     @classmethod
     def nodeInitialize(cls):
-        super(cls, cls).nodeInitialize()
+        super(MatrixBend, cls).nodeInitialize()
         nAttr = om.MFnNumericAttribute()
 
         # Attribute: curvature
@@ -51,41 +52,45 @@ class MatrixBend(MatrixDeform):
                                       om.MFnNumericData.kBoolean, 1.0)
         cls.addAttribute(cls.aAsDegrees)
 
-        cls.attributeAffects(cls.aCurvature, cls.outMatrix)
-        cls.attributeAffects(cls.aLowBound, cls.outMatrix)
-        cls.attributeAffects(cls.aHighBound, cls.outMatrix)
-        cls.attributeAffects(cls.aAsDegrees, cls.outMatrix)
+        cls.affectsOutputs(cls.aCurvature)
+        cls.affectsOutputs(cls.aLowBound)
+        cls.affectsOutputs(cls.aHighBound)
+        cls.affectsOutputs(cls.aAsDegrees)
+
+    def deformParameters(self, datablock):
+        return {
+            "curvature": datablock.inputValue(self.aCurvature).asDouble(),
+            "lowBound": datablock.inputValue(self.aLowBound).asDouble(),
+            "highBound": datablock.inputValue(self.aHighBound).asDouble(),
+            "asDegrees": datablock.inputValue(self.aAsDegrees).asBool()
+        }
 
     def deformMatrix(self, datablock, deformMat, mat, envelope):
         curvature = datablock.inputValue(self.aCurvature).asDouble()
         if curvature == 0.0:
-            return mat  # Nothing changed so return the inMatrix
+            # Nothing changed so return the inMatrix
+            return self.passThrough(mat, "curvature")
 
         lowBound = datablock.inputValue(self.aLowBound).asDouble()
         highBound = datablock.inputValue(self.aHighBound).asDouble()
         if lowBound >= highBound:
-            return mat
+            return self.passThrough(mat, "bounds")
 
         # Get the point to deform in deformSpace
-        invDeformMat = deformMat.inverse()
-        localMat = mat * invDeformMat
-
-        # This is actually in deformSpace
-        transformationMatrix = om.MTransformationMatrix(localMat)
-        pt = transformationMatrix.getTranslation(om.MSpace.kWorld)
+        localMat = self.localMatrix(datablock, mat, deformMat)
 
         # If at exact zero then it won't bend at all. (Odds that this
         # happens are small!)
-        if pt.y == 0.0:
-            return mat
+        if localMat(3, 1) == 0.0:
+            return self.passThrough(mat, "origin")
 
         asDegrees = datablock.inputValue(self.aAsDegrees).asBool()
         if asDegrees:
             curvature *= (math.pi / 180.0)
 
         # Calculate the new point after the bend
-        x = pt.x
-        y = pt.y
+        x = localMat(3, 0)
+        y = localMat(3, 1)
 
         r = 1 / curvature  # bend radius
         # yr = y / r                     # bend at point y
@@ -109,17 +114,14 @@ class MatrixBend(MatrixDeform):
             py += -c * (y - lowBound)
             px += s * (y - lowBound)
 
-        newPt = om.MVector(px, py, pt.z)
+        newPt = (px, py, localMat(3, 2))
 
         # -- Calculate rotation to the matrix
         # yr is the rotation around the z-axis, so this one is easy!
-        eulerRot = om.MEulerRotation(om.MVector(0, 0, -yr))
-        # Rotate the matrix around the z-axis (in pre-transform space)
-        transformationMatrix.rotateBy(eulerRot, om.MSpace.kPreTransform)
-
-        # Adjust the matrix
-        transformationMatrix.setTranslation(newPt, om.MSpace.kWorld)
-        newLocalMat = transformationMatrix.asMatrix()
+        # Rotate the matrix around the z-axis (in pre-transform space) in
+        # closed form, so without decomposing the matrix.
+        axis = preTransformAxis(localMat, 2)
+        newLocalMat = rotatedMatrix(localMat, axis, -yr, newPt)
         newMat = newLocalMat * deformMat  # Back to worldSpace
 
         return newMat
\ No newline at end of file
@@ -0,0 +1,160 @@
+import os
+import threading
+
+import maya.OpenMaya as om
+import maya.OpenMayaMPx as omMPx
+
+from matrix_deform.lib import listToMatrix
+
+
+class MatrixCache(omMPx.MPxNode):
+    """Play back matrices baked with `matrix_deform.cache`.
+
+    The matrices are read from a memory-mapped cache file and interpolated
+    between the samples, so playback costs no deformation math at all.
+    `outMatrix` serves the matrix at `index` and `outMatrices` serves all
+    matrices of the cache.
+    """
+
+    # default
+    id = om.MTypeId(0x0010A531)
+    pluginNodeTypeName = "matrixCache"
+
+    def __init__(self):
+        omMPx.MPxNode.__init__(self)
+        self._cache = None
+        self._cacheLock = threading.Lock()
+
+    def schedulingType(self):
+        # Opening the cache file is guarded by a lock, the cache itself is
+        # only read from
+        return omMPx.MPxNode.kParallel
+
+    @classmethod
+    def creator(cls):
+        return omMPx.asMPxPtr(cls())
+
+    @classmethod
+    def nodeInitialize(cls):
+        tAttr = om.MFnTypedAttribute()
+        uAttr = om.MFnUnitAttribute()
+        nAttr = om.MFnNumericAttribute()
+        mAttr = om.MFnMatrixAttribute()
+
+        # Attribute: cacheFile
+        cls.aCacheFile = tAttr.create("cacheFile", "cacheFile",
+                                      om.MFnData.kString)
+        tAttr.setStorable(True)
+        tAttr.setUsedAsFilename(True)
+        cls.addAttribute(cls.aCacheFile)
+
+        # Attribute: time
+        cls.aTime = uAttr.create("time", "time", om.MFnUnitAttribute.kTime,
+                                 0.0)
+        uAttr.setKeyable(True)
+        uAttr.setStorable(True)
+        cls.addAttribute(cls.aTime)
+
+        # Attribute: index
+        cls.aIndex = nAttr.create("index", "index", om.MFnNumericData.kInt, 0)
+        nAttr.setKeyable(True)
+        nAttr.setStorable(True)
+        nAttr.setMin(0)
+        cls.addAttribute(cls.aIndex)
+
+        # Attribute: outMatrix
+        cls.outMatrix = mAttr.create("outMatrix", "outMatrix",
+                                     om.MFnMatrixAttribute.kDouble)
+        mAttr.setKeyable(False)
+        mAttr.setWritable(False)
+        mAttr.setHidden(False)
+        cls.addAttribute(cls.outMatrix)
+
+        # Attribute: outMatrices
+        cls.outMatrices = mAttr.create("outMatrices", "outMats",
+                                       om.MFnMatrixAttribute.kDouble)
+        mAttr.setArray(True)
+        mAttr.setUsesArrayDataBuilder(True)
+        mAttr.setKeyable(False)
+        mAttr.setWritable(False)
+        mAttr.setHidden(False)
+        cls.addAttribute(cls.outMatrices)
+
+        for attr in [cls.aCacheFile, cls.aTime]:
+            cls.attributeAffects(attr, cls.outMatrix)
+            cls.attributeAffects(attr, cls.outMatrices)
+        cls.attributeAffects(cls.aIndex, cls.outMatrix)
+
+    def cache(self, datablock):
+        """Return the opened `Cache` of the `cacheFile` or None.
+
+        The cache is opened again when the file was baked again since, that
+        is when its modification time or size changed or a `CacheWriter`
+        closed it to replace the file. A cache without frames is reported
+        and not used.
+        """
+        from matrix_deform.cache import Cache
+
+        path = datablock.inputValue(self.aCacheFile).asString()
+        try:
+            stat = os.stat(path) if path else None
+        except OSError:
+            stat = None
+        fileStamp = (stat.st_mtime, stat.st_size) if stat else None
+
+        with self._cacheLock:
+            if not path:
+                self._cache = None
+            elif (self._cache is None or self._cache.path != path or
+                  self._cache.fileStamp != fileStamp or
+                  self._cache.closed):
+                try:
+                    self._cache = Cache(path)
+                except (IOError, OSError, ValueError) as exc:
+                    om.MGlobal.displayWarning(str(exc))
+                    self._cache = None
+                else:
+                    if not self._cache.frameCount:
+                        om.MGlobal.displayWarning(
+                            "The cache has no frames: {0}".format(path))
+                        self._cache = None
+            return self._cache
+
+    def compute(self, plug, datablock):
+
+        if plug == self.outMatrix:
+            cache = self.cache(datablock)
+            index = datablock.inputValue(self.aIndex).asInt()
+            outMat = om.MMatrix()
+            if cache is not None and index < cache.count:
+                frame = self.frame(datablock)
+                sampled = cache.sample(frame, [index])
+                outMat = listToMatrix(
+                    sampled.astype("float64").ravel().tolist())
+
+            datablock.outputValue(self.outMatrix).setMMatrix(outMat)
+            datablock.setClean(self.outMatrix)
+            return
+
+        if plug == self.outMatrices or (plug.isElement() and
+                                        plug.array() == self.outMatrices):
+            cache = self.cache(datablock)
+            outMats = []
+            if cache is not None:
+                outMats = cache.sample(self.frame(datablock))
+
+            outArray = datablock.outputArrayValue(self.outMatrices)
+            builder = om.MArrayDataBuilder(datablock, self.outMatrices,
+                                           len(outMats))
+            for index, outMat in enumerate(outMats):
+                builder.addElement(index).setMMatrix(
+                    listToMatrix(outMat.astype("float64").ravel().tolist()))
+            outArray.set(builder)
+            outArray.setAllClean()
+            datablock.setClean(self.outMatrices)
+            return
+
+    def frame(self, datablock):
+        """Return the current `time` in frames (the UI time unit)"""
+        time = datablock.inputValue(self.aTime).asTime()
+        return time.asUnits(om.MTime.uiUnit())
@@ -0,0 +1,175 @@
+import threading
+
+import maya.OpenMaya as om
+
+from matrix_deform.lib import (MatrixDeform, matrixToList, listToMatrix,
+                               arrayToScriptUtil, pointerToArray)
+
+
+class MatrixCurve(MatrixDeform):
+    """The matrix deformation along a NURBS curve.
+
+    The y-axis of the deformer's space is mapped onto `inCurve`, connect the
+    curve shape's `worldSpace[0]`. The curve is taken into the deformer's
+    space, where a matrix at height y is slid to the arc length
+    `y * stretch + offset` along the curve and oriented by the curve's
+    rotation-minimizing frame there, its x and z offsets follow the frame's
+    normal and binormal. At the start of the curve the normal points along
+    the deformer's x-axis. Like the other deformers the result is mapped
+    back to world space by the deformer matrix.
+
+    The curve is resampled to a table of `samples` evenly spaced arc lengths
+    once per change of the curve or the deformer matrix, after that each
+    matrix is only a lookup in that table (see `matrix_deform.curve`).
+    """
+
+    # default
+    id = om.MTypeId(0x0010A536)
+    pluginNodeTypeName = "matrixCurve"
+
+    # The output also depends on the `inCurve`
+    cacheOutputs = False
+
+    # The curve table is sampled in double precision
+    precisions = None
+
+    # The points sampled along the curve per table sample to measure the
+    # arc length
+    oversampling = 4
+
+    def __init__(self):
+        super(MatrixCurve, self).__init__()
+        self._tableKey = None
+        self._table = None
+        self._tableLock = threading.Lock()
+
+    def isAbstractClass(self):
+        return False
+
+    @classmethod
+    def nodeInitialize(cls):
+        super(MatrixCurve, cls).nodeInitialize()
+        nAttr = om.MFnNumericAttribute()
+        tAttr = om.MFnTypedAttribute()
+
+        # Attribute: inCurve
+        cls.aInCurve = tAttr.create("inCurve", "inCurve",
+                                    om.MFnData.kNurbsCurve)
+        tAttr.setStorable(False)
+        cls.addAttribute(cls.aInCurve)
+
+        # Attribute: offset
+        cls.aOffset = nAttr.create("offset", "offset",
+                                   om.MFnNumericData.kDouble, 0.0)
+        nAttr.setKeyable(True)
+        nAttr.setStorable(True)
+        cls.addAttribute(cls.aOffset)
+
+        # Attribute: stretch
+        cls.aStretch = nAttr.create("stretch", "stretch",
+                                    om.MFnNumericData.kDouble, 1.0)
+        nAttr.setKeyable(True)
+        nAttr.setStorable(True)
+        nAttr.setSoftMin(0)
+        nAttr.setSoftMax(10)
+        cls.addAttribute(cls.aStretch)
+
+        # Attribute: samples
+        cls.aSamples = nAttr.create("samples", "samples",
+                                    om.MFnNumericData.kInt, 256)
+        nAttr.setKeyable(False)
+        nAttr.setStorable(True)
+        nAttr.setMin(2)
+        nAttr.setSoftMax(1024)
+        cls.addAttribute(cls.aSamples)
+
+        cls.affectsOutputs(cls.aInCurve)
+        cls.affectsOutputs(cls.aOffset)
+        cls.affectsOutputs(cls.aStretch)
+        cls.affectsOutputs(cls.aSamples)
+
+    def deformParameters(self, datablock):
+        return {
+            "offset": datablock.inputValue(self.aOffset).asDouble(),
+            "stretch": datablock.inputValue(self.aStretch).asDouble()
+        }
+
+    def curveTable(self, datablock, deformMat):
+        """Return the `CurveTable` of `inCurve` or None without a curve.
+
+        The table is in the deformer's space. It is only rebuilt when the
+        curve's control points, knots, the number of samples or the deformer
+        matrix changed.
+        """
+        import numpy as np
+
+        curveObj = datablock.inputValue(self.aInCurve).asNurbsCurve()
+        if curveObj.isNull():
+            return None
+
+        # Copy the CVs and knots into buffers in single calls
+        fnCurve = om.MFnNurbsCurve(curveObj)
+        cvs = om.MPointArray()
+        fnCurve.getCVs(cvs, om.MSpace.kObject)
+        cvUtil = arrayToScriptUtil(np.zeros((cvs.length(), 4)))
+        cvPointer = cvUtil.asDouble4Ptr()
+        cvs.get(cvPointer)
+        cvs = pointerToArray(cvPointer, (cvs.length(), 4), np.float64)
+
+        knots = om.MDoubleArray()
+        fnCurve.getKnots(knots)
+        knotUtil = arrayToScriptUtil(np.zeros(knots.length()))
+        knotPointer = knotUtil.asDoublePtr()
+        knots.get(knotPointer)
+        knots = pointerToArray(knotPointer, (knots.length(),), np.float64)
+
+        degree = fnCurve.degree()
+        samples = datablock.inputValue(self.aSamples).asInt()
+        deformValues = matrixToList(deformMat)
+        inverse = self.connectedInverse(datablock)
+
+        key = (cvs.tobytes(), knots.tobytes(), degree, samples,
+               tuple(deformValues),
+               tuple(inverse) if inverse is not None else None)
+        with self._tableLock:
+            if key == self._tableKey:
+                return self._table
+
+        from matrix_deform import curve
+
+        # The worldSpace curve is sampled densely over its knot domain and
+        # taken into the deformer's space, where its x-axis is the up vector
+        points = curve.nurbsPoints(cvs, knots, degree,
+                                   max(samples, 2) * self.oversampling)
+        if inverse is None:
+            inverse = np.linalg.inv(np.reshape(deformValues, (4, 4)))
+        inverse = np.reshape(inverse, (4, 4))
+        points = np.dot(points, inverse[:3, :3]) + inverse[3, :3]
+
+        table = curve.CurveTable(points, samples)
+        with self._tableLock:
+            self._tableKey = key
+            self._table = table
+        return table
+
+    def deformMatrix(self, datablock, deformMat, mat, envelope):
+        # The envelope is applied to `outMatrix` by `compute`
+        outMats = self.deformMatrices(datablock, deformMat,
+                                      matrixToList(mat), 1.0)
+        return listToMatrix(outMats[0].astype("float64").ravel().tolist())
+
+    def deformMatrices(self, datablock, deformMat, matrices, envelope):
+        from matrix_deform import curve, kernels
+
+        table = self.curveTable(datablock, deformMat)
+        if table is None:
+            # No curve to deform along so return the matrices
+            matrices = kernels.asMatrices(matrices)
+            return self.passThrough(matrices, "curve", len(matrices))
+
+        parameters = self.deformParameters(datablock)
+        inverse = self.connectedInverse(datablock)
+        return self.weightedMatrices(
+            matrices, envelope,
+            lambda mats: curve.deform(mats, matrixToList(deformMat), table,
+                                      inverse=inverse, **parameters))
@@ -0,0 +1,73 @@
+import maya.OpenMaya as om
+import maya.OpenMayaMPx as omMPx
+
+
+class MatrixDeformContext(omMPx.MPxNode):
+    """The deformer space shared by many matrix deformation nodes.
+
+    Connect the deformer handle's matrix to `deformerMatrix` and the
+    `outDeformerMatrix` and `outInverseDeformerMatrix` to the
+    `inDeformerMatrix` and `inInverseDeformerMatrix` of any number of
+    deformer nodes. The inverse is then computed once per evaluation instead
+    of once per deformer node.
+    """
+
+    # default
+    id = om.MTypeId(0x0010A535)
+    pluginNodeTypeName = "matrixDeformContext"
+
+    def __init__(self):
+        omMPx.MPxNode.__init__(self)
+
+    def schedulingType(self):
+        return omMPx.MPxNode.kParallel
+
+    @classmethod
+    def creator(cls):
+        return omMPx.asMPxPtr(cls())
+
+    @classmethod
+    def nodeInitialize(cls):
+        mAttr = om.MFnMatrixAttribute()
+
+        # Attribute: deformerMatrix
+        cls.aDeformerMatrix = mAttr.create("deformerMatrix", "deformMat",
+                                           om.MFnMatrixAttribute.kDouble)
+        mAttr.setHidden(False)
+        mAttr.setKeyable(False)
+        cls.addAttribute(cls.aDeformerMatrix)
+
+        # Attribute: outDeformerMatrix
+        cls.aOutDeformerMatrix = mAttr.create("outDeformerMatrix",
+                                              "outDeformMat",
+                                              om.MFnMatrixAttribute.kDouble)
+        mAttr.setKeyable(False)
+        mAttr.setWritable(False)
+        mAttr.setHidden(False)
+        cls.addAttribute(cls.aOutDeformerMatrix)
+
+        # Attribute: outInverseDeformerMatrix
+        cls.aOutInverseDeformerMatrix = mAttr.create(
+            "outInverseDeformerMatrix", "outInvDeformMat",
+            om.MFnMatrixAttribute.kDouble)
+        mAttr.setKeyable(False)
+        mAttr.setWritable(False)
+        mAttr.setHidden(False)
+        cls.addAttribute(cls.aOutInverseDeformerMatrix)
+
+        cls.attributeAffects(cls.aDeformerMatrix, cls.aOutDeformerMatrix)
+        cls.attributeAffects(cls.aDeformerMatrix,
+                             cls.aOutInverseDeformerMatrix)
+
+    def compute(self, plug, datablock):
+
+        if plug not in (self.aOutDeformerMatrix,
+                        self.aOutInverseDeformerMatrix):
+            return
+
+        deformMat = datablock.inputValue(self.aDeformerMatrix).asMatrix()
+        datablock.outputValue(self.aOutDeformerMatrix).setMMatrix(deformMat)
+        datablock.outputValue(self.aOutInverseDeformerMatrix).setMMatrix(
+            deformMat.inverse())
+        datablock.setClean(self.aOutDeformerMatrix)
+        datablock.setClean(self.aOutInverseDeformerMatrix)
@@ -0,0 +1,150 @@
+import maya.OpenMaya as om
+
+from matrix_deform.lib import (matrixToList, arrayToScriptUtil,
+                               pointerToArray)
+from matrix_deform.nodes.matrixBend import MatrixBend
+from matrix_deform.nodes.matrixTwist import MatrixTwist
+from matrix_deform.nodes.matrixWave import MatrixWave
+
+
+class MatrixDeformParticles(object):
+    """Mixin that adds per-particle array inputs and outputs to a deformer.
+
+    The particles are read from the `inPosition` array together with either
+    the `inRotation` array (XYZ Euler angles in degrees) or the
+    `inAimDirection` and `inUpDirection` arrays. They are deformed in bulk
+    by the node's kernel and written to `outPosition`, `outRotation`,
+    `outAimDirection` and `outUpDirection`, ready to be used as per-particle
+    attributes of an instancer or nParticles.
+    """
+
+    @classmethod
+    def nodeInitialize(cls):
+        tAttr = om.MFnTypedAttribute()
+
+        # Create the outputs first so the deformer's own attributes will
+        # also affect them through `affectsOutputs`
+        cls.particleOutputs = []
+        for name in ["outPosition", "outRotation", "outAimDirection",
+                     "outUpDirection"]:
+            attr = tAttr.create(name, name, om.MFnData.kVectorArray)
+            tAttr.setWritable(False)
+            tAttr.setStorable(False)
+            cls.addAttribute(attr)
+            cls.particleOutputs.append(attr)
+        (cls.aOutPosition, cls.aOutRotation,
+         cls.aOutAimDirection, cls.aOutUpDirection) = cls.particleOutputs
+
+        super(MatrixDeformParticles, cls).nodeInitialize()
+
+        cls.particleInputs = []
+        for name in ["inPosition", "inRotation", "inAimDirection",
+                     "inUpDirection"]:
+            attr = tAttr.create(name, name, om.MFnData.kVectorArray)
+            tAttr.setStorable(True)
+            cls.addAttribute(attr)
+            cls.particleInputs.append(attr)
+        (cls.aInPosition, cls.aInRotation,
+         cls.aInAimDirection, cls.aInUpDirection) = cls.particleInputs
+
+        for attr in cls.particleInputs:
+            for output in cls.particleOutputs:
+                cls.attributeAffects(attr, output)
+
+    @classmethod
+    def affectsOutputs(cls, attribute):
+        super(MatrixDeformParticles, cls).affectsOutputs(attribute)
+        for output in cls.particleOutputs:
+            cls.attributeAffects(attribute, output)
+
+    def computeOutputs(self, plug, datablock):
+
+        if plug in self.particleOutputs:
+            self.computeParticles(datablock)
+            for output in self.particleOutputs:
+                datablock.setClean(output)
+            return
+
+        return super(MatrixDeformParticles, self).computeOutputs(plug, datablock)
+
+    def computeParticles(self, datablock):
+        """Deform the input particle arrays to the output particle arrays"""
+        import numpy as np
+        from matrix_deform import particles
+
+        positions = _readVectorArray(datablock, self.aInPosition)
+        rotations = _readVectorArray(datablock, self.aInRotation)
+        aims = _readVectorArray(datablock, self.aInAimDirection)
+        ups = _readVectorArray(datablock, self.aInUpDirection)
+
+        count = len(positions)
+        if len(rotations) == count:
+            rotations = particles.eulerToRotations(rotations)
+        elif len(aims) == count:
+            if len(ups) != count:
+                ups = np.tile([0.0, 1.0, 0.0], (count, 1))
+            rotations = particles.aimToRotations(aims, ups)
+        else:
+            rotations = np.tile(np.identity(3), (count, 1, 1))
+
+        env = datablock.inputValue(self.envelope).asFloat()
+        if env != 0.0 and count:
+            deformMat = datablock.inputValue(self.inDeformMatrix).asMatrix()
+            positions, rotations = particles.deform(
+                self.kernel, positions, rotations, matrixToList(deformMat),
+                weights=env, **self.deformParameters(datablock))
+
+        _writeVectorArray(datablock, self.aOutPosition, positions)
+        _writeVectorArray(datablock, self.aOutRotation,
+                          particles.rotationsToEuler(rotations))
+        _writeVectorArray(datablock, self.aOutAimDirection, rotations[:, 0])
+        _writeVectorArray(datablock, self.aOutUpDirection, rotations[:, 1])
+
+
+class MatrixBendPP(MatrixDeformParticles, MatrixBend):
+    """The per-particle array variant of the matrixBend node."""
+
+    # default
+    id = om.MTypeId(0x0010A532)
+    pluginNodeTypeName = "matrixBendPP"
+
+
+class MatrixTwistPP(MatrixDeformParticles, MatrixTwist):
+    """The per-particle array variant of the matrixTwist node."""
+
+    # default
+    id = om.MTypeId(0x0010A533)
+    pluginNodeTypeName = "matrixTwistPP"
+
+
+class MatrixWavePP(MatrixDeformParticles, MatrixWave):
+    """The per-particle array variant of the matrixWave node."""
+
+    # default
+    id = om.MTypeId(0x0010A534)
+    pluginNodeTypeName = "matrixWavePP"
+
+
+def _readVectorArray(datablock, attribute):
+    """Return the vectors of a vector array attribute as (N, 3) array"""
+    import numpy as np
+
+    data = datablock.inputValue(attribute).data()
+    if data.isNull():
+        return np.zeros((0, 3))
+
+    # Copy all vectors into one buffer and convert that at once
+    array = om.MFnVectorArrayData(data).array()
+    count = array.length()
+    vectorUtil = arrayToScriptUtil(np.zeros((count, 3)))
+    pointer = vectorUtil.asDouble3Ptr()
+    array.get(pointer)
+    return pointerToArray(pointer, (count, 3), np.float64)
+
+
+def _writeVectorArray(datablock, attribute, vectors):
+    """Set a vector array attribute to the (N, 3) `vectors`"""
+    vectorUtil = arrayToScriptUtil(vectors)
+    array = om.MVectorArray(vectorUtil.asDouble3Ptr(), len(vectors))
+    data = om.MFnVectorArrayData().create(array)
+    datablock.outputValue(attribute).setMObject(data)
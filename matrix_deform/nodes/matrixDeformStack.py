@@ -0,0 +1,119 @@
+import maya.OpenMaya as om
+
+from matrix_deform.lib import MatrixDeform, matrixToList, listToMatrix
+
+
+class MatrixDeformStack(MatrixDeform):
+    """The matrix deformation by an ordered stack of non-linear deformers.
+
+    Each element of the `layer` array is a bend, twist or wave deformer with
+    its own matrix (relative to `inDeformerMatrix`) and parameters. All
+    layers are evaluated in a single compute by `kernels.stack`, which keeps
+    the matrices in deformer space between the layers and skips layers that
+    have no effect.
+    """
+
+    # default
+    id = om.MTypeId(0x0010A52F)
+    pluginNodeTypeName = "matrixDeformStack"
+    kernel = "stack"
+
+    # The layers are deformed in double precision
+    precisions = None
+
+    # The layer types in order of the `layerType` enum
+    layerTypes = ["bend", "twist", "wave"]
+
+    def isAbstractClass(self):
+        return False
+
+    @classmethod
+    def nodeInitialize(cls):
+        super(MatrixDeformStack, cls).nodeInitialize()
+        nAttr = om.MFnNumericAttribute()
+        eAttr = om.MFnEnumAttribute()
+        mAttr = om.MFnMatrixAttribute()
+        cAttr = om.MFnCompoundAttribute()
+
+        # Attribute: layerType
+        cls.aLayerType = eAttr.create("layerType", "layerType", 0)
+        for index, layerType in enumerate(cls.layerTypes):
+            eAttr.addField(layerType, index)
+        eAttr.setKeyable(True)
+        eAttr.setStorable(True)
+
+        # Attribute: layerMatrix
+        cls.aLayerMatrix = mAttr.create("layerMatrix", "layerMat",
+                                        om.MFnMatrixAttribute.kDouble)
+        mAttr.setHidden(False)
+        mAttr.setKeyable(False)
+
+        # The parameters of all layer types: (name, type, default)
+        cls.layerParameters = []
+        for name, numericType, default in [
+                ("curvature", om.MFnNumericData.kDouble, 0.0),
+                ("asDegrees", om.MFnNumericData.kBoolean, 1.0),
+                ("startAngle", om.MFnNumericData.kDouble, 0.0),
+                ("endAngle", om.MFnNumericData.kDouble, 0.0),
+                ("lowBound", om.MFnNumericData.kDouble, -1.0),
+                ("highBound", om.MFnNumericData.kDouble, 1.0),
+                ("amplitude", om.MFnNumericData.kDouble, 0.0),
+                ("wavelength", om.MFnNumericData.kDouble, 1.0),
+                ("offset", om.MFnNumericData.kDouble, 0.0),
+                ("dropoff", om.MFnNumericData.kDouble, 0.0),
+                ("minRadius", om.MFnNumericData.kDouble, 0.0),
+                ("maxRadius", om.MFnNumericData.kDouble, 1.0)]:
+            attr = nAttr.create(name, name, numericType, default)
+            nAttr.setKeyable(True)
+            nAttr.setStorable(True)
+            cls.layerParameters.append((name, attr))
+
+        # Attribute: layer
+        cls.aLayer = cAttr.create("layer", "layer")
+        cAttr.addChild(cls.aLayerType)
+        cAttr.addChild(cls.aLayerMatrix)
+        for name, attr in cls.layerParameters:
+            cAttr.addChild(attr)
+        cAttr.setArray(True)
+        cls.addAttribute(cls.aLayer)
+
+        cls.affectsOutputs(cls.aLayer)
+
+    def deformParameters(self, datablock):
+        layers = []
+        layerArray = datablock.inputArrayValue(self.aLayer)
+        for i in range(layerArray.elementCount()):
+            layerArray.jumpToArrayElement(i)
+            handle = layerArray.inputValue()
+
+            layerType = handle.child(self.aLayerType).asShort()
+            layerType = self.layerTypes[layerType]
+            layerMatrix = handle.child(self.aLayerMatrix).asMatrix()
+            parameters = {}
+            for name, attr in self.layerParameters:
+                if name == "asDegrees":
+                    parameters[name] = handle.child(attr).asBool()
+                else:
+                    parameters[name] = handle.child(attr).asDouble()
+
+            layers.append((layerType, matrixToList(layerMatrix),
+                           _layerParameters(layerType, parameters)))
+
+        return {"layers": layers}
+
+    def deformMatrix(self, datablock, deformMat, mat, envelope):
+        # The envelope is applied to `outMatrix` by `compute`
+        outMats = self.deformMatrices(datablock, deformMat,
+                                      matrixToList(mat), 1.0)
+        return listToMatrix(outMats[0].astype("float64").ravel().tolist())
+
+
+def _layerParameters(layerType, parameters):
+    """Return only the parameters used by the layer type's kernel"""
+    names = {
+        "bend": ("curvature", "lowBound", "highBound", "asDegrees"),
+        "twist": ("startAngle", "endAngle", "lowBound", "highBound"),
+        "wave": ("amplitude", "wavelength", "offset", "dropoff", "minRadius",
+                 "maxRadius")
+    }[layerType]
+    return dict((name, parameters[name]) for name in names)
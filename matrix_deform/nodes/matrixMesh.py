@@ -0,0 +1,186 @@
+import maya.OpenMaya as om
+
+from matrix_deform.lib import (MatrixDeform, matrixToList, listToMatrix,
+                               arrayToScriptUtil, pointerToArray)
+
+
+class MatrixMesh(MatrixDeform):
+    """The approximated matrix deformation by an arbitrary deformer.
+
+    The `inMatrix` and `inMatrices` are encoded as tetrahedrons of a single
+    'matrix mesh' on `outMesh`. Push that mesh through any deformer and
+    connect the deformed mesh to `inMesh` to get the deformed matrices on
+    `outMatrix` and `outMatrices`. The first tetrahedron holds `inMatrix`,
+    the others hold the `inMatrices` in order.
+
+    The deformed mesh is read in object space, so the mesh shape should not
+    be transformed.
+    """
+
+    # default
+    id = om.MTypeId(0x0010A530)
+    pluginNodeTypeName = "matrixMesh"
+
+    # The output also depends on the deformed `inMesh`
+    cacheOutputs = False
+
+    # The mesh is decoded in double precision
+    precisions = None
+
+    def isAbstractClass(self):
+        return False
+
+    @classmethod
+    def nodeInitialize(cls):
+        super(MatrixMesh, cls).nodeInitialize()
+        nAttr = om.MFnNumericAttribute()
+        tAttr = om.MFnTypedAttribute()
+
+        # Attribute: size
+        cls.aSize = nAttr.create("size", "size",
+                                 om.MFnNumericData.kDouble, 0.1)
+        nAttr.setKeyable(True)
+        nAttr.setStorable(True)
+        nAttr.setMin(0.000001)
+        nAttr.setSoftMax(1.0)
+        cls.addAttribute(cls.aSize)
+
+        # Attribute: keepDeformerScale
+        cls.aKeepDeformerScale = nAttr.create("keepDeformerScale",
+                                              "keepDeformerScale",
+                                              om.MFnNumericData.kBoolean, 0.0)
+        nAttr.setKeyable(True)
+        nAttr.setStorable(True)
+        cls.addAttribute(cls.aKeepDeformerScale)
+
+        # Attribute: inMesh
+        cls.aInMesh = tAttr.create("inMesh", "inMesh", om.MFnData.kMesh)
+        tAttr.setStorable(False)
+        cls.addAttribute(cls.aInMesh)
+
+        # Attribute: outMesh
+        cls.aOutMesh = tAttr.create("outMesh", "outMesh", om.MFnData.kMesh)
+        tAttr.setWritable(False)
+        tAttr.setStorable(False)
+        cls.addAttribute(cls.aOutMesh)
+
+        cls.affectsOutputs(cls.aSize)
+        cls.affectsOutputs(cls.aKeepDeformerScale)
+        cls.affectsOutputs(cls.aInMesh)
+
+        cls.attributeAffects(cls.aSize, cls.aOutMesh)
+        cls.attributeAffects(cls.inMatrix, cls.aOutMesh)
+        cls.attributeAffects(cls.inMatrices, cls.aOutMesh)
+
+    def computeOutputs(self, plug, datablock):
+
+        if plug == self.aOutMesh:
+            self.computeMesh(datablock)
+            datablock.setClean(plug)
+            return
+
+        return super(MatrixMesh, self).computeOutputs(plug, datablock)
+
+    def computeMesh(self, datablock):
+        """Encode `inMatrix` and `inMatrices` into the `outMesh`"""
+        import numpy as np
+        from matrix_deform import approximation
+
+        size = datablock.inputValue(self.aSize).asDouble()
+        points, counts, connects = approximation.encode(
+            self.inputMatrices(datablock), size)
+
+        # Fill the arrays in single calls from buffers, not per element
+        homogeneous = np.ones((len(points), 4))
+        homogeneous[:, :3] = points
+        pointUtil = arrayToScriptUtil(homogeneous)
+        mPoints = om.MFloatPointArray(pointUtil.asFloat4Ptr(), len(points))
+        mCounts = om.MIntArray()
+        om.MScriptUtil.createIntArrayFromList(counts.tolist(), mCounts)
+        mConnects = om.MIntArray()
+        om.MScriptUtil.createIntArrayFromList(connects.tolist(), mConnects)
+
+        meshData = om.MFnMeshData()
+        meshObj = meshData.create()
+        om.MFnMesh().create(mPoints.length(), mCounts.length(), mPoints,
+                            mCounts, mConnects, meshObj)
+
+        datablock.outputValue(self.aOutMesh).setMObject(meshObj)
+
+    def inputMatrices(self, datablock):
+        """Return `inMatrix` followed by the `inMatrices` as (N, 4, 4) array.
+
+        The array elements are read one by one, API 1.0 has no bulk access
+        to the elements of a matrix array attribute.
+        """
+        import numpy as np
+
+        values = [matrixToList(datablock.inputValue(self.inMatrix).asMatrix())]
+        inArray = datablock.inputArrayValue(self.inMatrices)
+        for i in range(inArray.elementCount()):
+            inArray.jumpToArrayElement(i)
+            values.append(matrixToList(inArray.inputValue().asMatrix()))
+        return np.array(values).reshape(-1, 4, 4)
+
+    def meshPoints(self, datablock):
+        """Return the (N, 3) points of the deformed `inMesh`"""
+        import numpy as np
+
+        meshObj = datablock.inputValue(self.aInMesh).asMesh()
+        if meshObj.isNull():
+            return np.zeros((0, 3))
+
+        points = om.MFloatPointArray()
+        om.MFnMesh(meshObj).getPoints(points, om.MSpace.kObject)
+
+        # Copy all points into one buffer and convert that at once
+        count = points.length()
+        pointUtil = arrayToScriptUtil(np.zeros((count, 4)))
+        pointer = pointUtil.asFloat4Ptr()
+        points.get(pointer)
+        return pointerToArray(pointer, (count, 4), np.float32)[:, :3]
+
+    def deformParameters(self, datablock):
+        return {
+            "size": datablock.inputValue(self.aSize).asDouble(),
+            "keepDeformerScale": datablock.inputValue(
+                self.aKeepDeformerScale).asBool()
+        }
+
+    def deformMatrix(self, datablock, deformMat, mat, envelope):
+        points = self.meshPoints(datablock)
+        if len(points) < 4:
+            # Nothing to decode so return the inMatrix
+            return self.passThrough(mat, "mesh")
+
+        from matrix_deform import approximation
+
+        outMat = approximation.decode(points[:4], matrixToList(mat),
+                                      **self.deformParameters(datablock))
+        return listToMatrix(outMat.astype("float64").ravel().tolist())
+
+    def deformMatrices(self, datablock, deformMat, matrices, envelope):
+        from matrix_deform import approximation, kernels
+
+        points = self.meshPoints(datablock)
+        matrices = kernels.asMatrices(matrices)
+        if not len(points):
+            # Nothing to decode so return the inMatrices
+            return self.passThrough(matrices, "mesh", len(matrices))
+
+        # The first tetrahedron holds the `inMatrix`
+        points = points[4:]
+        if len(points) != len(matrices) * 4:
+            # A mesh of other matrices has nothing to blend with, so report
+            # it instead of silently passing the inputs through
+            om.MGlobal.displayWarning(
+                "%s: inMesh has %d tetrahedrons for %d inMatrices, connect "
+                "the deformed outMesh." % (self.nodeName(), len(points) // 4,
+                                           len(matrices)))
+            return self.passThrough(matrices, "mesh", len(matrices))
+
+        # The mesh holds the deformed tetrahedron of every matrix, so all
+        # matrices are decoded and then blended by their weights
+        outMats = approximation.decode(points, matrices,
+                                       **self.deformParameters(datablock))
+        return kernels.blend(matrices, outMats, envelope)
@@ -0,0 +1,96 @@
+import maya.OpenMaya as om
+
+from matrix_deform.lib import MatrixDeformFunction
+
+
+class MatrixSine(MatrixDeformFunction):
+    """The matrix deformation by a sine wave along the deformer's y-axis.
+
+    Between `lowBound` and `highBound` a matrix at height y is moved along
+    the deformer's x-axis by `amplitude * sin((y + offset) / wavelength)`,
+    beyond the bounds the offset at the bound is kept. Only the point
+    function is implemented here, the orientation follows from its Jacobian
+    by finite differences (see `MatrixDeformFunction`).
+    """
+
+    # default
+    id = om.MTypeId(0x0010A537)
+    pluginNodeTypeName = "matrixSine"
+
+    def isAbstractClass(self):
+        return False
+
+    @classmethod
+    def nodeInitialize(cls):
+        super(MatrixSine, cls).nodeInitialize()
+        nAttr = om.MFnNumericAttribute()
+
+        # Attribute: amplitude
+        cls.aAmplitude = nAttr.create("amplitude", "amplitude",
+                                      om.MFnNumericData.kDouble, 0.0)
+        nAttr.setKeyable(True)
+        nAttr.setStorable(True)
+        nAttr.setSoftMin(-5)
+        nAttr.setSoftMax(5)
+        cls.addAttribute(cls.aAmplitude)
+
+        # Attribute: wavelength
+        cls.aWavelength = nAttr.create("wavelength", "wavelength",
+                                       om.MFnNumericData.kDouble, 1.0)
+        nAttr.setKeyable(True)
+        nAttr.setStorable(True)
+        nAttr.setMin(0.000001)
+        nAttr.setSoftMin(0.1)
+        nAttr.setSoftMax(10.0)
+        cls.addAttribute(cls.aWavelength)
+
+        # Attribute: offset
+        cls.aOffset = nAttr.create("offset", "offset",
+                                   om.MFnNumericData.kDouble, 0.0)
+        nAttr.setKeyable(True)
+        nAttr.setStorable(True)
+        nAttr.setSoftMin(-10)
+        nAttr.setSoftMax(10)
+        cls.addAttribute(cls.aOffset)
+
+        # Attribute: lowBound
+        cls.aLowBound = nAttr.create("lowBound", "low",
+                                     om.MFnNumericData.kDouble, -1.0)
+        nAttr.setKeyable(True)
+        nAttr.setStorable(True)
+        nAttr.setSoftMin(-10)
+        nAttr.setMax(0)
+        cls.addAttribute(cls.aLowBound)
+
+        # Attribute: highBound
+        cls.aHighBound = nAttr.create("highBound", "high",
+                                      om.MFnNumericData.kDouble, 1.0)
+        nAttr.setKeyable(True)
+        nAttr.setStorable(True)
+        nAttr.setMin(0)
+        nAttr.setSoftMax(10)
+        cls.addAttribute(cls.aHighBound)
+
+        cls.affectsOutputs(cls.aAmplitude)
+        cls.affectsOutputs(cls.aWavelength)
+        cls.affectsOutputs(cls.aOffset)
+        cls.affectsOutputs(cls.aLowBound)
+        cls.affectsOutputs(cls.aHighBound)
+
+    def deformParameters(self, datablock):
+        return {
+            "amplitude": datablock.inputValue(self.aAmplitude).asDouble(),
+            "wavelength": datablock.inputValue(self.aWavelength).asDouble(),
+            "offset": datablock.inputValue(self.aOffset).asDouble(),
+            "lowBound": datablock.inputValue(self.aLowBound).asDouble(),
+            "highBound": datablock.inputValue(self.aHighBound).asDouble()
+        }
+
+    def deformPoints(self, points, amplitude, wavelength, offset, lowBound,
+                     highBound):
+        import numpy as np
+
+        y = np.clip(points[:, 1], lowBound, highBound)
+        result = np.array(points, dtype=np.float64)
+        result[:, 0] += amplitude * np.sin((y + offset) / wavelength)
+        return result
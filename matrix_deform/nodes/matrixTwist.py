@@ -1,7 +1,7 @@
 import math
 import maya.OpenMaya as om
 
-from matrix_deform.lib import MatrixDeform
+from matrix_deform.lib import MatrixDeform, preTransformAxis, rotatedMatrix
 
 
 class MatrixTwist(MatrixDeform):
@@ -10,13 +10,14 @@ class MatrixTwist(MatrixDeform):
     # default
     id = om.MTypeId(0x0010A52E)
     pluginNodeTypeName = "matrixTwist"
+    kernel = "twist"
 
     def isAbstractClass(self):
         return False
 
     @classmethod
     def nodeInitialize(cls):
-        super(cls, cls).nodeInitialize()
+        super(MatrixTwist, cls).nodeInitialize()
         nAttr = om.MFnNumericAttribute()
 
         # Attribute: curvature
@@ -55,30 +56,37 @@ class MatrixTwist(MatrixDeform):
         nAttr.setSoftMax(10)
         cls.addAttribute(cls.aHighBound)
 
-        cls.attributeAffects(cls.aStartAngle, cls.outMatrix)
-        cls.attributeAffects(cls.aEndAngle, cls.outMatrix)
-        cls.attributeAffects(cls.aLowBound, cls.outMatrix)
-        cls.attributeAffects(cls.aHighBound, cls.outMatrix)
+        cls.affectsOutputs(cls.aStartAngle)
+        cls.affectsOutputs(cls.aEndAngle)
+        cls.affectsOutputs(cls.aLowBound)
+        cls.affectsOutputs(cls.aHighBound)
+
+    def deformParameters(self, datablock):
+        return {
+            "startAngle": datablock.inputValue(self.aStartAngle).asDouble(),
+            "endAngle": datablock.inputValue(self.aEndAngle).asDouble(),
+            "lowBound": datablock.inputValue(self.aLowBound).asDouble(),
+            "highBound": datablock.inputValue(self.aHighBound).asDouble()
+        }
 
     def deformMatrix(self, datablock, deformMat, mat, envelope):
 
         startAngle = datablock.inputValue(self.aStartAngle).asDouble()
         endAngle = datablock.inputValue(self.aEndAngle).asDouble()
         if startAngle == 0.0 and endAngle == 0.0:
-            return mat  # Nothing changed so return the inMatrix
+            # Nothing changed so return the inMatrix
+            return self.passThrough(mat, "angles")
 
         lowBound = datablock.inputValue(self.aLowBound).asDouble()
         highBound = datablock.inputValue(self.aHighBound).asDouble()
         if lowBound >= highBound:
-            return mat
+            return self.passThrough(mat, "bounds")
 
         # Get the point to deform in deformSpace
-        invDeformMat = deformMat.inverse()
-        localMat = mat * invDeformMat
+        localMat = self.localMatrix(datablock, mat, deformMat)
 
         # This is actually in deformSpace
-        transformationMatrix = om.MTransformationMatrix(localMat)
-        pt = transformationMatrix.getTranslation(om.MSpace.kWorld)
+        pt = om.MVector(localMat(3, 0), localMat(3, 1), localMat(3, 2))
 
         newPt = om.MVector(pt)
 
@@ -86,12 +94,12 @@ class MatrixTwist(MatrixDeform):
         if pt.y >= highBound:
             pt.y = highBound
             if endAngle == 0.0:
-                return mat
+                return self.passThrough(mat, "outsideBounds")
 
         elif pt.y < lowBound:
             pt.y = lowBound
             if startAngle == 0.0:
-                return mat
+                return self.passThrough(mat, "outsideBounds")
 
         # Percentage between the bounds
         percentage = (pt.y - lowBound) / (highBound - lowBound)
@@ -115,14 +123,11 @@ class MatrixTwist(MatrixDeform):
         newPt.x = x * math.cos(angle) + z * math.sin(angle)
         newPt.z = x * math.sin(angle) + z * math.cos(angle)
 
-        # Rotate around the y-axis
-        eulerRot = om.MEulerRotation(om.MVector(0, angle, 0))
-        # Rotate the matrix around the z-axis (in pre-transform space)
-        transformationMatrix.rotateBy(eulerRot, om.MSpace.kPreTransform)
-
-        # Adjust the matrix position with point
-        transformationMatrix.setTranslation(newPt, om.MSpace.kWorld)
-        newLocalMat = transformationMatrix.asMatrix()
+        # Rotate the matrix around the y-axis (in pre-transform space) in
+        # closed form and adjust the matrix position with point
+        axis = preTransformAxis(localMat, 1)
+        newLocalMat = rotatedMatrix(localMat, axis, angle,
+                                    (newPt.x, newPt.y, newPt.z))
         newMat = newLocalMat * deformMat  # Back to worldSpace
 
         return newMat
\ No newline at end of file
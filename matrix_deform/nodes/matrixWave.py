@@ -1,7 +1,7 @@
 import math
 import maya.OpenMaya as om
 
-from matrix_deform.lib import MatrixDeform
+from matrix_deform.lib import MatrixDeform, matrixToList, listToMatrix
 
 
 class MatrixWave(MatrixDeform):
@@ -10,13 +10,14 @@ class MatrixWave(MatrixDeform):
     # default
     id = om.MTypeId(0x0010A52D)
     pluginNodeTypeName = "matrixWave"
+    kernel = "wave"
 
     def isAbstractClass(self):
         return False
 
     @classmethod
     def nodeInitialize(cls):
-        super(cls, cls).nodeInitialize()
+        super(MatrixWave, cls).nodeInitialize()
         nAttr = om.MFnNumericAttribute()
 
         # Attribute: curvature
@@ -74,40 +75,46 @@ class MatrixWave(MatrixDeform):
         nAttr.setSoftMax(10)
         cls.addAttribute(cls.aMaxRadius)
 
-        cls.attributeAffects(cls.aAmplitude, cls.outMatrix)
-        cls.attributeAffects(cls.aWavelength, cls.outMatrix)
-        cls.attributeAffects(cls.aOffset, cls.outMatrix)
-        cls.attributeAffects(cls.aDropoff, cls.outMatrix)
-        cls.attributeAffects(cls.aMinRadius, cls.outMatrix)
-        cls.attributeAffects(cls.aMaxRadius, cls.outMatrix)
+        cls.affectsOutputs(cls.aAmplitude)
+        cls.affectsOutputs(cls.aWavelength)
+        cls.affectsOutputs(cls.aOffset)
+        cls.affectsOutputs(cls.aDropoff)
+        cls.affectsOutputs(cls.aMinRadius)
+        cls.affectsOutputs(cls.aMaxRadius)
+
+    def deformParameters(self, datablock):
+        return {
+            "amplitude": datablock.inputValue(self.aAmplitude).asDouble(),
+            "wavelength": datablock.inputValue(self.aWavelength).asDouble(),
+            "offset": datablock.inputValue(self.aOffset).asDouble(),
+            "dropoff": datablock.inputValue(self.aDropoff).asDouble(),
+            "minRadius": datablock.inputValue(self.aMinRadius).asDouble(),
+            "maxRadius": datablock.inputValue(self.aMaxRadius).asDouble()
+        }
 
     def deformMatrix(self, datablock, deformMat, mat, envelope):
 
         amplitude = datablock.inputValue(self.aAmplitude).asDouble()
         if amplitude == 0.0:
-            return mat  # Nothing changed so return the inMatrix
+            # Nothing changed so return the inMatrix
+            return self.passThrough(mat, "amplitude")
 
         minRadius = datablock.inputValue(self.aMinRadius).asDouble()
         maxRadius = datablock.inputValue(self.aMaxRadius).asDouble()
         if minRadius >= maxRadius:
-            return mat
+            return self.passThrough(mat, "bounds")
 
         wavelength = datablock.inputValue(self.aWavelength).asDouble()
         offset = datablock.inputValue(self.aOffset).asDouble()
         dropoff = datablock.inputValue(self.aDropoff).asDouble()
 
         # Get the point to deform in deformSpace
-        invDeformMat = deformMat.inverse()
-        localMat = mat * invDeformMat
-
-        transformationMatrix = om.MTransformationMatrix(localMat)
-        pt = transformationMatrix.getTranslation(
-            om.MSpace.kWorld)  # this is actually in deformSpace
+        localMat = self.localMatrix(datablock, mat, deformMat)
 
         # -- Calculate the new point after the bend
-        x = pt.x
-        y = pt.y
-        z = pt.z
+        x = localMat(3, 0)
+        y = localMat(3, 1)
+        z = localMat(3, 2)
 
         # Distance from the center in x and z of the wave is the sample point
         # on the wave algorithm
@@ -126,73 +133,47 @@ class MatrixWave(MatrixDeform):
         if outsideRange:
             # outsideRange would have no new orientation since it's not
             # being deformed on the curve
-            return mat
+            return self.passThrough(mat, "radius")
 
-        # Calculate amplitude of point (w/ dropoff)
-        pointAmplitude = amplitude
-        radiusRangePercentage = (radius - minRadius) / (maxRadius - minRadius)
+        # Calculate amplitude of point (w/ dropoff) and how the dropoff
+        # weight changes over the radius
+        radiusRange = maxRadius - minRadius
+        radiusRangePercentage = (radius - minRadius) / radiusRange
 
         currentDropoff = 1.0
-        if dropoff:
-            if dropoff > 0.0:
-                currentDropoff = 1 - (dropoff * radiusRangePercentage)
-            elif dropoff < 0.0:
-                currentDropoff = 1 - (dropoff * (1 - radiusRangePercentage))
-        if currentDropoff != 1.0:
-            pointAmplitude *= currentDropoff
-
-        wavePoint = radius + offset
-        frequency = 1.0 / wavelength
+        dropoffSlope = 0.0
+        if dropoff > 0.0:
+            currentDropoff = 1 - (dropoff * radiusRangePercentage)
+            dropoffSlope = -dropoff / radiusRange
+        elif dropoff < 0.0:
+            currentDropoff = 1 - (dropoff * (1 - radiusRangePercentage))
+            dropoffSlope = dropoff / radiusRange
 
-        # y = y + a * (sin(u*sqrt(x^2+y^2)+t))
-        y += math.sin(wavePoint * frequency) * pointAmplitude
-
-        newPt = om.MVector(x, y, z)
-
-        # Adjust the matrix's position
-        transformationMatrix.setTranslation(newPt, om.MSpace.kWorld)
-        newLocalMat = transformationMatrix.asMatrix()
-
-        # Calculate rotation to the matrix
-        # Use the jacobian matrix method (2) from:
-        # http://http.developer.nvidia.com/GPUGems/gpugems_ch42.html
-        # The jacobian matrix is the orientation matrix we need.
-        # (3x3 matrix)
-        # Maya magically only supports 4x4 matrix. All we need to do
-        # to convert is add the extra row as an identity row.
-        # As the extra row really only defines 'translate' in most
-        # scenarios (no deformation in this case).
-
-        # To keep this easy we only take the jacobian matrix from the core
-        # function of a wave deformer. Then apply the 'dropoff' amount by
-        # blending the jacobian matrix with the identity matrix to the
-        # amount of the dropoff
-        u = frequency
-        l = offset
-        distance = sampleRadius
-
-        a = (math.cos((u * distance) + l)/distance) * u * x
-        b = (math.cos((u * distance) + l)/distance) * u * z
-
-        jacobianMatrix4x4 = [1.0, 0.0, 0.0, 0.0,
-                             a, 1.0, b, 0.0,
-                             0.0, 0.0, 1.0, 0.0,
-                             0.0, 0.0, 0.0, 1.0]
-
-        # create MMatrix from list
-        orientationMatrix = om.MMatrix()
-        om.MScriptUtil.createMatrixFromList(jacobianMatrix4x4,
-                                            orientationMatrix)
-
-        if dropoff:
-            # create MTransformationMatrix from MMatrix
-            # get the weighted matrix (by currentDropoff)
-            orientationMatrix = om.MTransfomationMatrix(
-                orientationMatrix).asMatrix(currentDropoff)
-
-            # TODO: Weight the matrix
-
-        newLocalMat = orientationMatrix * newLocalMat
+        frequency = 1.0 / wavelength
+        wavePhase = (radius + offset) * frequency
+        waveSin = math.sin(wavePhase)
+
+        # y = y + a * d(r) * sin(u * (r + t))
+        y += waveSin * amplitude * currentDropoff
+
+        # -- Calculate rotation to the matrix
+        # The orientation is the matrix multiplied by the analytic jacobian
+        # of the wave's displacement (0, h(r), 0). Its gradient is
+        # h'(r) * (x, 0, z) / r, so each axis (row) of the matrix gains its
+        # dot product with the gradient along y. At the center (r == 0) the
+        # gradient is undefined, so the orientation is kept there.
+        # See also: http://http.developer.nvidia.com/GPUGems/gpugems_ch42.html
+        values = matrixToList(localMat)
+        if sampleRadius > 0.0:
+            slope = amplitude * (dropoffSlope * waveSin +
+                                 currentDropoff * frequency *
+                                 math.cos(wavePhase))
+            slope /= sampleRadius
+            for row in range(0, 12, 4):
+                values[row + 1] += slope * (values[row] * x +
+                                            values[row + 2] * z)
+        values[12:15] = (x, y, z)
+        newLocalMat = listToMatrix(values)
 
         newMat = newLocalMat * deformMat  # Back to worldSpace
         return newMat
\ No newline at end of file
@@ -0,0 +1,161 @@
+"""Evaluate the kernels over very large arrays of matrices on many cores.
+
+The input is split into chunks that are deformed by a pool of threads or
+processes. Every chunk writes its result straight into its own slice of a
+preallocated output array, so the output order is deterministic and equal
+to the serial result regardless of the number of workers.
+
+With the "process" backend the input and output arrays live in shared
+memory, so neither the matrices nor the results are pickled between the
+processes. The "thread" backend shares the arrays directly and relies on
+NumPy releasing the GIL during the heavy array operations.
+"""
+import multiprocessing
+
+import numpy as np
+
+from matrix_deform import kernels
+
+BACKENDS = ("serial", "thread", "process")
+
+
+def evaluate(kernel, matrices, deformMatrix, chunkSize=65536, workers=None,
+             backend="thread", **parameters):
+    """Return the deformed matrices evaluated in chunks across workers.
+
+    Args:
+        kernel (str): The name of the kernel in `matrix_deform.kernels`,
+            like "bend", "twist", "wave" or "stack".
+        matrices (array_like): The (N, 4, 4) world space input matrices.
+        deformMatrix (array_like): The (4, 4) deformer matrix.
+        chunkSize (int): The number of matrices per chunk.
+        workers (int, optional): The number of workers, defaults to the
+            number of cores.
+        backend (str): One of "serial", "thread" or "process".
+        **parameters: The keyword arguments for the kernel. A `stats` dict
+            is filled with the culling statistics summed over all chunks.
+
+    Returns:
+        np.ndarray: The (N, 4, 4) deformed matrices.
+    """
+    if backend not in BACKENDS:
+        raise ValueError("Unknown backend: {0}".format(backend))
+
+    matrices = kernels.asMatrices(matrices)
+    deformMatrix = np.asarray(deformMatrix, dtype=np.float64).reshape(4, 4)
+    workers = workers or multiprocessing.cpu_count()
+
+    chunks = [(start, min(start + chunkSize, len(matrices)))
+              for start in range(0, len(matrices), chunkSize)]
+    if backend == "serial" or workers == 1 or len(chunks) <= 1:
+        return _evaluateSerial(kernel, matrices, deformMatrix, parameters)
+
+    # Every chunk fills its own statistics, they are summed afterwards
+    stats = parameters.pop("stats", None)
+    if backend == "thread":
+        result, chunkStats = _evaluateThreads(kernel, matrices, deformMatrix,
+                                              parameters, chunks, workers,
+                                              stats is not None)
+    else:
+        result, chunkStats = _evaluateProcesses(kernel, matrices,
+                                                deformMatrix, parameters,
+                                                chunks, workers,
+                                                stats is not None)
+    if stats is not None:
+        _sumStats(stats, chunkStats)
+    return result
+
+
+def _sumStats(stats, chunkStats):
+    """Fill `stats` with the sum of the culling statistics of all chunks"""
+    for key in ("count", "affected", "culled"):
+        stats[key] = sum(chunk[key] for chunk in chunkStats)
+    stats["cullRatio"] = stats["culled"] / float(max(stats["count"], 1))
+
+
+def _evaluateSerial(kernel, matrices, deformMatrix, parameters):
+    return getattr(kernels, kernel)(matrices, deformMatrix, **parameters)
+
+
+def _evaluateThreads(kernel, matrices, deformMatrix, parameters, chunks,
+                     workers, withStats):
+    from concurrent.futures import ThreadPoolExecutor
+
+    function = getattr(kernels, kernel)
+    result = np.empty_like(matrices)
+
+    def evaluateChunk(chunk):
+        start, stop = chunk
+        chunkParameters = dict(parameters)
+        if withStats:
+            chunkParameters["stats"] = {}
+        result[start:stop] = function(matrices[start:stop], deformMatrix,
+                                      **chunkParameters)
+        return chunkParameters.get("stats")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Consume the results to raise any errors of the workers
+        chunkStats = list(executor.map(evaluateChunk, chunks))
+    return result, chunkStats
+
+
+def _evaluateProcesses(kernel, matrices, deformMatrix, parameters, chunks,
+                       workers, withStats):
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import shared_memory
+
+    inputMemory = shared_memory.SharedMemory(create=True,
+                                             size=matrices.nbytes)
+    outputMemory = shared_memory.SharedMemory(create=True,
+                                              size=matrices.nbytes)
+    try:
+        inputs = np.ndarray(matrices.shape, dtype=matrices.dtype,
+                            buffer=inputMemory.buf)
+        inputs[:] = matrices
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_evaluateSharedChunk, kernel,
+                                       inputMemory.name, outputMemory.name,
+                                       matrices.shape, start, stop,
+                                       deformMatrix, parameters, withStats)
+                       for start, stop in chunks]
+            chunkStats = [future.result() for future in futures]
+
+        outputs = np.ndarray(matrices.shape, dtype=matrices.dtype,
+                             buffer=outputMemory.buf)
+        result = outputs.copy()
+        del inputs, outputs
+    finally:
+        for memory in (inputMemory, outputMemory):
+            memory.close()
+            memory.unlink()
+    return result, chunkStats
+
+
+def _evaluateSharedChunk(kernel, inputName, outputName, shape, start, stop,
+                         deformMatrix, parameters, withStats):
+    """Deform a chunk of the shared input into the shared output.
+
+    Returns:
+        dict: The chunk's culling statistics with `withStats`, else None.
+    """
+    from multiprocessing import shared_memory
+
+    stats = {} if withStats else None
+    if withStats:
+        parameters = dict(parameters, stats=stats)
+
+    inputMemory = shared_memory.SharedMemory(name=inputName)
+    outputMemory = shared_memory.SharedMemory(name=outputName)
+    try:
+        inputs = np.ndarray(shape, dtype=np.float64, buffer=inputMemory.buf)
+        outputs = np.ndarray(shape, dtype=np.float64,
+                             buffer=outputMemory.buf)
+        outputs[start:stop] = getattr(kernels, kernel)(inputs[start:stop],
+                                                       deformMatrix,
+                                                       **parameters)
+        del inputs, outputs
+    finally:
+        inputMemory.close()
+        outputMemory.close()
+    return stats
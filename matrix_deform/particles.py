@@ -0,0 +1,80 @@
+"""Deform per-particle positions and rotations without building matrices.
+
+The particles are deformed in bulk by the kernels of `matrix_deform.kernels`
+from the kind of per-particle arrays that instancers and nParticles use:
+positions with either Euler rotations or aim and up directions.
+"""
+import math
+
+import numpy as np
+
+from matrix_deform import kernels
+
+
+def eulerToRotations(euler, degrees=True):
+    """Return the (N, 3, 3) rotation matrices of (N, 3) XYZ Euler angles"""
+    euler = np.asarray(euler, dtype=np.float64).reshape(-1, 3)
+    if degrees:
+        euler = euler * (math.pi / 180.0)
+    return np.matmul(np.matmul(kernels.rotationX(euler[:, 0]),
+                               kernels.rotationY(euler[:, 1])),
+                     kernels.rotationZ(euler[:, 2]))
+
+
+def rotationsToEuler(rotations, degrees=True):
+    """Return the (N, 3) XYZ Euler angles of (N, 3, 3) rotation matrices"""
+    r = np.asarray(rotations, dtype=np.float64).reshape(-1, 3, 3)
+    cosY = np.hypot(r[:, 0, 0], r[:, 0, 1])
+    y = np.arctan2(-r[:, 0, 2], cosY)
+
+    # In gimbal lock the x and z rotations are the same, keep x at zero
+    locked = cosY < 1e-9
+    x = np.where(locked, 0.0, np.arctan2(r[:, 1, 2], r[:, 2, 2]))
+    z = np.where(locked, np.arctan2(-r[:, 1, 0], r[:, 1, 1]),
+                 np.arctan2(r[:, 0, 1], r[:, 0, 0]))
+
+    euler = np.stack([x, y, z], axis=1)
+    if degrees:
+        euler *= (180.0 / math.pi)
+    return euler
+
+
+def aimToRotations(aim, up):
+    """Return the (N, 3, 3) rotations with x along `aim` and y towards `up`"""
+    aim = _normalize(np.asarray(aim, dtype=np.float64).reshape(-1, 3))
+    up = np.asarray(up, dtype=np.float64).reshape(-1, 3)
+    side = _normalize(np.cross(aim, up))
+    return np.stack([aim, np.cross(side, aim), side], axis=1)
+
+
+def deform(kernel, positions, rotations, deformMatrix, weights=None,
+           **parameters):
+    """Return the deformed positions and rotations of particles.
+
+    Args:
+        kernel (str): The name of the kernel in `matrix_deform.kernels`.
+        positions (array_like): The (N, 3) particle positions.
+        rotations (array_like): The (N, 3, 3) particle rotation matrices.
+        deformMatrix (array_like): The (4, 4) deformer matrix.
+        weights (float or array_like, optional): The envelope or (N,)
+            per-particle weights to blend the deformation by.
+        **parameters: The keyword arguments for the kernel.
+
+    Returns:
+        tuple: The (N, 3) positions and (N, 3, 3) orthonormal rotations.
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    matrices = np.zeros((len(positions), 4, 4))
+    matrices[:, :3, :3] = rotations
+    matrices[:, 3, :3] = positions
+    matrices[:, 3, 3] = 1.0
+
+    matrices = getattr(kernels, kernel)(matrices, deformMatrix,
+                                        weights=weights, **parameters)
+    return matrices[:, 3, :3], kernels.decompose(matrices)[1]
+
+
+def _normalize(vectors):
+    length = np.sqrt(np.einsum("ij,ij->i", vectors, vectors))
+    length[length == 0.0] = 1.0
+    return vectors / length[:, None]
@@ -5,8 +5,19 @@ from matrix_deform.lib import MatrixDeform
 from matrix_deform.nodes.matrixBend import MatrixBend
 from matrix_deform.nodes.matrixWave import MatrixWave
 from matrix_deform.nodes.matrixTwist import MatrixTwist
+from matrix_deform.nodes.matrixDeformStack import MatrixDeformStack
+from matrix_deform.nodes.matrixMesh import MatrixMesh
+from matrix_deform.nodes.matrixCache import MatrixCache
+from matrix_deform.nodes.matrixDeformContext import MatrixDeformContext
+from matrix_deform.nodes.matrixCurve import MatrixCurve
+from matrix_deform.nodes.matrixSine import MatrixSine
+from matrix_deform.nodes.matrixDeformParticles import (MatrixBendPP,
+                                                       MatrixTwistPP,
+                                                       MatrixWavePP)
 
-nodes = [MatrixDeform, MatrixBend, MatrixWave, MatrixTwist]
+nodes = [MatrixDeform, MatrixBend, MatrixWave, MatrixTwist, MatrixDeformStack,
+         MatrixMesh, MatrixCache, MatrixBendPP, MatrixTwistPP, MatrixWavePP,
+         MatrixDeformContext, MatrixCurve, MatrixSine]
 
 
 # initializePlugin
@@ -20,7 +31,7 @@ def initializePlugin(obj):
                                 node.id,
                                 node.creator,
                                 node.nodeInitialize)
-        except RuntimeError, e:
+        except RuntimeError as e:
             mc.warning("Can't register plug-in node "
                        "{0}: {1}".format(node.pluginNodeTypeName, e))
 
@@ -33,6 +44,6 @@ def uninitializePlugin(obj):
     for node in nodes:
         try:
             plugin.deregisterNode(node.id)
-        except RuntimeError, e:
+        except RuntimeError as e:
             mc.warning("Can't deregister plug-in node "
                        "{0}: {1}".format(node.pluginNodeTypeName, e))
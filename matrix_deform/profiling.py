@@ -0,0 +1,149 @@
+"""Opt-in compute instrumentation for the matrix deformer nodes.
+
+When enabled, every compute of a `MatrixDeform` node records its duration
+and every early exit records its reason, like "envelope", "curvature",
+"bounds" or "radius". When disabled the nodes only check the `enabled`
+flag, so the overhead is negligible.
+
+Example:
+    >>> from matrix_deform import profiling
+    >>> profiling.enable()
+    >>> # ... play back the scene
+    >>> profiling.dump("/tmp/matrixDeform.csv")
+    >>> profiling.disable()
+
+"""
+import csv
+import json
+import threading
+import timeit
+
+enabled = False
+timer = timeit.default_timer
+
+_lock = threading.Lock()
+_stats = {}
+
+
+class NodeStats(object):
+    """The recorded statistics of a single node"""
+
+    def __init__(self, nodeType, name):
+        self.nodeType = nodeType
+        self.name = name
+        self.calls = 0
+        self.totalTime = 0.0
+        self.maxTime = 0.0
+        self.exits = {}
+
+    def asDict(self):
+        return {"type": self.nodeType,
+                "name": self.name,
+                "calls": self.calls,
+                "totalTime": self.totalTime,
+                "maxTime": self.maxTime,
+                "exits": dict(self.exits)}
+
+
+def enable():
+    """Start recording the compute statistics"""
+    global enabled
+    enabled = True
+
+
+def disable():
+    """Stop recording, the statistics recorded so far are kept"""
+    global enabled
+    enabled = False
+
+
+def reset():
+    """Clear all recorded statistics"""
+    with _lock:
+        _stats.clear()
+
+
+def _nodeStats(node):
+    nodeType = node.pluginNodeTypeName
+    name = node.nodeName()
+    key = (nodeType, name)
+    stats = _stats.get(key)
+    if stats is None:
+        stats = _stats[key] = NodeStats(nodeType, name)
+    return stats
+
+
+def recordCompute(node, duration):
+    """Record a compute of `node` that took `duration` seconds"""
+    with _lock:
+        stats = _nodeStats(node)
+        stats.calls += 1
+        stats.totalTime += duration
+        stats.maxTime = max(stats.maxTime, duration)
+
+
+def recordExit(node, reason, count=1):
+    """Record `count` early exits of `node` because of `reason`"""
+    with _lock:
+        stats = _nodeStats(node)
+        stats.exits[reason] = stats.exits.get(reason, 0) + count
+
+
+def nodeStats():
+    """Return the statistics per node as a list of dicts"""
+    with _lock:
+        return [stats.asDict() for _, stats in sorted(_stats.items())]
+
+
+def typeStats():
+    """Return the statistics summed per node type as a list of dicts"""
+    types = {}
+    for stats in nodeStats():
+        total = types.get(stats["type"])
+        if total is None:
+            total = types[stats["type"]] = {"type": stats["type"],
+                                            "nodes": 0,
+                                            "calls": 0,
+                                            "totalTime": 0.0,
+                                            "maxTime": 0.0,
+                                            "exits": {}}
+        total["nodes"] += 1
+        total["calls"] += stats["calls"]
+        total["totalTime"] += stats["totalTime"]
+        total["maxTime"] = max(total["maxTime"], stats["maxTime"])
+        for reason, count in stats["exits"].items():
+            total["exits"][reason] = total["exits"].get(reason, 0) + count
+    return [types[nodeType] for nodeType in sorted(types)]
+
+
+def dump(path, format=None):
+    """Write the statistics to a JSON or CSV file.
+
+    Args:
+        path (str): The file to write.
+        format (str, optional): Either "json" or "csv", by default this is
+            taken from the file extension.
+    """
+    if format is None:
+        format = "csv" if path.lower().endswith(".csv") else "json"
+
+    if format == "json":
+        with open(path, "w") as f:
+            json.dump({"nodes": nodeStats(), "types": typeStats()}, f,
+                      indent=4, sort_keys=True)
+        return
+
+    if format != "csv":
+        raise ValueError("Unknown format: {0}".format(format))
+
+    rows = nodeStats()
+    reasons = sorted(set(reason for row in rows for reason in row["exits"]))
+    with open(path, "w") as f:
+        writer = csv.writer(f)
+        writer.writerow(["type", "name", "calls", "totalTime", "maxTime"] +
+                        ["exit:" + reason for reason in reasons])
+        for row in rows:
+            writer.writerow([row["type"], row["name"], row["calls"],
+                             row["totalTime"], row["maxTime"]] +
+                            [row["exits"].get(reason, 0)
+                             for reason in reasons])
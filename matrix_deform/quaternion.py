@@ -0,0 +1,121 @@
+"""Vectorized quaternion helpers for arrays of rotations.
+
+Quaternions are stored as (N, 4) arrays in Maya's (x, y, z, w) order and
+rotation matrices as (N, 3, 3) arrays in Maya's row-vector convention, so
+the rotation of a quaternion equals `MQuaternion.asMatrix()`.
+"""
+import numpy as np
+
+
+def fromRotations(rotations):
+    """Return the (N, 4) unit quaternions of (N, 3, 3) rotation matrices"""
+    r = np.asarray(rotations, dtype=np.float64).reshape(-1, 3, 3)
+    trace = r[:, 0, 0] + r[:, 1, 1] + r[:, 2, 2]
+
+    # Use the numerically most stable of the four formulas per rotation
+    # (Shepperd's method) by picking the largest of w, x, y and z.
+    candidates = np.stack([trace, r[:, 0, 0], r[:, 1, 1], r[:, 2, 2]],
+                          axis=1)
+    largest = np.argmax(candidates, axis=1)
+
+    quaternions = np.empty((len(r), 4))
+    for index in range(4):
+        mask = largest == index
+        if not np.any(mask):
+            continue
+
+        m = r[mask]
+        if index == 0:
+            s = np.sqrt(1.0 + trace[mask]) * 2.0
+            q = [(m[:, 1, 2] - m[:, 2, 1]) / s,
+                 (m[:, 2, 0] - m[:, 0, 2]) / s,
+                 (m[:, 0, 1] - m[:, 1, 0]) / s,
+                 0.25 * s]
+        elif index == 1:
+            s = np.sqrt(1.0 + m[:, 0, 0] - m[:, 1, 1] - m[:, 2, 2]) * 2.0
+            q = [0.25 * s,
+                 (m[:, 0, 1] + m[:, 1, 0]) / s,
+                 (m[:, 0, 2] + m[:, 2, 0]) / s,
+                 (m[:, 1, 2] - m[:, 2, 1]) / s]
+        elif index == 2:
+            s = np.sqrt(1.0 + m[:, 1, 1] - m[:, 0, 0] - m[:, 2, 2]) * 2.0
+            q = [(m[:, 0, 1] + m[:, 1, 0]) / s,
+                 0.25 * s,
+                 (m[:, 1, 2] + m[:, 2, 1]) / s,
+                 (m[:, 2, 0] - m[:, 0, 2]) / s]
+        else:
+            s = np.sqrt(1.0 + m[:, 2, 2] - m[:, 0, 0] - m[:, 1, 1]) * 2.0
+            q = [(m[:, 0, 2] + m[:, 2, 0]) / s,
+                 (m[:, 1, 2] + m[:, 2, 1]) / s,
+                 0.25 * s,
+                 (m[:, 0, 1] - m[:, 1, 0]) / s]
+        quaternions[mask] = np.stack(q, axis=1)
+
+    return normalize(quaternions)
+
+
+def toRotations(quaternions):
+    """Return the (N, 3, 3) rotation matrices of (N, 4) quaternions"""
+    q = normalize(quaternions)
+    x, y, z, w = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+
+    rotations = np.empty((len(q), 3, 3), dtype=q.dtype)
+    rotations[:, 0, 0] = 1.0 - 2.0 * (y * y + z * z)
+    rotations[:, 0, 1] = 2.0 * (x * y + z * w)
+    rotations[:, 0, 2] = 2.0 * (x * z - y * w)
+    rotations[:, 1, 0] = 2.0 * (x * y - z * w)
+    rotations[:, 1, 1] = 1.0 - 2.0 * (x * x + z * z)
+    rotations[:, 1, 2] = 2.0 * (y * z + x * w)
+    rotations[:, 2, 0] = 2.0 * (x * z + y * w)
+    rotations[:, 2, 1] = 2.0 * (y * z - x * w)
+    rotations[:, 2, 2] = 1.0 - 2.0 * (x * x + y * y)
+    return rotations
+
+
+def normalize(quaternions):
+    """Return `quaternions` scaled to unit length"""
+    q = np.asarray(quaternions).reshape(-1, 4)
+    length = np.sqrt(np.einsum("ij,ij->i", q, q))
+    length[length == 0.0] = 1.0
+    return q / length[:, None]
+
+
+def multiply(a, b):
+    """Return the quaternion products `a * b` for (N, 4) arrays.
+
+    Like multiplying Maya's row-vector rotation matrices, the result rotates
+    by `a` first and then by `b`.
+    """
+    a = np.asarray(a).reshape(-1, 4)
+    b = np.asarray(b).reshape(-1, 4)
+    ax, ay, az, aw = a[:, 0], a[:, 1], a[:, 2], a[:, 3]
+    bx, by, bz, bw = b[:, 0], b[:, 1], b[:, 2], b[:, 3]
+    return np.stack([bw * ax + bx * aw + by * az - bz * ay,
+                     bw * ay + by * aw + bz * ax - bx * az,
+                     bw * az + bz * aw + bx * ay - by * ax,
+                     bw * aw - bx * ax - by * ay - bz * az], axis=1)
+
+
+def slerp(a, b, t):
+    """Return the spherical linear interpolation from `a` to `b` by `t`.
+
+    The interpolation takes the shortest path. `t` is either a scalar or an
+    (N,) array of weights.
+    """
+    a = np.asarray(a).reshape(-1, 4)
+    b = np.asarray(b).reshape(-1, 4)
+    t = np.asarray(t, dtype=a.dtype).reshape(-1, 1)
+
+    cosAngle = np.einsum("ij,ij->i", a, b)[:, None]
+    b = np.where(cosAngle < 0.0, -b, b)
+    cosAngle = np.abs(cosAngle)
+
+    angle = np.arccos(np.minimum(cosAngle, 1.0))
+    sinAngle = np.sin(angle)
+
+    # Fall back to linear interpolation for nearly identical rotations
+    close = sinAngle < 1e-6
+    safeSin = np.where(close, 1.0, sinAngle)
+    weightA = np.where(close, 1.0 - t, np.sin((1.0 - t) * angle) / safeSin)
+    weightB = np.where(close, t, np.sin(t * angle) / safeSin)
+    return normalize(weightA * a + weightB * b)
@@ -0,0 +1,165 @@
+"""Stress the matrix deformer nodes with concurrent evaluation.
+
+The nodes declare themselves safe for Maya's parallel evaluation (see
+`MatrixDeform.schedulingType`). This evaluates many node instances through
+the headless stand-in (see `matrix_deform.headless`) from many threads at
+once, the threads share the node instances and with that their caches, and
+checks that every result is bit-identical to a serial evaluation:
+
+    python -m matrix_deform.stress --threads 8 --nodes 16 --rounds 50
+
+The exit code is 1 when any result differs.
+"""
+import argparse
+import sys
+import threading
+
+import numpy as np
+
+from matrix_deform import headless
+from matrix_deform.benchmark import createMatrices
+
+
+def nodeTypes():
+    """Return the node classes to stress, API 1.0 and API 2.0"""
+    headless.install()
+
+    from matrix_deform.api2 import nodes as api2
+    from matrix_deform.nodes.matrixBend import MatrixBend
+    from matrix_deform.nodes.matrixTwist import MatrixTwist
+    from matrix_deform.nodes.matrixWave import MatrixWave
+
+    return [MatrixBend, MatrixTwist, MatrixWave,
+            api2.MatrixBend, api2.MatrixTwist, api2.MatrixWave]
+
+
+# The parameter sets each node is evaluated with, cycled per evaluation so
+# that concurrent computes of the same node see different inputs.
+PARAMETERS = {
+    "matrixBend": [{"curvature": 45.0}, {"curvature": -90.0},
+                   {"curvature": 45.0, "envelope": 0.0}],
+    "matrixTwist": [{"startAngle": 0.0, "endAngle": 90.0},
+                    {"startAngle": -45.0, "endAngle": 45.0}],
+    "matrixWave": [{"amplitude": 0.2, "maxRadius": 1.0},
+                   {"amplitude": 0.1, "wavelength": 0.5, "dropoff": 0.5}],
+}
+
+
+def createJobs(nodeCount, matrixCount, seed=0):
+    """Return the evaluations to run as (node, plug, values) tuples.
+
+    Every node type gets `nodeCount` instances and each instance is
+    evaluated with every parameter set, both per matrix and batched.
+    """
+    rng = np.random.RandomState(seed)
+    jobs = []
+    for nodeClass in nodeTypes():
+        for index in range(nodeCount):
+            node = headless.createNode(nodeClass)
+            matrices = createMatrices(matrixCount, (-1, -1, -1), (1, 1, 1),
+                                      seed + len(jobs))
+            deformMatrix = np.identity(4)
+            deformMatrix[3, :3] = rng.uniform(-0.5, 0.5, size=3)
+            for parameters in PARAMETERS[nodeClass.pluginNodeTypeName]:
+                values = dict(parameters, inDeformerMatrix=deformMatrix)
+                jobs.append((node, "outMatrices",
+                             dict(values, inMatrices=list(matrices))))
+                for matrix in matrices[:4]:
+                    jobs.append((node, "outMatrix",
+                                 dict(values, inMatrix=matrix)))
+    return jobs
+
+
+def evaluate(job):
+    """Return the result of a job as a (count, 16) array"""
+    node, plug, values = job
+    value = headless.compute(node, plug, values)
+    if plug == "outMatrices":
+        value = [value[index] for index in sorted(value)]
+    else:
+        value = [value]
+    return np.array([list(matrix) for matrix in value]).reshape(-1, 16)
+
+
+def run(threadCount=8, nodeCount=16, rounds=20, matrixCount=32, seed=0):
+    """Evaluate the jobs serially and concurrently and compare the results.
+
+    Args:
+        threadCount (int): The number of threads evaluating at once.
+        nodeCount (int): The number of instances per node type.
+        rounds (int): The number of times each thread evaluates all jobs.
+        matrixCount (int): The number of matrices per node.
+        seed (int): The seed for the random input matrices.
+
+    Returns:
+        list: The (thread, iteration, node name, plug) of each mismatch.
+    """
+    jobs = createJobs(nodeCount, matrixCount, seed)
+    reference = [evaluate(job) for job in jobs]
+
+    # Start from empty caches so the threads race on filling them
+    for node, _, _ in jobs:
+        if hasattr(node, "invalidateCache"):
+            node.invalidateCache()
+
+    lock = threading.Lock()
+    start = threading.Event()
+    mismatches = []
+
+    def worker(thread):
+        # Every thread runs the jobs in its own order so the same node is
+        # computed by several threads at the same time
+        order = np.random.RandomState(seed + thread).permutation(len(jobs))
+        start.wait()
+        for iteration in range(rounds):
+            for index in order:
+                try:
+                    result = evaluate(jobs[index])
+                    same = np.array_equal(result, reference[index])
+                except Exception:
+                    same = False
+                if not same:
+                    node, plug, _ = jobs[index]
+                    with lock:
+                        mismatches.append((thread, iteration,
+                                           node.nodeName(), plug))
+
+    threads = [threading.Thread(target=worker, args=(thread,))
+               for thread in range(threadCount)]
+    for thread in threads:
+        thread.start()
+    start.set()
+    for thread in threads:
+        thread.join()
+    return mismatches
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m matrix_deform.stress",
+        description="Evaluate the matrix deformer nodes concurrently and "
+                    "check the results against a serial evaluation.")
+    parser.add_argument("--threads", type=int, default=8,
+                        help="The number of concurrent threads.")
+    parser.add_argument("--nodes", type=int, default=16,
+                        help="The number of instances per node type.")
+    parser.add_argument("--rounds", type=int, default=20,
+                        help="The number of rounds per thread.")
+    parser.add_argument("--count", type=int, default=32,
+                        help="The number of matrices per node.")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="The seed for the random input matrices.")
+    options = parser.parse_args(args)
+
+    mismatches = run(options.threads, options.nodes, options.rounds,
+                     options.count, options.seed)
+    for thread, iteration, name, plug in mismatches:
+        print("Mismatch: {0}.{1} in thread {2}, iteration {3}".format(
+            name, plug, thread, iteration))
+    print("{0} threads, {1} mismatches".format(options.threads,
+                                               len(mismatches)))
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""Evaluate a deformer over many frames in a single vectorized pass.
+
+Baking or sampling motion blur evaluates the same setup at many times. Here
+the deformer parameters and the deformer matrix are given per frame and the
+whole (frames x matrices) block is deformed at once by the deformer space
+kernels of `matrix_deform.kernels`, without any graph pulls.
+
+Example:
+    >>> from matrix_deform import timebatch
+    >>> frames = np.arange(1001, 1241)
+    >>> out = timebatch.evaluate("bend", matrices, deformMatrices,
+    ...                          curvature=np.linspace(0, 90, len(frames)))
+    >>> out.shape
+    (240, 10000, 4, 4)
+
+"""
+import numpy as np
+
+from matrix_deform import kernels
+
+# The maximum number of matrices deformed at once to bound the memory use
+# of the intermediate arrays.
+CHUNK_SIZE = 1 << 20
+
+
+def evaluate(kernel, matrices, deformMatrices, frameCount=None,
+             chunkSize=CHUNK_SIZE, **parameters):
+    """Deform matrices for many frames at once.
+
+    Args:
+        kernel (str): The kernel's name: "bend", "twist" or "wave".
+        matrices (array_like): The (F, N, 4, 4) input matrices per frame or
+            (N, 4, 4) matrices that are the same for every frame.
+        deformMatrices (array_like): The (F, 4, 4) deformer matrices per
+            frame or a single (4, 4) deformer matrix.
+        frameCount (int, optional): The number of frames F. By default this
+            is taken from the per-frame inputs.
+        chunkSize (int): The maximum number of matrices to deform at once.
+        **parameters: The kernel's parameters, each either a single value
+            or an (F,) array with a value per frame.
+
+    Returns:
+        np.ndarray: The (F, N, 4, 4) deformed matrices.
+    """
+    if kernel not in kernels.LOCAL_KERNELS:
+        raise ValueError("Unknown kernel: {0}".format(kernel))
+    localKernel = kernels.LOCAL_KERNELS[kernel]
+
+    matrices = np.asarray(matrices, dtype=np.float64)
+    deformMatrices = np.asarray(deformMatrices, dtype=np.float64)
+    parameters = dict((name, np.asarray(value))
+                      for name, value in parameters.items())
+
+    if frameCount is None:
+        frameCount = _frameCount(matrices, deformMatrices, parameters)
+    matrices = np.broadcast_to(matrices.reshape((-1,) + matrices.shape[-3:]),
+                               (frameCount,) + matrices.shape[-3:])
+    count = matrices.shape[1]
+    deformMatrices = np.broadcast_to(deformMatrices.reshape(-1, 4, 4),
+                                     (frameCount, 4, 4))
+    invDeformMatrices = np.linalg.inv(deformMatrices)
+
+    result = np.empty((frameCount, count, 4, 4))
+    framesPerChunk = max(1, chunkSize // max(count, 1))
+    for start in range(0, frameCount, framesPerChunk):
+        frames = slice(start, min(start + framesPerChunk, frameCount))
+        chunk = matrices[frames]
+        local = np.matmul(chunk, invDeformMatrices[frames, None])
+
+        # Repeat the per-frame parameters for each matrix of the frame
+        chunkParameters = {}
+        for name, value in parameters.items():
+            if value.ndim:
+                value = np.repeat(value[frames], count)
+            chunkParameters[name] = value
+
+        flat = local.reshape(-1, 4, 4)
+        deformed = localKernel(flat, **chunkParameters)
+
+        # Matrices the kernel did not change are returned bit-identical
+        # instead of taking a round trip through the deformer's space
+        unchanged = np.all((deformed == flat).reshape(-1, 16), axis=1)
+        deformed = np.matmul(deformed.reshape(local.shape),
+                             deformMatrices[frames, None])
+        unchanged = unchanged.reshape(local.shape[:2])
+        deformed[unchanged] = chunk[unchanged]
+        result[frames] = deformed
+
+    return result
+
+
+def bake(path, kernel, matrices, deformMatrices, frames, scale=False,
+         chunkSize=CHUNK_SIZE, **parameters):
+    """Deform matrices for many frames and write them to a matrix cache.
+
+    The frames are evaluated and written in chunks of at most `chunkSize`
+    matrices, so the whole block never has to be in memory at once.
+
+    Args:
+        path (str): The cache file to write, see `matrix_deform.cache`.
+        kernel (str): The kernel's name: "bend", "twist" or "wave".
+        matrices (array_like): The (F, N, 4, 4) or (N, 4, 4) input matrices.
+        deformMatrices (array_like): The (F, 4, 4) or (4, 4) deformer
+            matrices.
+        frames (list): The F frames, evenly spaced in ascending order.
+        scale (bool): Whether to store the scale of the matrices.
+        chunkSize (int): The maximum number of matrices to deform at once.
+        **parameters: The kernel's parameters per frame, see `evaluate()`.
+
+    Returns:
+        Cache: The baked cache.
+    """
+    from matrix_deform.cache import Cache, CacheWriter
+
+    frames = list(frames)
+    if not frames:
+        raise ValueError("No frames to bake to: {0}".format(path))
+    step = frames[1] - frames[0] if len(frames) > 1 else 1.0
+
+    matrices = np.asarray(matrices, dtype=np.float64)
+    deformMatrices = np.asarray(deformMatrices, dtype=np.float64)
+    perFrame = matrices.ndim == 4
+    count = matrices.shape[-3]
+    framesPerChunk = max(1, chunkSize // max(count, 1))
+
+    with CacheWriter(path, count, frames[0], step, scale) as writer:
+        for start in range(0, len(frames), framesPerChunk):
+            end = min(start + framesPerChunk, len(frames))
+            chunkParameters = dict(
+                (name, _frameSlice(value, start, end))
+                for name, value in parameters.items())
+            writer.write(evaluate(
+                kernel,
+                matrices[start:end] if perFrame else matrices,
+                _frameSlice(deformMatrices, start, end, 3),
+                frameCount=end - start,
+                chunkSize=chunkSize,
+                **chunkParameters))
+
+    return Cache(path)
+
+
+def _frameCount(matrices, deformMatrices, parameters):
+    """Return the number of frames of the per-frame inputs"""
+    counts = set()
+    if matrices.ndim == 4:
+        counts.add(matrices.shape[0])
+    if deformMatrices.ndim == 3:
+        counts.add(deformMatrices.shape[0])
+    for value in parameters.values():
+        if value.ndim:
+            counts.add(len(value))
+
+    if len(counts) > 1:
+        raise ValueError("The per-frame inputs have different frame counts: "
+                         "{0}".format(sorted(counts)))
+    return counts.pop() if counts else 1
+
+
+def _frameSlice(value, start, end, ndim=1):
+    """Return the frames `start` to `end` of a per-frame `value`"""
+    value = np.asarray(value)
+    if value.ndim == ndim:
+        return value[start:end]
+    return value
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from matrix_deform import headless  # noqa: E402
+
+headless.install()
+
+
+def randomMatrices(count, seed=0, shear=True, spread=1.5):
+    """Return (count, 4, 4) random matrices, sheared or rotated and scaled"""
+    rng = np.random.RandomState(seed)
+    matrices = np.tile(np.identity(4), (count, 1, 1))
+    if shear:
+        matrices[:, :3, :3] = rng.normal(size=(count, 3, 3))
+    else:
+        for matrix in matrices:
+            rotation = np.linalg.qr(rng.normal(size=(3, 3)))[0]
+            matrix[:3, :3] = rotation * rng.uniform(0.5, 2.0, size=(3, 1))
+    matrices[:, 3, :3] = rng.normal(size=(count, 3)) * spread
+    return matrices
+
+
+@pytest.fixture
+def matrices():
+    return randomMatrices(200, seed=1)
@@ -0,0 +1,76 @@
+import json
+
+import numpy as np
+
+from matrix_deform import batch, cache, kernels
+
+from conftest import randomMatrices
+
+
+def writeScene(directory, output):
+    matrices = randomMatrices(300, seed=8, shear=False)
+    np.save(str(directory / "in.npy"), matrices)
+
+    bendMatrix = np.identity(4)
+    bendMatrix[3, 1] = 0.5
+    scene = {
+        "input": "in.npy",
+        "output": output,
+        "frames": {"start": 1, "end": 5},
+        "deformers": [
+            {"type": "bend", "matrix": bendMatrix.ravel().tolist(),
+             "parameters": {"curvature": {"keys": [[1, 0], [5, 80]]},
+                            "lowBound": -2.0}},
+            {"type": "twist",
+             "parameters": {"startAngle": 10.0, "endAngle": -50.0}},
+        ],
+    }
+    path = directory / "scene.json"
+    path.write_text(json.dumps(scene))
+    return str(path), matrices, bendMatrix
+
+
+def expectedFrames(matrices, bendMatrix):
+    result = []
+    for frame in range(1, 6):
+        curvature = 80.0 * (frame - 1) / 4.0
+        deformed = kernels.bend(matrices, bendMatrix, curvature=curvature,
+                                lowBound=-2.0)
+        result.append(kernels.twist(deformed, np.identity(4),
+                                    startAngle=10.0, endAngle=-50.0))
+    return np.array(result)
+
+
+def test_cliWritesTheDeformedFrames(tmp_path, capsys):
+    scenePath, matrices, bendMatrix = writeScene(tmp_path, "out.npy")
+
+    assert batch.main([scenePath]) == 0
+    assert "Wrote 5 frames" in capsys.readouterr().out
+
+    result = np.load(str(tmp_path / "out.npy"))
+    expected = expectedFrames(matrices, bendMatrix)
+    assert result.shape == (5, 300, 4, 4)
+    assert kernels.matrixErrors(expected.reshape(-1, 4, 4),
+                                result.reshape(-1, 4, 4)).max() \
+        <= kernels.TOLERANCE
+
+
+def test_cliWritesACache(tmp_path):
+    scenePath, matrices, bendMatrix = writeScene(tmp_path, "out.npy")
+
+    output = str(tmp_path / "out.mtxcache")
+    assert batch.main([scenePath, "--output", output]) == 0
+
+    baked = cache.Cache(output)
+    assert (baked.count, baked.frameCount) == (300, 5)
+    expected = expectedFrames(matrices, bendMatrix)
+    np.testing.assert_allclose(baked.sample(3)[:, 3], expected[2][:, 3],
+                               atol=1e-5)
+
+
+def test_cliReportsAMissingInput(tmp_path, capsys):
+    scenePath, _, _ = writeScene(tmp_path, "out.npy")
+
+    missing = str(tmp_path / "missing.npy")
+    assert batch.main([scenePath, "--input", missing]) == 1
+    assert capsys.readouterr().err.startswith("Error:")
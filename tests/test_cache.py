@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from matrix_deform import cache, kernels
+
+from conftest import randomMatrices
+
+
+def rigidMatrices(count, seed):
+    return randomMatrices(count, seed=seed, shear=False)
+
+
+def test_roundTripKeepsTranslationRotationAndScale(tmp_path):
+    frames = [rigidMatrices(50, seed) for seed in range(3)]
+    path = str(tmp_path / "round.mtxcache")
+
+    baked = cache.bake(path, lambda frame: frames[frame], range(3),
+                       scale=True)
+    assert (baked.count, baked.frameCount) == (50, 3)
+    for frame, matrices in enumerate(frames):
+        # Stored in float32
+        np.testing.assert_allclose(baked.sample(frame), matrices,
+                                   atol=1e-5)
+
+
+def test_roundTripWithoutScaleKeepsTheRotation(tmp_path):
+    matrices = rigidMatrices(20, 1)
+    path = str(tmp_path / "rotation.mtxcache")
+
+    baked = cache.bake(path, lambda frame: matrices, [1])
+    _, rotation = kernels.decompose(matrices)
+    np.testing.assert_allclose(baked.sample(1)[:, :3, :3], rotation,
+                               atol=1e-5)
+    np.testing.assert_allclose(baked.sample(1)[:, 3], matrices[:, 3],
+                               atol=1e-5)
+
+
+def test_sampleInterpolatesAndHoldsTheEnds(tmp_path):
+    first = np.tile(np.identity(4), (2, 1, 1))
+    last = first.copy()
+    last[:, 3, :3] = [2.0, 4.0, 6.0]
+    path = str(tmp_path / "hold.mtxcache")
+
+    baked = cache.bake(path, lambda frame: first if frame == 10 else last,
+                       [10, 12])
+    np.testing.assert_allclose(baked.sample(11)[:, 3, :3], [[1, 2, 3]] * 2)
+    np.testing.assert_allclose(baked.sample(0), first)
+    np.testing.assert_allclose(baked.sample(100), last)
+    np.testing.assert_allclose(baked.sample(11, [1])[:, 3, :3], [[1, 2, 3]])
+
+
+def test_sampleWithoutFramesRaises(tmp_path):
+    path = str(tmp_path / "empty.mtxcache")
+    cache.CacheWriter(path, 4).close()
+
+    empty = cache.Cache(path)
+    assert empty.frameCount == 0
+    with pytest.raises(ValueError):
+        empty.sample(0)
+
+
+def test_bakeAgainClosesTheOpenCache(tmp_path):
+    path = str(tmp_path / "again.mtxcache")
+    old = cache.bake(path, lambda frame: rigidMatrices(5, 1), range(2))
+
+    new = cache.bake(path, lambda frame: rigidMatrices(7, 2), range(3))
+    assert old.closed
+    with pytest.raises(ValueError):
+        old.sample(0)
+    assert (new.count, new.frameCount) == (7, 3)
+    np.testing.assert_allclose(new.sample(0)[:, 3], rigidMatrices(7, 2)[:, 3],
+                               atol=1e-5)
+
+
+def test_failedBakeLeavesThePreviousFile(tmp_path):
+    path = str(tmp_path / "failed.mtxcache")
+    cache.bake(path, lambda frame: rigidMatrices(5, 1), range(2))
+
+    def evaluate(frame):
+        if frame == 1:
+            raise RuntimeError("evaluation failed")
+        return rigidMatrices(5, 3)
+
+    with pytest.raises(RuntimeError):
+        cache.bake(path, evaluate, range(2))
+    assert not (tmp_path / "failed.mtxcache.tmp").exists()
+    assert cache.Cache(path).frameCount == 2
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from matrix_deform import curve, headless
+
+from conftest import randomMatrices
+
+
+def basis(i, degree, t, knots):
+    """Return the Cox-de Boor B-spline basis function N(i, degree) at t"""
+    if degree == 0:
+        return 1.0 if knots[i] <= t < knots[i + 1] else 0.0
+    result = 0.0
+    if knots[i + degree] != knots[i]:
+        result += ((t - knots[i]) / (knots[i + degree] - knots[i]) *
+                   basis(i, degree - 1, t, knots))
+    if knots[i + degree + 1] != knots[i + 1]:
+        result += ((knots[i + degree + 1] - t) /
+                   (knots[i + degree + 1] - knots[i + 1]) *
+                   basis(i + 1, degree - 1, t, knots))
+    return result
+
+
+@pytest.mark.parametrize("degree, rational", [(1, False), (3, False),
+                                              (3, True), (5, True)])
+def test_nurbsPointsMatchTheBasisFunctions(degree, rational):
+    rng = np.random.RandomState(degree)
+    count = degree + 4
+    cvs = np.ones((count, 4))
+    cvs[:, :3] = rng.normal(size=(count, 3))
+    if rational:
+        cvs[:, 3] = rng.uniform(0.5, 2.0, count)
+    knots = np.concatenate([[0.0] * degree,
+                            np.sort(rng.uniform(0.0, 3.0, count - degree - 1)),
+                            [3.0] * degree])
+
+    points = curve.nurbsPoints(cvs, knots, degree, 40)
+
+    fullKnots = np.concatenate([knots[:1], knots, knots[-1:]])
+    homogeneous = np.concatenate([cvs[:, :3] * cvs[:, 3:], cvs[:, 3:]],
+                                 axis=1)
+    # The basis functions are open at the end of the domain
+    for t, point in zip(np.linspace(0.0, 3.0 - 1e-12, 40), points):
+        weighted = sum(basis(i, degree, t, fullKnots) * homogeneous[i]
+                       for i in range(count))
+        np.testing.assert_allclose(point, weighted[:3] / weighted[3],
+                                   atol=1e-9)
+
+
+def test_nurbsPointsRejectsWrongKnotCount():
+    with pytest.raises(ValueError):
+        curve.nurbsPoints(np.ones((4, 4)), [0, 0, 1, 1], 3, 10)
+
+
+def compute(plug, values):
+    from matrix_deform.nodes.matrixCurve import MatrixCurve
+
+    node = headless.createNode(MatrixCurve)
+    return headless.compute(node, plug, values)
+
+
+def curveData(cvs):
+    from maya.OpenMaya import MData
+
+    return MData((cvs, [0, 0, 0, 1, 1, 1], 3))
+
+
+def test_nodeFollowsTheDeformerWithTheCurve():
+    # A straight curve along the deformer's y-axis leaves matrices in place
+    cvs = np.array([[0, 0, 0, 1], [0, 3, 0, 1], [0, 7, 0, 1], [0, 10, 0, 1]],
+                   dtype=np.float64)
+    matrices = randomMatrices(30, seed=9, shear=False)
+    matrices[:, 3, 1] = np.abs(matrices[:, 3, 1])
+
+    # Moving deformer and worldSpace curve together moves the result along
+    deformMatrix = randomMatrices(1, seed=10, shear=False)[0]
+    worldCvs = cvs.copy()
+    worldCvs[:, :3] = np.dot(cvs[:, :3], deformMatrix[:3, :3]) + \
+        deformMatrix[3, :3]
+    world = np.matmul(matrices, deformMatrix)
+
+    out = compute("outMatrices", {"inMatrices": list(world),
+                                  "inCurve": curveData(worldCvs),
+                                  "inDeformerMatrix": deformMatrix})
+    result = np.array([list(out[i]) for i in sorted(out)]).reshape(-1, 4, 4)
+    np.testing.assert_allclose(result, world, atol=1e-9)
+
+    single = compute("outMatrix", {"inMatrix": world[0],
+                                   "inCurve": curveData(worldCvs),
+                                   "inDeformerMatrix": deformMatrix})
+    np.testing.assert_array_equal(np.reshape(list(single), (4, 4)),
+                                  result[0])
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from matrix_deform import headless, kernels
+
+from conftest import randomMatrices
+
+
+def nodeClass(kernel):
+    from matrix_deform.nodes.matrixBend import MatrixBend
+    from matrix_deform.nodes.matrixTwist import MatrixTwist
+    from matrix_deform.nodes.matrixWave import MatrixWave
+
+    return {"bend": MatrixBend, "twist": MatrixTwist,
+            "wave": MatrixWave}[kernel]
+
+
+def scalarMatrices(kernel, matrices, deformMatrix, parameters):
+    """Return the `outMatrix` of the node for each of the `matrices`"""
+    node = headless.createNode(nodeClass(kernel))
+    result = []
+    for matrix in matrices:
+        values = dict(parameters, inMatrix=matrix,
+                      inDeformerMatrix=deformMatrix)
+        result.append(list(headless.compute(node, "outMatrix", values)))
+    return np.array(result).reshape(-1, 4, 4)
+
+
+CASES = [
+    ("bend", {"curvature": 70.0, "lowBound": -0.7, "highBound": 1.2}),
+    ("bend", {"curvature": -200.0, "asDegrees": True}),
+    ("twist", {"startAngle": 30.0, "endAngle": -80.0, "lowBound": -0.7,
+               "highBound": 1.2}),
+    ("twist", {"startAngle": 0.0, "endAngle": 120.0}),
+    ("wave", {"amplitude": 0.7, "wavelength": 1.3, "offset": 0.2,
+              "maxRadius": 2.5}),
+    ("wave", {"amplitude": -0.4, "dropoff": 0.6, "minRadius": 0.3,
+              "maxRadius": 2.0}),
+]
+
+
+@pytest.mark.parametrize("kernel, parameters", CASES)
+@pytest.mark.parametrize("shearedDeformer", [False, True])
+def test_kernelMatchesScalarNode(kernel, parameters, shearedDeformer):
+    matrices = randomMatrices(150, seed=2)
+    deformMatrix = randomMatrices(1, seed=3, shear=shearedDeformer)[0]
+
+    expected = scalarMatrices(kernel, matrices, deformMatrix, parameters)
+    result = getattr(kernels, kernel)(matrices, deformMatrix, **parameters)
+
+    errors = kernels.matrixErrors(expected, result)
+    assert errors.max() <= kernels.TOLERANCE
+
+
+def test_matrixErrorsIsRelativeForLargeMatrices():
+    expected = np.identity(4)[None] * 100.0
+    result = expected + 1e-8
+    assert kernels.matrixErrors(expected, result)[0] == pytest.approx(1e-10)
+    assert kernels.matrixErrors(np.identity(4), np.identity(4) + 1e-8)[0] \
+        == pytest.approx(1e-8)
+
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from matrix_deform import kernels, parallel, stress
+
+from conftest import randomMatrices
+
+PARAMETERS = {
+    "bend": {"curvature": 60.0},
+    "twist": {"startAngle": 10.0, "endAngle": -90.0},
+    "wave": {"amplitude": 0.3, "maxRadius": 1.5},
+}
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+@pytest.mark.parametrize("kernel", sorted(PARAMETERS))
+def test_backendsMatchSerialBitForBit(kernel, backend):
+    matrices = randomMatrices(5000, seed=5, spread=3.0)
+    deformMatrix = randomMatrices(1, seed=6, shear=False)[0]
+    parameters = PARAMETERS[kernel]
+
+    expected = getattr(kernels, kernel)(matrices, deformMatrix, **parameters)
+    result = parallel.evaluate(kernel, matrices, deformMatrix,
+                               chunkSize=700, workers=3, backend=backend,
+                               **parameters)
+    np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.parametrize("backend", ["serial", "thread", "process"])
+def test_statsAreSummedOverChunks(backend):
+    matrices = randomMatrices(5000, seed=7, spread=3.0)
+    expected = {}
+    kernels.wave(matrices, np.identity(4), stats=expected,
+                 **PARAMETERS["wave"])
+
+    stats = {}
+    parallel.evaluate("wave", matrices, np.identity(4), chunkSize=700,
+                      workers=3, backend=backend, stats=stats,
+                      **PARAMETERS["wave"])
+    assert 0 < expected["culled"] < expected["count"]
+    assert stats == expected
+
+
+def test_unknownBackendRaises():
+    with pytest.raises(ValueError):
+        parallel.evaluate("bend", np.identity(4), np.identity(4),
+                          backend="gpu")
+
+
+def test_concurrentNodeEvaluationIsDeterministic():
+    mismatches = stress.run(threadCount=4, nodeCount=2, rounds=2,
+                            matrixCount=8)
+    assert mismatches == []
@@ -0,0 +1,52 @@
+import numpy as np
+
+from matrix_deform import kernels
+
+from conftest import randomMatrices
+
+
+def layerMatrix(seed):
+    return randomMatrices(1, seed=seed, shear=False, spread=0.5)[0]
+
+
+LAYERS = [
+    ("bend", layerMatrix(10), {"curvature": 50.0, "lowBound": -1.5}),
+    ("twist", layerMatrix(11), {"startAngle": 20.0, "endAngle": -60.0}),
+    ("wave", layerMatrix(12), {"amplitude": 0.4, "maxRadius": 2.5,
+                               "dropoff": 0.3}),
+]
+
+
+def sequential(matrices, deformMatrix, layers):
+    """Deform by each layer in world space, one kernel call per layer"""
+    for kernelName, matrix, parameters in layers:
+        matrices = getattr(kernels, kernelName)(
+            matrices, np.matmul(matrix, deformMatrix), **parameters)
+    return matrices
+
+
+def test_stackMatchesSequentialKernels(matrices):
+    deformMatrix = randomMatrices(1, seed=4, shear=False)[0]
+
+    expected = sequential(matrices, deformMatrix, LAYERS)
+    result = kernels.stack(matrices, deformMatrix, LAYERS)
+
+    assert kernels.matrixErrors(expected, result).max() <= kernels.TOLERANCE
+
+
+def test_stackSkipsLayersWithoutEffect(matrices):
+    deformMatrix = np.identity(4)
+    layers = LAYERS[:1] + [("twist", layerMatrix(13),
+                            {"startAngle": 0.0, "endAngle": 0.0})]
+
+    expected = kernels.stack(matrices, deformMatrix, LAYERS[:1])
+    result = kernels.stack(matrices, deformMatrix, layers)
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_stackWithoutEffectReturnsACopy(matrices):
+    layers = [("bend", np.identity(4), {"curvature": 0.0})]
+
+    result = kernels.stack(matrices, np.identity(4), layers)
+    np.testing.assert_array_equal(result, matrices)
+    assert result is not matrices